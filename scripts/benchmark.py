@@ -0,0 +1,286 @@
+"""
+Benchmark suite for the analysis scripts on synthetic data.
+
+Each case times one of the pipeline functions (loaders, indicator computation,
+sentiment scoring, correlation, plotting) at the sizes configured by a scale
+preset. Results are appended as JSON lines to outputs/benchmarks/results.jsonl
+together with the git commit, so runs can be compared over time.
+
+Usage:
+    python scripts/benchmark.py --scale small
+    python scripts/benchmark.py --scale large --cases indicators correlation
+    python scripts/benchmark.py --scale large --cases sentiment --sentiment-rows 10000000
+    python scripts/benchmark.py --compare
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import synthetic_data
+from telemetry import peak_rss_mb, reset_peak_rss
+
+RESULTS_FILE = 'outputs/benchmarks/results.jsonl'
+# Wall time ratio (current / baseline) above which compare_runs flags a case
+REGRESSION_THRESHOLD = 1.2
+DATA_DIR = 'outputs/benchmarks/data'
+
+# bars: history length for single-series cases
+# universe: (symbols, bars per symbol) for the loader case
+# headlines: feed sizes; sentiment_rows/plot_bars cap the slow pure-Python paths
+# (TextBlob scores a few thousand headlines per second, so scoring all 10M
+# headlines of the large scale takes hours; --sentiment-rows lifts the cap)
+SCALES = {
+    'smoke': {
+        'bars': [10_000],
+        'universe': [(1, 10_000)],
+        'headlines': [10_000],
+        'sentiment_rows': 1_000,
+        'plot_bars': 1_000,
+    },
+    'small': {
+        'bars': [10_000, 100_000],
+        'universe': [(1, 10_000), (10, 10_000)],
+        'headlines': [100_000],
+        'sentiment_rows': 10_000,
+        'plot_bars': 100_000,
+    },
+    'medium': {
+        'bars': [10_000, 100_000, 1_000_000],
+        'universe': [(1, 10_000), (100, 10_000)],
+        'headlines': [100_000, 1_000_000],
+        'sentiment_rows': 100_000,
+        'plot_bars': 100_000,
+    },
+    'large': {
+        'bars': [10_000, 1_000_000, 10_000_000],
+        'universe': [(1, 10_000), (100, 10_000), (1000, 10_000)],
+        'headlines': [1_000_000, 10_000_000],
+        'sentiment_rows': 100_000,
+        'plot_bars': 1_000_000,
+    },
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    """The loaders read data/yfinance_data relative to the working directory"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def time_call(func, repeat=3):
+    """Best wall time and matching CPU time over repeat calls, silencing prints"""
+    best = None
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        if best is None or wall < best[0]:
+            best = (wall, cpu)
+    return best
+
+
+def universe_dir(data_dir, n_symbols, n_bars):
+    """Synthetic data/yfinance_data tree, generated once and reused across runs"""
+    root = os.path.join(data_dir, f'universe_{n_symbols}x{n_bars}')
+    price_dir = os.path.join(root, 'data', 'yfinance_data')
+    marker = os.path.join(root, '.complete')
+    if not os.path.exists(marker):
+        synthetic_data.write_ohlcv_universe(price_dir, n_symbols, n_bars)
+        open(marker, 'w').close()
+    return root
+
+
+def headlines_file(data_dir, n_rows):
+    path = os.path.join(data_dir, f'headlines_{n_rows}.csv')
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        synthetic_data.write_headlines(f'{path}.tmp', n_rows)
+        os.replace(f'{path}.tmp', path)
+    return path
+
+
+def bench_load_stock_data(scale, data_dir):
+    from technical_analysis import load_stock_data
+    for n_symbols, n_bars in scale['universe']:
+        root = universe_dir(data_dir, n_symbols, n_bars)
+        symbols = synthetic_data.symbol_names(n_symbols)
+
+        def run():
+            with working_directory(root):
+                for symbol in symbols:
+                    load_stock_data(symbol, pd.Timestamp.min, pd.Timestamp.max)
+
+        yield {'symbols': n_symbols, 'bars': n_bars}, n_symbols * n_bars, run
+
+
+def bench_load_news_data(scale, data_dir):
+    from data_loader import load_news_data
+    for n_rows in scale['headlines']:
+        path = headlines_file(data_dir, n_rows)
+        yield {'rows': n_rows}, n_rows, lambda: load_news_data(path)
+
+
+def bench_indicators(scale, data_dir):
+    from technical_analysis import calculate_technical_indicators
+    for n_bars in scale['bars']:
+        df = synthetic_data.generate_ohlcv(n_bars)
+        yield {'bars': n_bars}, n_bars, lambda: calculate_technical_indicators(df.copy())
+
+
+def bench_sentiment(scale, data_dir):
+    from sentiment_analyzer import apply_sentiment_analysis
+    for n_rows in scale['headlines']:
+        n_rows = min(n_rows, scale['sentiment_rows'])
+        df = synthetic_data.generate_headlines(n_rows)
+        yield {'rows': n_rows}, n_rows, lambda: apply_sentiment_analysis(df.copy())
+
+
+def bench_correlation(scale, data_dir):
+    from technical_analysis import calculate_technical_indicators
+    from correlation_analysis import analyze_technical_correlations
+    for n_bars in scale['bars']:
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = calculate_technical_indicators(synthetic_data.generate_ohlcv(n_bars))
+        yield {'bars': n_bars}, n_bars, lambda: analyze_technical_correlations(df.copy())
+
+
+def bench_plots(scale, data_dir):
+    import matplotlib
+    matplotlib.use('Agg')
+    from technical_analysis import calculate_technical_indicators, plot_technical_analysis
+    output_dir = os.path.join(data_dir, 'plots')
+    for n_bars in sorted({min(n, scale['plot_bars']) for n in scale['bars']}):
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = calculate_technical_indicators(synthetic_data.generate_ohlcv(n_bars))
+        yield {'bars': n_bars}, n_bars, lambda: plot_technical_analysis(df, 'SYN0000', output_dir)
+
+
+CASES = {
+    'load_stock_data': bench_load_stock_data,
+    'load_news_data': bench_load_news_data,
+    'indicators': bench_indicators,
+    'sentiment': bench_sentiment,
+    'correlation': bench_correlation,
+    'plots': bench_plots,
+}
+
+
+def run_benchmarks(scale_name='smoke', cases=None, repeat=3, data_dir=DATA_DIR, results_file=RESULTS_FILE,
+                   sentiment_rows=None):
+    """
+    Run the selected cases and append one record per measurement to results_file.
+    sentiment_rows overrides the scale's cap on the headlines scored.
+    """
+    scale = SCALES[scale_name]
+    if sentiment_rows is not None:
+        scale = dict(scale, sentiment_rows=sentiment_rows)
+    run_id = datetime.now().isoformat(timespec='milliseconds')
+    context = {
+        'run_id': run_id,
+        'commit': git_commit(),
+        'scale': scale_name,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+    }
+    records = []
+    os.makedirs(os.path.dirname(results_file) or '.', exist_ok=True)
+
+    for case in cases or CASES:
+        for params, rows, func in CASES[case](scale, data_dir):
+            try:
+                # Peak RSS of this case only, not of the heaviest case so far
+                reset_peak_rss()
+                wall, cpu = time_call(func, repeat)
+                record = dict(context, case=case, params=params, rows=rows, wall_s=round(wall, 6),
+                              cpu_s=round(cpu, 6), rows_per_s=round(rows / wall, 1) if wall > 0 else None,
+                              peak_rss_mb=peak_rss_mb(), status='ok')
+            except Exception as e:
+                record = dict(context, case=case, params=params, rows=rows, status='error', error=str(e))
+            print(f"{case:16s} {json.dumps(params):40s} "
+                  + (f"{record['wall_s']:10.4f}s {record['rows_per_s']:>14,.0f} rows/s"
+                     if record['status'] == 'ok' else f"error: {record['error']}"))
+            with open(results_file, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+            records.append(record)
+
+    return records
+
+
+def compare_runs(results_file=RESULTS_FILE, baseline=None, current=None, threshold=REGRESSION_THRESHOLD):
+    """
+    Wall time of each case in the current run relative to a baseline run
+    (by default the latest run and the one before it with the same scale).
+    Cases slower than threshold times the baseline are flagged as regressions.
+    """
+    df = pd.read_json(results_file, lines=True)
+    df = df[df['status'] == 'ok']
+    df['params'] = df['params'].apply(lambda p: json.dumps(p, sort_keys=True))
+
+    current = current or df['run_id'].max()
+    scale = df.loc[df['run_id'] == current, 'scale'].iloc[0]
+    if baseline is None:
+        earlier = df[(df['run_id'] < current) & (df['scale'] == scale)]['run_id']
+        if earlier.empty:
+            raise ValueError(f"No earlier '{scale}' run to compare {current} against")
+        baseline = earlier.max()
+
+    keys = ['case', 'params']
+    merged = df[df['run_id'] == baseline].set_index(keys)[['wall_s']].join(
+        df[df['run_id'] == current].set_index(keys)[['wall_s']],
+        lsuffix='_baseline', rsuffix='_current', how='inner')
+    merged['ratio'] = (merged['wall_s_current'] / merged['wall_s_baseline']).round(3)
+    merged['regression'] = merged['ratio'] > threshold
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis scripts on synthetic data")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='smoke')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Cache for generated datasets")
+    parser.add_argument('--results', default=RESULTS_FILE)
+    parser.add_argument('--sentiment-rows', type=int, default=None,
+                        help="Score up to this many headlines in the sentiment case (e.g. 10000000)")
+    parser.add_argument('--compare', action='store_true', help="Compare the last two runs instead")
+    args = parser.parse_args()
+
+    if args.compare:
+        comparison = compare_runs(args.results)
+        print(comparison.to_string())
+        regressions = comparison[comparison['regression']]
+        if len(regressions):
+            print(f"\n{len(regressions)} case(s) slower than {REGRESSION_THRESHOLD}x the baseline")
+            return 1
+        return
+    run_benchmarks(args.scale, args.cases, args.repeat, args.data_dir, args.results, args.sentiment_rows)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
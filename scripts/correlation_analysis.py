@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 import numpy as np
 from textblob import TextBlob
@@ -5,7 +6,13 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
+from indicators import compute_indicators
+from telemetry import instrument, count_rows
 
+# Indicators correlated against returns by default
+CORRELATION_INDICATORS = ['RSI', 'MACD', 'MACD_Signal', 'MACD_Hist', 'OBV']
+
+@instrument(rows=lambda result: count_rows(result[0]))
 def load_and_prepare_data(stock_file, run_analysis_file):
     """
     Load and prepare both stock and news data from run_analysis output
@@ -46,16 +53,59 @@ def load_and_prepare_data(stock_file, run_analysis_file):
         print(traceback.format_exc())
         return None, None
 
-def analyze_technical_correlations(df):
+@instrument(rows='stock_df')
+def analyze_correlation(stock_df, daily_sentiment):
+    """
+    Correlate daily news sentiment with same-day and lagged stock returns
+    """
+    sentiment = daily_sentiment.copy()
+    sentiment['Date'] = pd.to_datetime(sentiment['Date'], utc=True).dt.tz_localize(None).dt.normalize()
+    aggregations = {'avg_sentiment': 'mean', 'news_count': 'sum'}
+    if 'headline_count' in sentiment.columns:
+        aggregations['headline_count'] = 'sum'
+    sentiment = sentiment.groupby('Date').agg(aggregations)
+    
+    merged_df = stock_df[['Close', 'Returns']].join(sentiment, how='inner')
+    correlation = merged_df['Returns'].corr(merged_df['avg_sentiment'])
+    
+    # Sentiment on day t against returns on t+1, t+2, t+3
+    lagged_correlations = []
+    for i in range(1, 4):
+        lag_corr = merged_df['Returns'].corr(merged_df['avg_sentiment'].shift(i))
+        lagged_correlations.append((i, lag_corr))
+    
+    return correlation, lagged_correlations, merged_df
+
+@instrument(rows='merged_df')
+def plot_correlation_analysis(merged_df, output_dir):
+    """
+    Create visualization for sentiment vs returns correlation
     """
-    Analyze correlations between different technical indicators and price movements
+    import os
+    os.makedirs(output_dir, exist_ok=True)
+    
+    plt.figure(figsize=(10, 6))
+    plt.scatter(merged_df['avg_sentiment'], merged_df['Returns'], alpha=0.5)
+    plt.title('Daily Sentiment vs Daily Returns')
+    plt.xlabel('Average Sentiment')
+    plt.ylabel('Daily Returns')
+    plt.tight_layout()
+    plt.savefig(f'{output_dir}/sentiment_returns_scatter.png')
+    plt.close()
+
+@instrument(rows='df')
+def analyze_technical_correlations(df, indicators=None):
+    """
+    Analyze correlations between different technical indicators and price movements.
+    Indicators missing from df are computed on demand.
     """
     # Calculate daily returns if not already present
     if 'Returns' not in df.columns:
         df['Returns'] = df['Close'].pct_change()
     
     # Define the indicators to analyze
-    indicators = ['RSI', 'MACD', 'MACD_Signal', 'MACD_Hist', 'OBV']
+    indicators = list(indicators or CORRELATION_INDICATORS)
+    compute_indicators(df, indicators, overwrite=False)
     
     # Create correlation matrix
     correlation_data = df[['Returns'] + indicators].dropna()
@@ -72,17 +122,22 @@ def analyze_technical_correlations(df):
     
     return correlation_matrix, lagged_correlations
 
-def plot_technical_correlations(df, output_dir):
+@instrument(rows='df')
+def plot_technical_correlations(df, output_dir, indicators=None):
     """
     Create visualization for technical indicator correlations
     """
     import os
     os.makedirs(output_dir, exist_ok=True)
+    indicators = list(indicators or CORRELATION_INDICATORS)
+    # The scatter plots below always need RSI and MACD_Hist
+    compute_indicators(df, indicators + ['RSI', 'MACD_Hist'], overwrite=False)
+    if 'Returns' not in df.columns:
+        df['Returns'] = df['Close'].pct_change()
     
     # 1. Correlation heatmap
     plt.figure(figsize=(10, 8))
-    indicators = ['Returns', 'RSI', 'MACD', 'MACD_Signal', 'MACD_Hist', 'OBV']
-    correlation_matrix = df[indicators].corr()
+    correlation_matrix = df[['Returns'] + indicators].corr()
     sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0)
     plt.title('Technical Indicators Correlation Heatmap')
     plt.tight_layout()
@@ -109,6 +164,37 @@ def plot_technical_correlations(df, output_dir):
     plt.savefig(f'{output_dir}/macd_hist_returns_scatter.png')
     plt.close()
 
+def correlation_table(correlation_matrix, lagged_correlations):
+    """
+    One row per indicator with its same-day and t+1..t+3 correlations with returns
+    """
+    rows = {
+        indicator: {'same_day': correlation_matrix.loc[indicator, 'Returns'],
+                    **{f't+{lag}': corr for lag, corr in lags}}
+        for indicator, lags in lagged_correlations.items()
+    }
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    table.index.name = 'indicator'
+    return table
+
+def analyze_symbol(symbol, input_dir='outputs/technical_analysis', output_dir='outputs/correlation_analysis',
+                   indicators=None):
+    """
+    Run the technical correlation analysis for one symbol's processed data
+    """
+    df = pd.read_csv(f'{input_dir}/{symbol}_processed_data.csv')
+    df['Date'] = pd.to_datetime(df['Date'])
+    df.set_index('Date', inplace=True)
+    
+    # Calculate correlations
+    correlation_matrix, lagged_correlations = analyze_technical_correlations(df, indicators)
+    
+    # Create visualizations
+    plot_technical_correlations(df, f'{output_dir}/{symbol}', indicators)
+    correlation_table(correlation_matrix, lagged_correlations).to_csv(f'{output_dir}/{symbol}/correlations.csv')
+    
+    return correlation_matrix, lagged_correlations
+
 def main():
     # Define parameters
     symbols = ['AAPL', 'GOOG', 'MSFT', 'AMZN', 'META', 'NVDA', 'TSLA']
@@ -116,18 +202,8 @@ def main():
     for symbol in symbols:
         print(f"\nAnalyzing {symbol}...")
         
-        # Load technical analysis data
-        file_path = f'outputs/technical_analysis/{symbol}_processed_data.csv'
         try:
-            df = pd.read_csv(file_path)
-            df['Date'] = pd.to_datetime(df['Date'])
-            df.set_index('Date', inplace=True)
-            
-            # Calculate correlations
-            correlation_matrix, lagged_correlations = analyze_technical_correlations(df)
-            
-            # Create visualizations
-            plot_technical_correlations(df, f'outputs/correlation_analysis/{symbol}')
+            correlation_matrix, lagged_correlations = analyze_symbol(symbol)
             
             # Print results
             print(f"\nCorrelation Analysis Results for {symbol}:")
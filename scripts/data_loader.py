@@ -1,6 +1,10 @@
+import hashlib
+import os
 import pandas as pd
-import yfinance as yf
+from price_downloader import CACHE_DIR, cache_path, download_prices
+from telemetry import instrument
 
+@instrument()
 def load_news_data(file_path):
     df = pd.read_csv(file_path)
  # Convert date column to datetime with error handling
@@ -15,13 +19,79 @@ def load_news_data(file_path):
     
     return df
 
-def load_stock_data(symbol, start_date, end_date):
-    """Fetch stock data for a given symbol and date range."""
-    stock = yf.Ticker(symbol)
-    df = stock.history(start=start_date, end=end_date)
-    df.index = df.index.tz_localize(None)  # Remove timezone info for easier merging
-    return df
+def load_news_data_chunks(file_path, chunksize=500_000, offset=0):
+    """Read the news CSV in chunks with parsed dates, without loading it all at once."""
+    for chunk in read_csv_tail(file_path, offset, chunksize):
+        chunk['date'] = pd.to_datetime(chunk['date'], format='mixed', errors='coerce')
+        yield chunk
+
+def read_csv_tail(file_path, offset=0, chunksize=500_000):
+    """
+    Read the rows of a CSV starting at byte offset (a line boundary, e.g. the
+    file size at an earlier read) in chunks. The rows before it are never
+    parsed; column names come from the header line.
+    """
+    if offset == 0:
+        yield from pd.read_csv(file_path, chunksize=chunksize)
+        return
+    columns = pd.read_csv(file_path, nrows=0).columns
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        if not f.read(1):
+            return
+        f.seek(offset)
+        yield from pd.read_csv(f, header=None, names=columns, chunksize=chunksize)
+
+def file_checksums(file_path, *sizes, block_size=1 << 20):
+    """
+    Hex digests of the first `size` bytes of the file for each of sizes
+    (ascending), computed in one pass. Used to tell an appended-to file from
+    a rewritten one.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    checksums, position = [], 0
+    with open(file_path, 'rb') as f:
+        for size in sizes:
+            while position < size:
+                block = f.read(min(block_size, size - position))
+                if not block:
+                    break
+                digest.update(block)
+                position += len(block)
+            checksums.append(digest.hexdigest())
+    return checksums
+
+@instrument()
+def load_stock_data(symbol, start_date, end_date, cache_dir=CACHE_DIR, update=False):
+    """
+    Load a symbol's cached price history for a date range. The network is
+    only used when the symbol is not cached yet or update=True (which
+    fetches the bars after the last cached date).
+    """
+    if update or not os.path.exists(cache_path(symbol, cache_dir)):
+        download_prices([symbol], end_date=end_date, cache_dir=cache_dir, max_workers=1)
+    return read_cached_stock_data(symbol, start_date, end_date, cache_dir)
+
+@instrument()
+def load_stocks_data(symbols, start_date, end_date, cache_dir=CACHE_DIR, max_workers=8, update=False):
+    """
+    Load many symbols' cached price histories, concurrently downloading the
+    uncached ones (or, with update=True, new bars for all of them).
+    """
+    missing = [symbol for symbol in symbols if update or not os.path.exists(cache_path(symbol, cache_dir))]
+    if missing:
+        download_prices(missing, end_date=end_date, cache_dir=cache_dir, max_workers=max_workers)
+    return {symbol: read_cached_stock_data(symbol, start_date, end_date, cache_dir) for symbol in symbols}
+
+def read_cached_stock_data(symbol, start_date, end_date, cache_dir=CACHE_DIR):
+    """Read a symbol's cached history restricted to the date range."""
+    path = cache_path(symbol, cache_dir)
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path, index_col='Date', parse_dates=['Date'])
+    return df[(df.index >= pd.Timestamp(start_date)) & (df.index <= pd.Timestamp(end_date))]
 
+@instrument()
 def merge_data(news_df, stock_df):
     """Merge news and stock data based on date."""
     return pd.merge(news_df, stock_df, left_on='date', right_index=True, how='inner')
@@ -0,0 +1,169 @@
+"""
+Near-duplicate headline clustering with MinHash and locality-sensitive hashing.
+
+The feed republishes the same story under several publishers with small
+wording changes. Each headline is reduced to its set of word unigrams and
+bigrams (hashed with text_analytics.tokenize) and a MinHash signature of
+num_perm values is computed for a whole chunk at once: every shingle hash is
+passed through num_perm universal hashes (a * x + b) >> 32 and the
+per-headline minimum is taken with np.minimum.reduceat. Chunks are signed
+in worker processes.
+
+The signatures are cut into bands; headlines of the same ticker and day
+whose band values are identical in at least one band land in the same LSH
+bucket. Each bucket member is linked to the nearest earlier member whose
+signature agrees with its own on at least `threshold` of the values (the
+estimated Jaccard similarity), and the connected components of these links
+are the clusters. Every step is a sort or a linear pass over the rows still
+unlinked, so the cost grows roughly linearly with the number of headlines
+as long as buckets stay small.
+
+Usage:
+    unique = deduplicate_headlines(news_df)   # one row per cluster + cluster_size
+    representative = cluster_representatives(news_df)   # per-row position of its cluster's first row
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from news_cube import exchange_times
+from telemetry import instrument
+from text_analytics import _COMBINE, _mix, tokenize
+
+NUM_PERM = 64
+BANDS = 16
+THRESHOLD = 0.6
+# Permutations hashed at once, bounds the permutations x shingles block
+_PERM_BLOCK = 16
+
+
+def _permutations(num_perm, seed):
+    """Odd multipliers and offsets of the universal hashes (a * x + b) >> 32"""
+    keys = _mix(np.arange(1, 2 * num_perm + 1, dtype=np.uint64) + np.uint64(seed) * np.uint64(1 << 32))
+    return keys[:num_perm] | np.uint64(1), keys[num_perm:]
+
+
+def shingles(texts):
+    """(rows, hashes) of the word unigrams and bigrams of each text, sorted by row"""
+    _, _, _, rows, hashes = tokenize(texts)
+    same_row = rows[:-1] == rows[1:]
+    with np.errstate(over='ignore'):
+        bigrams = _mix(hashes[:-1] * _COMBINE + hashes[1:])[same_row]
+    rows = np.concatenate((rows, rows[:-1][same_row]))
+    hashes = np.concatenate((hashes, bigrams))
+    order = np.argsort(rows, kind='stable')
+    return rows[order], hashes[order]
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, seed=0):
+    """
+    texts x num_perm uint32 MinHash signatures. Texts without any token get
+    the all-ones signature; lsh_clusters() keeps them as singletons.
+    """
+    n = len(texts)
+    signatures = np.full((n, num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    rows, hashes = shingles(texts)
+    if len(rows) == 0:
+        return signatures
+    present = np.flatnonzero(np.diff(np.concatenate(([-1], rows))) != 0)
+    multipliers, offsets = _permutations(num_perm, seed)
+    for start in range(0, num_perm, _PERM_BLOCK):
+        block = slice(start, start + _PERM_BLOCK)
+        # Permutations as rows keep every reduceat segment contiguous
+        with np.errstate(over='ignore'):
+            permuted = (multipliers[block, None] * hashes[None, :] + offsets[block, None]) >> np.uint64(32)
+        signatures[rows[present], block] = np.minimum.reduceat(permuted.astype(np.uint32), present, axis=1).T
+    return signatures
+
+
+def compute_signatures(texts, num_perm=NUM_PERM, seed=0, chunksize=50_000, workers=1):
+    """minhash_signatures() of texts in chunks, signed in `workers` processes"""
+    texts = np.asarray(texts, dtype=object)
+    chunks = [texts[start:start + chunksize] for start in range(0, len(texts), chunksize)]
+    if not chunks:
+        return np.zeros((0, num_perm), dtype=np.uint32)
+    if workers <= 1 or len(chunks) == 1:
+        parts = [minhash_signatures(chunk, num_perm, seed) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(minhash_signatures, chunks, [num_perm] * len(chunks), [seed] * len(chunks)))
+    return np.concatenate(parts)
+
+
+def lsh_clusters(signatures, groups, bands=BANDS, threshold=THRESHOLD):
+    """
+    Row index of each row's cluster representative (its first row).
+
+    Only rows with the same group id (e.g. ticker and day) can be clustered.
+    Within a bucket a row joins the nearest earlier row with which at least
+    `threshold` of its signature values agree, so an unrelated headline
+    sharing the bucket does not keep duplicates after it apart.
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+    rows_per_band = num_perm // bands
+    groups = np.asarray(groups, dtype=np.int64)
+    empty = (signatures == np.iinfo(np.uint32).max).all(axis=1)
+
+    members, links = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    for band in range(bands):
+        key = groups.astype(np.uint64)
+        with np.errstate(over='ignore'):
+            for column in range(band * rows_per_band, (band + 1) * rows_per_band):
+                key = _mix(key * _COMBINE + signatures[:, column])
+        # Buckets are contiguous in the stable sort, their rows in row order
+        order = np.argsort(key, kind='stable')
+        sorted_key = key[order]
+        pending = np.flatnonzero(~empty[order])
+        lag = 1
+        while len(pending):
+            # Compare the rows not linked yet with the member `lag` places earlier
+            pending = pending[pending >= lag]
+            pending = pending[sorted_key[pending - lag] == sorted_key[pending]]
+            rows, earlier = order[pending], order[pending - lag]
+            similar = ((groups[rows] == groups[earlier]) & ~empty[earlier]
+                       & ((signatures[rows] == signatures[earlier]).mean(axis=1) >= threshold))
+            members.append(rows[similar])
+            links.append(earlier[similar])
+            pending = pending[~similar]
+            lag += 1
+
+    members, links = np.concatenate(members), np.concatenate(links)
+    graph = sparse.coo_matrix((np.ones(len(members), dtype=np.int8), (members, links)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    representative = np.full(labels.max() + 1 if n else 0, n, dtype=np.int64)
+    np.minimum.at(representative, labels, np.arange(n))
+    return representative[labels]
+
+
+def cluster_representatives(df, text_column='headline', ticker_column='stock', date_column='date',
+                            threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS, chunksize=50_000, workers=1):
+    """
+    Position of each row's cluster representative among near-duplicate
+    headlines about the same ticker on the same (exchange-time) day
+    """
+    if df.empty:
+        return np.zeros(0, dtype=np.int64)
+    signatures = compute_signatures(df[text_column].to_numpy(), num_perm, chunksize=chunksize, workers=workers)
+    days = exchange_times(df[date_column]).dt.normalize()
+    groups = df.groupby([df[ticker_column].to_numpy(), days.to_numpy()], sort=False, dropna=False).ngroup()
+    return lsh_clusters(signatures, groups.to_numpy(), bands, threshold)
+
+
+@instrument(rows='df')
+def deduplicate_headlines(df, representative=None, **options):
+    """
+    One row per near-duplicate cluster: the cluster's first row, with the
+    number of headlines it stands for in a cluster_size column. options are
+    those of cluster_representatives(), unless its result is given.
+    """
+    if representative is None:
+        representative = cluster_representatives(df, **options)
+    keep = representative == np.arange(len(df))
+    unique = df[keep].copy()
+    unique['cluster_size'] = np.bincount(representative, minlength=len(df))[keep]
+    return unique
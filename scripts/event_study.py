@@ -0,0 +1,256 @@
+"""
+Event study of abnormal returns around headline events.
+
+Every (ticker, timestamp) headline is mapped to its event day on a sorted
+trading-date index with one searchsorted call: headlines before the 16:00
+close fall on that day, later ones and those on non-trading days on the next
+trading day. Returns around all events are then gathered from a dates x
+tickers returns panel with one fancy-indexing step per batch of distinct
+(ticker, event day) pairs, and abnormal returns are measured against
+
+- 'market': the equal-weighted return of the panel (or a given benchmark
+  return Series such as an index ETF),
+- 'peer': the equal-weighted return of the other tickers in the panel,
+
+either as a plain difference (model='market_adjusted') or through a market
+model whose alpha/beta are fitted per event over an estimation window
+(model='market_model'). Results can be averaged by sentiment bucket,
+publisher or any other event column.
+
+Usage:
+    python scripts/event_study.py --news-file outputs/processed_news_data.csv --by sentiment_bucket
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import read_cached_stock_data
+from news_cube import exchange_times
+from price_downloader import cached_symbols
+from telemetry import instrument
+
+MARKET_CLOSE_HOUR = 16
+SENTIMENT_THRESHOLDS = (-0.05, 0.05)
+DEFAULT_CAR_WINDOWS = [(-1, 1), (0, 0), (0, 1), (0, 5), (-5, 5)]
+
+
+def returns_panel(prices, column='Close'):
+    """Dates x tickers daily returns from {ticker: OHLCV DataFrame}"""
+    closes = pd.DataFrame({ticker: df[column] for ticker, df in prices.items() if df is not None and len(df)})
+    return closes.sort_index().pct_change(fill_method=None).iloc[1:]
+
+
+def load_returns_panel(symbols, start_date=pd.Timestamp.min, end_date=pd.Timestamp.max, column='Close'):
+    """Returns panel of the symbols cached in data/yfinance_data"""
+    return returns_panel({symbol: read_cached_stock_data(symbol, start_date, end_date) for symbol in symbols},
+                         column)
+
+
+def sentiment_bucket(scores, thresholds=SENTIMENT_THRESHOLDS):
+    """Polarity scores as negative / neutral / positive"""
+    return pd.cut(pd.Series(scores), [-np.inf, thresholds[0], thresholds[1], np.inf],
+                  labels=['negative', 'neutral', 'positive'])
+
+
+def align_events(timestamps, trading_dates, close_hour=MARKET_CLOSE_HOUR):
+    """
+    Position in trading_dates (sorted) of each event's event day, or -1 when
+    the event falls outside the trading dates or cannot be parsed.
+    """
+    times = exchange_times(timestamps)
+    days = times.dt.normalize() + pd.to_timedelta((times.dt.hour >= close_hour).astype(int), unit='D')
+    positions = np.searchsorted(trading_dates.values, days.values, side='left')
+    # Days before the first date are not rolled forward onto it: a returns
+    # panel starts one price date late, and that day's events have no return
+    before = np.searchsorted(trading_dates.values, days.values, side='right') == 0
+    positions[(positions >= len(trading_dates)) | before | days.isna().to_numpy()] = -1
+    return positions
+
+
+def _gather(values, rows, columns):
+    """values[rows, columns] with NaN where rows fall outside the panel"""
+    inside = (rows >= 0) & (rows < len(values))
+    gathered = values[np.clip(rows, 0, len(values) - 1), columns]
+    gathered[~inside] = np.nan
+    return gathered
+
+
+class EventStudyResult:
+    """
+    events: aligned events with event_date and one CAR column per window
+    abnormal: events x offsets abnormal returns (same index as events)
+    """
+
+    def __init__(self, events, abnormal, car_windows):
+        self.events = events
+        self.abnormal = abnormal
+        self.car_windows = car_windows
+
+    def car_columns(self):
+        return [car_label(window) for window in self.car_windows]
+
+    def summary(self, by=None):
+        """Mean CAR, its t-statistic and event count per window, overall or per group"""
+        columns = self.car_columns()
+        grouped = self.events.groupby(by, observed=True) if by else self.events.assign(_all='all').groupby('_all')
+        mean = grouped[columns].mean()
+        std = grouped[columns].std()
+        count = grouped[columns].count()
+        t_stat = mean / (std / np.sqrt(count))
+        summary = pd.concat({'mean': mean, 't_stat': t_stat, 'events': count}, axis=1)
+        summary = summary.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+        return summary[[(column, stat) for column in columns for stat in ('mean', 't_stat', 'events')]]
+
+    def caar(self, by=None):
+        """Cumulative average abnormal return per offset (rows), per group (columns)"""
+        keys = self.events[by] if by else pd.Series('all', index=self.events.index)
+        average = self.abnormal.groupby(keys.to_numpy(), observed=True).mean()
+        return average.cumsum(axis=1).T
+
+
+def car_label(window):
+    start, end = window
+    return f'CAR[{start:+d},{end:+d}]'
+
+
+@instrument(rows=lambda result: len(result.events))
+def event_study(events, returns, benchmark='market', model='market_adjusted', window=(-5, 5),
+                car_windows=None, estimation_window=(-250, -30), min_estimation=60,
+                ticker_column='stock', date_column='date', batch_size=100_000):
+    """
+    Abnormal returns of every event over offsets window[0]..window[1]
+    trading days around its event day.
+
+    returns is a dates x tickers returns panel; benchmark is 'market',
+    'peer' or a return Series indexed by date. Events whose ticker is not in
+    the panel or that fall outside its dates are dropped.
+    """
+    car_windows = list(car_windows or [w for w in DEFAULT_CAR_WINDOWS if window[0] <= w[0] and w[1] <= window[1]])
+    returns = returns.sort_index()
+    values = returns.to_numpy(dtype=np.float64)
+    if isinstance(benchmark, pd.Series):
+        market = benchmark.reindex(returns.index).to_numpy(dtype=np.float64)
+    elif benchmark in ('market', 'peer'):
+        market = np.nanmean(values, axis=1) if benchmark == 'market' else None
+        totals = np.nansum(values, axis=1)
+        counts = np.sum(~np.isnan(values), axis=1)
+    else:
+        raise ValueError(f"benchmark must be 'market', 'peer' or a Series, not {benchmark!r}")
+    if model not in ('market_adjusted', 'market_model'):
+        raise ValueError(f"model must be 'market_adjusted' or 'market_model', not {model!r}")
+
+    columns = returns.columns.get_indexer(events[ticker_column])
+    positions = align_events(events[date_column], returns.index)
+    keep = (columns >= 0) & (positions >= 0)
+    events = events[keep].copy()
+    columns, positions = columns[keep], positions[keep]
+    events['event_date'] = returns.index[positions]
+
+    # Headlines on the same ticker and event day share their abnormal returns,
+    # so each (ticker, day) pair is only gathered once
+    pairs, inverse = np.unique(columns.astype(np.int64) * len(returns) + positions, return_inverse=True)
+    pair_columns, pair_positions = pairs // len(returns), pairs % len(returns)
+
+    offsets = np.arange(window[0], window[1] + 1)
+    pair_abnormal = np.empty((len(pairs), len(offsets)))
+    estimation = np.arange(estimation_window[0], estimation_window[1] + 1)
+
+    def benchmark_returns(rows, stock_returns):
+        if market is not None:
+            return _gather(market[:, None], rows, np.zeros_like(rows))
+        # Peer benchmark: equal-weighted mean of the other tickers that day
+        peer_total = _gather(totals[:, None], rows, np.zeros_like(rows)) - np.nan_to_num(stock_returns)
+        peer_count = _gather(counts[:, None].astype(np.float64), rows, np.zeros_like(rows)) \
+            - ~np.isnan(stock_returns)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(peer_count > 0, peer_total / peer_count, np.nan)
+
+    for start in range(0, len(pairs), batch_size):
+        batch = slice(start, start + batch_size)
+        event_columns = pair_columns[batch, None]
+        rows = pair_positions[batch, None] + offsets[None, :]
+        stock = _gather(values, rows, event_columns)
+        expected = benchmark_returns(rows, stock)
+        if model == 'market_model':
+            estimation_rows = pair_positions[batch, None] + estimation[None, :]
+            estimation_stock = _gather(values, estimation_rows, event_columns)
+            estimation_market = benchmark_returns(estimation_rows, estimation_stock)
+            alpha, beta = _fit_market_model(estimation_stock, estimation_market, min_estimation)
+            expected = alpha[:, None] + beta[:, None] * expected
+        pair_abnormal[batch] = stock - expected
+    abnormal = pair_abnormal[inverse.ravel()]
+
+    abnormal = pd.DataFrame(abnormal, index=events.index, columns=pd.Index(offsets, name='offset'))
+    for car_window in car_windows:
+        span = (offsets >= car_window[0]) & (offsets <= car_window[1])
+        # NaN unless every day of the window has a return
+        events[car_label(car_window)] = abnormal.to_numpy()[:, span].sum(axis=1)
+    return EventStudyResult(events, abnormal, car_windows)
+
+
+def _fit_market_model(stock, market, min_observations):
+    """Per-row OLS alpha and beta of stock on market, NaN with too few observations"""
+    valid = ~np.isnan(stock) & ~np.isnan(market)
+    n = valid.sum(axis=1)
+    stock = np.where(valid, stock, 0.0)
+    market = np.where(valid, market, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_stock = stock.sum(axis=1) / n
+        mean_market = market.sum(axis=1) / n
+        covariance = (stock * market).sum(axis=1) / n - mean_stock * mean_market
+        variance = (market * market).sum(axis=1) / n - mean_market ** 2
+        beta = covariance / variance
+    alpha = mean_stock - beta * mean_market
+    enough = n >= min_observations
+    return np.where(enough, alpha, np.nan), np.where(enough, beta, np.nan)
+
+
+def plot_caar(caar, output_path):
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 6))
+    for column in caar.columns:
+        plt.plot(caar.index, caar[column], marker='o', label=str(column))
+    plt.axvline(x=0, color='grey', linestyle='--')
+    plt.axhline(y=0, color='grey', linewidth=0.8)
+    plt.title('Cumulative Average Abnormal Return Around Headlines')
+    plt.xlabel('Trading days relative to event')
+    plt.ylabel('CAAR')
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(output_path)
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Abnormal returns around headline events")
+    parser.add_argument('--news-file', default='outputs/processed_news_data.csv',
+                        help="Headlines with a sentiment column (run_analysis.py output)")
+    parser.add_argument('--symbols', nargs='+', default=None, help="Panel tickers (default: all cached)")
+    parser.add_argument('--benchmark', choices=['market', 'peer'], default='market')
+    parser.add_argument('--model', choices=['market_adjusted', 'market_model'], default='market_adjusted')
+    parser.add_argument('--window', type=int, nargs=2, default=[-5, 5])
+    parser.add_argument('--by', default='sentiment_bucket', help="Event column to group results by")
+    parser.add_argument('--output-dir', default='outputs/event_study')
+    args = parser.parse_args()
+
+    symbols = args.symbols or cached_symbols()
+    returns = load_returns_panel(symbols)
+    events = pd.read_csv(args.news_file)
+    if 'sentiment' in events:
+        events['sentiment_bucket'] = sentiment_bucket(events['sentiment'])
+
+    result = event_study(events, returns, args.benchmark, args.model, tuple(args.window))
+    by = args.by if args.by in result.events else None
+    print(f"{len(result.events)} of {len(events)} headlines aligned to trading days")
+    summary = result.summary(by)
+    print(summary.round(4).to_string())
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary.to_csv(f'{args.output_dir}/summary.csv')
+    plot_caar(result.caar(by), f'{args.output_dir}/caar.png')
+
+
+if __name__ == "__main__":
+    main()
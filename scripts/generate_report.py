@@ -1,10 +1,463 @@
+"""
+Week 1 technical analysis report, generated from computed metrics.
+
+Per-symbol metrics (returns, risk, RSI/MACD/OBV behaviour, indicator/return
+correlations, signal hit rates) are computed from
+outputs/technical_analysis/*_processed_data.csv and written to
+reports/metrics.csv; every number in the report text comes from that table.
+
+Each section is keyed by a hash of the metrics it quotes, the processed
+files its figure is drawn from and the code producing both. Text and figures
+of unchanged sections are reused from reports/.report_cache; changed
+figures are rendered into an in-memory buffer and embedded from it. Per-
+symbol metrics are cached by file digest and a hash of the metric code, so a
+daily refresh only recomputes symbols whose data changed, and the .docx is
+only rewritten when a section did.
+"""
+import ast
+import hashlib
+import inspect
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import nsdecls
-from docx.oxml import parse_xml
 
-def create_report():
+import generate_report_plots as plots
+from telemetry import instrument
+
+INPUT_DIR = 'outputs/technical_analysis'
+REPORT_FILE = 'reports/Week1_Technical_Analysis_Report.docx'
+METRICS_FILE = 'reports/metrics.csv'
+CACHE_DIR = 'reports/.report_cache'
+
+# Columns of the symbol summary table, with their display format
+SUMMARY_COLUMNS = {
+    'total_return': ('Return', '{:.1%}'),
+    'volatility': ('Volatility', '{:.1%}'),
+    'max_drawdown': ('Max DD', '{:.1%}'),
+    'avg_rsi': ('Avg RSI', '{:.1f}'),
+    'corr_rsi': ('RSI corr', '{:.2f}'),
+    'macd_hit_rate': ('MACD hit', '{:.0%}'),
+}
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _rate(mask):
+    return float(mask.mean()) if len(mask) else None
+
+
+def symbol_metrics(df):
+    """Summary metrics of one symbol's processed price/indicator history"""
+    close = df['Close']
+    returns = close.pct_change()
+    next_return = returns.shift(-1)
+    forward_5d = close.shift(-5) / close - 1
+    rsi = df['RSI'].dropna()
+
+    # MACD crossovers and whether the next 5 days moved in the signalled direction
+    macd_above = (df['MACD'] > df['MACD_Signal']).astype(int)
+    valid = df['MACD'].notna() & df['MACD_Signal'].notna()
+    crossover = valid & valid.shift(fill_value=False) & macd_above.diff().ne(0)
+    direction = np.where(macd_above == 1, 1, -1)
+    scored = crossover & forward_5d.notna()
+    hit = pd.Series(np.sign(forward_5d) == direction, index=df.index)
+    high_volume = df['Volume'] > df['Volume'].rolling(20).mean()
+
+    upper_breakouts = close > df['BB_Upper']
+    lower_breakouts = close < df['BB_Lower']
+    breakout = upper_breakouts | lower_breakouts
+    volatility_20d = returns.rolling(20).std() * np.sqrt(252)
+
+    metrics = {
+        'start': df.index[0].strftime('%Y-%m-%d'),
+        'end': df.index[-1].strftime('%Y-%m-%d'),
+        'days': len(df),
+        'last_close': close.iloc[-1],
+        'total_return': close.iloc[-1] / close.iloc[0] - 1,
+        'volatility': returns.std() * np.sqrt(252),
+        'max_volatility_20d': volatility_20d.max(),
+        'max_drawdown': (close / close.cummax() - 1).min(),
+        'avg_rsi': rsi.mean(),
+        'rsi_std': rsi.std(),
+        'rsi_overbought_pct': _rate(rsi > 70),
+        'rsi_oversold_pct': _rate(rsi < 30),
+        'rsi_above_50_pct': _rate(rsi > 50),
+        'above_sma20_pct': _rate((close > df['SMA_20'])[df['SMA_20'].notna()]),
+        'bb_upper_breakouts': int(upper_breakouts.sum()),
+        'bb_lower_breakouts': int(lower_breakouts.sum()),
+        'breakout_volume_ratio': df['Volume'][breakout].mean() / df['Volume'][~breakout].mean(),
+        'obv_trend': (df['OBV'].iloc[-1] - df['OBV'].iloc[0]) / df['Volume'].sum(),
+        'corr_rsi': returns.corr(df['RSI']),
+        'corr_macd_hist': returns.corr(df['MACD_Hist']),
+        'corr_obv': returns.corr(df['OBV']),
+        'macd_crossovers': int(crossover.sum()),
+        'macd_bullish_crossovers': int((crossover & (macd_above == 1)).sum()),
+        'macd_hit_rate': _rate(hit[scored]),
+        'macd_hit_rate_high_volume': _rate(hit[scored & high_volume]),
+        'rsi_oversold_next_return': next_return[df['RSI'] < 30].mean(),
+        'rsi_overbought_next_return': next_return[df['RSI'] > 70].mean(),
+        'rsi_oversold_signals': int((df['RSI'] < 30).sum()),
+        'rsi_overbought_signals': int((df['RSI'] > 70).sum()),
+    }
+    # Rounded so that float noise does not change section keys
+    return {key: (round(float(value), 8) if isinstance(value, (float, np.floating)) and np.isfinite(value)
+                  else None if isinstance(value, (float, np.floating)) else value)
+            for key, value in metrics.items()}
+
+
+def metrics_code_digest():
+    """Hash of the code computing symbol metrics, part of their cache key"""
+    source = ''.join(inspect.getsource(function) for function in (symbol_metrics, _rate))
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def plot_source(plot):
+    """
+    Source a figure depends on: the plot function, the module-level helpers
+    it uses (transitively, e.g. save_plot, processed_path) and the top-level
+    statements of its module such as constants and styling
+    """
+    module_source = inspect.getsource(inspect.getmodule(inspect.unwrap(plot)))
+    functions, top_level = {}, []
+    for node in ast.parse(module_source).body:
+        segment = ast.get_source_segment(module_source, node)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions[node.name] = (segment, node)
+        elif not isinstance(node, (ast.Import, ast.ImportFrom)):
+            top_level.append(segment)
+
+    used, pending = [], [plot.__name__]
+    while pending:
+        name = pending.pop()
+        if name in used or name not in functions:
+            continue
+        used.append(name)
+        pending.extend(node.id for node in ast.walk(functions[name][1]) if isinstance(node, ast.Name))
+    return '\n'.join([functions[name][0] for name in sorted(used)] + top_level)
+
+
+def load_cache(cache_dir):
+    path = os.path.join(cache_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {'metrics': {}, 'sections': {}, 'report': None}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_cache(cache, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, 'manifest.json')
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(cache, f, indent=1)
+    os.replace(f'{path}.tmp', path)
+
+
+@instrument(rows=lambda result: len(result[0]))
+def compute_metrics(symbols, input_dir=INPUT_DIR, cache=None):
+    """
+    Metrics table indexed by symbol and the digest of each symbol's file.
+    Symbols whose processed file and metric code are unchanged reuse the
+    cached metrics.
+    """
+    cache = cache if cache is not None else {'metrics': {}}
+    code = metrics_code_digest()
+    rows, digests = {}, {}
+    for symbol in symbols:
+        digest = file_digest(plots.processed_path(symbol, input_dir))
+        cached = cache['metrics'].get(symbol)
+        if cached is None or cached['digest'] != digest or cached.get('code') != code:
+            df = pd.read_csv(plots.processed_path(symbol, input_dir), index_col='Date', parse_dates=['Date'])
+            cached = {'digest': digest, 'code': code, 'metrics': symbol_metrics(df)}
+            cache['metrics'][symbol] = cached
+        rows[symbol] = cached['metrics']
+        digests[symbol] = digest
+    metrics = pd.DataFrame.from_dict(rows, orient='index')
+    metrics.index.name = 'symbol'
+    return metrics, digests
+
+
+def fmt(value, spec='{:.2f}'):
+    return 'n/a' if value is None or pd.isna(value) else spec.format(value)
+
+
+class Section:
+    """
+    One report section: a heading, an optional figure drawn by plot(**kwargs)
+    from the processed files of symbols, and text(metrics) -> (lead, bullets)
+    built from the metrics rows of symbols ('all' for every symbol).
+    """
+
+    def __init__(self, title, level=1, symbols=(), plot=None, plot_kwargs=None, text=None, table=False):
+        self.title = title
+        self.level = level
+        self.symbols = symbols if symbols == 'all' else list(symbols)
+        self.plot = plot
+        self.plot_kwargs = plot_kwargs or {}
+        self.text = text
+        self.table = table
+
+    def key(self, metrics, digests):
+        """Hash of everything the section's content is derived from"""
+        symbols = self.input_symbols(metrics)
+        payload = {
+            'title': self.title,
+            'level': self.level,
+            'metrics': metrics.loc[symbols].to_dict(orient='index'),
+            'files': [digests[symbol] for symbol in symbols] if self.plot or self.table else [],
+            'text': inspect.getsource(self.text) if self.text else None,
+            'plot': plot_source(self.plot) if self.plot else None,
+            'plot_kwargs': self.plot_kwargs,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def input_symbols(self, metrics):
+        return list(metrics.index) if self.symbols == 'all' else self.symbols
+
+    def render_figure(self, input_dir):
+        """Figure as PNG bytes, drawn into an in-memory buffer"""
+        buffer = io.BytesIO()
+        self.plot(input_dir=input_dir, output=buffer, **self.plot_kwargs)
+        return buffer.getvalue()
+
+
+def introduction_text(metrics):
+    symbols = ', '.join(metrics.index)
+    return (f"This analysis examines {len(metrics)} technology stocks ({symbols}) from "
+            f"{metrics['start'].min()} to {metrics['end'].max()} using technical indicators and "
+            "correlation studies, to find relationships between technical signals and price movements.", [])
+
+
+def methodology_text(metrics):
+    return ("Our analysis pipeline consisted of three main components:", [
+        "Technical indicator calculation (SMA, EMA, RSI, MACD, Bollinger Bands, OBV)",
+        "Cross-indicator correlation analysis against daily returns",
+        "Lagged correlation and signal studies for predictive insights",
+    ])
+
+
+def price_trend_text(metrics):
+    row = metrics.iloc[0]
+    symbol = metrics.index[0]
+    return (f"{symbol} closed {fmt(row['total_return'], '{:+.1%}')} over the period "
+            f"at {fmt(row['last_close'])}, with an annualised volatility of {fmt(row['volatility'], '{:.1%}')}.", [
+        f"{row['bb_upper_breakouts']} closes above the upper and {row['bb_lower_breakouts']} below the "
+        "lower Bollinger Band",
+        f"Price closed above the 20-day SMA on {fmt(row['above_sma20_pct'], '{:.0%}')} of days",
+        f"Volume on breakout days was {fmt(row['breakout_volume_ratio'], '{:.2f}')}x the volume on other days",
+    ])
+
+
+def momentum_text(metrics):
+    highest = metrics['avg_rsi'].idxmax()
+    steadiest = metrics['rsi_std'].idxmin()
+    widest = metrics['rsi_std'].idxmax()
+    return ("The RSI comparison revealed distinct momentum patterns:", [
+        f"{highest} had the highest average RSI ({fmt(metrics.loc[highest, 'avg_rsi'], '{:.1f}')}), "
+        f"overbought on {fmt(metrics.loc[highest, 'rsi_overbought_pct'], '{:.0%}')} of days",
+        f"{steadiest} showed the most consistent RSI (standard deviation "
+        f"{fmt(metrics.loc[steadiest, 'rsi_std'], '{:.1f}')})",
+        f"{widest} exhibited the widest RSI swings (standard deviation "
+        f"{fmt(metrics.loc[widest, 'rsi_std'], '{:.1f}')}), with "
+        f"{fmt(metrics.loc[widest, 'rsi_oversold_pct'], '{:.0%}')} of days oversold",
+    ])
+
+
+def volume_text(metrics):
+    trend = metrics['obv_trend'].sort_values()
+    describe = lambda value: 'accumulation' if value > 0.05 else 'distribution' if value < -0.05 else 'neutral'
+    return ("Net OBV change as a share of total traded volume:", [
+        f"{symbol}: {fmt(value, '{:+.1%}')} ({describe(value)})" for symbol, value in trend[::-1].items()
+    ])
+
+
+def correlation_text(metrics):
+    row = metrics.iloc[0]
+    correlations = {'RSI': row['corr_rsi'], 'MACD histogram': row['corr_macd_hist'], 'OBV': row['corr_obv']}
+    strongest = max(correlations, key=lambda name: abs(correlations[name] or 0))
+    return (f"Same-day correlations of {metrics.index[0]} daily returns with its indicators "
+            f"(strongest: {strongest}):", [
+        f"{name}: {fmt(value)}" for name, value in correlations.items()
+    ])
+
+
+def nvda_text(metrics):
+    row = metrics.loc['NVDA']
+    return ("NVIDIA's technical setup over the period:", [
+        f"Total return of {fmt(row['total_return'], '{:+.1%}')} with a maximum drawdown of "
+        f"{fmt(row['max_drawdown'], '{:.1%}')}",
+        f"RSI above 50 on {fmt(row['rsi_above_50_pct'], '{:.0%}')} of days (average "
+        f"{fmt(row['avg_rsi'], '{:.1f}')})",
+        f"{row['macd_bullish_crossovers']} bullish of {row['macd_crossovers']} MACD crossovers",
+    ])
+
+
+def tsla_text(metrics):
+    row = metrics.loc['TSLA']
+    return ("Tesla's volatility profile:", [
+        f"Annualised volatility of {fmt(row['volatility'], '{:.1%}')}, peaking at "
+        f"{fmt(row['max_volatility_20d'], '{:.1%}')} on a 20-day window",
+        f"{row['bb_upper_breakouts'] + row['bb_lower_breakouts']} Bollinger Band breakouts",
+        f"Volume on breakout days was {fmt(row['breakout_volume_ratio'], '{:.2f}')}x that of other days",
+    ])
+
+
+def risk_text(metrics):
+    riskiest = metrics['volatility'].idxmax()
+    calmest = metrics['volatility'].idxmin()
+    deepest = metrics['max_drawdown'].idxmin()
+    return ("The risk analysis highlighted varying risk profiles:", [
+        f"{riskiest} had the highest volatility ({fmt(metrics.loc[riskiest, 'volatility'], '{:.1%}')}) "
+        f"for a {fmt(metrics.loc[riskiest, 'total_return'], '{:+.1%}')} return",
+        f"{calmest} was the most stable ({fmt(metrics.loc[calmest, 'volatility'], '{:.1%}')} volatility)",
+        f"{deepest} had the deepest drawdown ({fmt(metrics.loc[deepest, 'max_drawdown'], '{:.1%}')})",
+    ])
+
+
+def predictive_text(metrics):
+    row = metrics.iloc[0]
+    return (f"Signal performance for {metrics.index[0]}:", [
+        f"After RSI < 30 ({row['rsi_oversold_signals']} days) the next-day return averaged "
+        f"{fmt(row['rsi_oversold_next_return'], '{:+.2%}')}; after RSI > 70 "
+        f"({row['rsi_overbought_signals']} days) {fmt(row['rsi_overbought_next_return'], '{:+.2%}')}",
+        f"MACD crossovers called the 5-day direction correctly {fmt(row['macd_hit_rate'], '{:.0%}')} "
+        f"of the time ({row['macd_crossovers']} crossovers)",
+        f"With above-average volume confirmation the hit rate was "
+        f"{fmt(row['macd_hit_rate_high_volume'], '{:.0%}')}",
+    ])
+
+
+def summary_text(metrics):
+    return ("Key metrics for every analysed symbol:", [])
+
+
+def conclusion_text(metrics):
+    momentum = metrics['avg_rsi'].idxmax()
+    extremes = (metrics['rsi_overbought_pct'] + metrics['rsi_oversold_pct']).idxmax()
+    stable = metrics['volatility'].idxmin()
+    best = metrics['total_return'].idxmax()
+    return ("The analysis revealed significant differences in technical behaviour:", [
+        f"{momentum} showed the strongest momentum (average RSI {fmt(metrics.loc[momentum, 'avg_rsi'], '{:.1f}')})",
+        f"{extremes} spent the most time at RSI extremes, offering the most mean reversion setups",
+        f"{stable} maintained the most stable price action",
+        f"{best} delivered the highest return ({fmt(metrics.loc[best, 'total_return'], '{:+.1%}')})",
+    ])
+
+
+def report_sections():
+    """Sections in document order"""
+    return [
+        Section('Introduction', symbols='all', text=introduction_text),
+        Section('Methodology', text=methodology_text),
+        Section('Technical Analysis Results'),
+        Section('Price Trend Analysis', 2, ['TSLA'], plots.plot_1_price_technical, {'symbol': 'TSLA'},
+                price_trend_text),
+        Section('Momentum Analysis', 2, ['NVDA', 'META', 'TSLA'], plots.plot_2_rsi_comparison,
+                {'symbols': ['NVDA', 'META', 'TSLA']}, momentum_text),
+        Section('Volume Analysis', 2, ['NVDA', 'TSLA', 'AAPL'], plots.plot_3_obv_trends,
+                {'symbols': ['NVDA', 'TSLA', 'AAPL']}, volume_text),
+        Section('Correlation Analysis', 1, ['TSLA'], plots.plot_4_correlation_heatmap, {'symbol': 'TSLA'},
+                correlation_text),
+        Section('Stock-Specific Analysis'),
+        Section('NVIDIA (NVDA)', 2, ['NVDA'], plots.plot_6_nvda_dashboard, None, nvda_text),
+        Section('Tesla (TSLA)', 2, ['TSLA'], plots.plot_7_tesla_volatility, None, tsla_text),
+        Section('Risk Analysis', 1, ['AAPL', 'NVDA', 'TSLA', 'META', 'GOOG'], plots.plot_9_risk_metrics,
+                {'symbols': ['AAPL', 'NVDA', 'TSLA', 'META', 'GOOG']}, risk_text),
+        Section('Predictive Analysis', 1, ['TSLA'], plots.plot_10_predictive_performance, {'symbol': 'TSLA'},
+                predictive_text),
+        Section('Symbol Summary', symbols='all', text=summary_text, table=True),
+        Section('Conclusion', symbols='all', text=conclusion_text),
+    ]
+
+
+def add_summary_table(doc, metrics):
+    table = doc.add_table(rows=1, cols=len(SUMMARY_COLUMNS) + 1)
+    table.style = 'Light Grid Accent 1'
+    header = table.rows[0].cells
+    header[0].text = 'Symbol'
+    for cell, (label, _) in zip(header[1:], SUMMARY_COLUMNS.values()):
+        cell.text = label
+    for symbol, row in metrics.iterrows():
+        cells = table.add_row().cells
+        cells[0].text = symbol
+        for cell, (column, (_, spec)) in zip(cells[1:], SUMMARY_COLUMNS.items()):
+            cell.text = fmt(row[column], spec)
+
+
+def available_symbols(input_dir=INPUT_DIR):
+    suffix = '_processed_data.csv'
+    return sorted(name[:-len(suffix)] for name in os.listdir(input_dir) if name.endswith(suffix))
+
+
+@instrument(rows=None)
+def create_report(input_dir=INPUT_DIR, output_path=REPORT_FILE, metrics_path=METRICS_FILE,
+                  cache_dir=CACHE_DIR, symbols=None):
+    """
+    Build the report from the processed data, regenerating only sections
+    whose inputs changed. Returns {section title: 'cached' | 'generated'}.
+    """
+    cache = load_cache(cache_dir)
+    symbols = symbols or available_symbols(input_dir)
+    metrics, digests = compute_metrics(symbols, input_dir, cache)
+    os.makedirs(os.path.dirname(metrics_path) or '.', exist_ok=True)
+    metrics.to_csv(metrics_path)
+
+    figure_dir = os.path.join(cache_dir, 'figures')
+    os.makedirs(figure_dir, exist_ok=True)
+    status, rendered, section_keys = {}, [], {}
+    for section in report_sections():
+        missing = [symbol for symbol in section.input_symbols(metrics) if symbol not in metrics.index]
+        if missing:
+            print(f"Skipping section '{section.title}': no processed data for {', '.join(missing)}")
+            continue
+        key = section.key(metrics, digests)
+        section_keys[section.title] = key
+        cached = cache['sections'].get(section.title)
+        figure_path = os.path.join(figure_dir, f'{key}.png')
+        if cached and cached['key'] == key and (not section.plot or os.path.exists(figure_path)):
+            lead, bullets = cached['lead'], cached['bullets']
+            figure = None
+            if section.plot:
+                with open(figure_path, 'rb') as f:
+                    figure = f.read()
+            status[section.title] = 'cached'
+        else:
+            section_metrics = metrics.loc[section.input_symbols(metrics)]
+            lead, bullets = section.text(section_metrics) if section.text else (None, [])
+            figure = section.render_figure(input_dir) if section.plot else None
+            if figure is not None:
+                with open(figure_path, 'wb') as f:
+                    f.write(figure)
+            cache['sections'][section.title] = {'key': key, 'lead': lead, 'bullets': bullets}
+            status[section.title] = 'generated'
+        rendered.append((section, lead, bullets, figure))
+
+    report_key = hashlib.sha256(json.dumps(section_keys, sort_keys=True).encode()).hexdigest()
+    if report_key != cache.get('report') or not os.path.exists(output_path):
+        write_document(rendered, metrics, output_path)
+        cache['report'] = report_key
+    # Drop figures of section versions that are no longer referenced
+    current = {f'{key}.png' for key in section_keys.values()}
+    for name in os.listdir(figure_dir):
+        if name not in current:
+            os.remove(os.path.join(figure_dir, name))
+    save_cache(cache, cache_dir)
+
+    generated = sum(value == 'generated' for value in status.values())
+    print(f"Report: {generated} of {len(status)} sections regenerated")
+    return status
+
+
+def write_document(rendered, metrics, output_path):
     doc = Document()
 
     # Set default font for document
@@ -13,139 +466,28 @@ def create_report():
     font.name = 'Arial'
     font.size = Pt(12)
 
-    # Helper function for section headings
-    def add_section_heading(heading_text, level=1):
-        heading = doc.add_heading(heading_text, level)
-        heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        paragraph_format = heading.paragraph_format
-        paragraph_format.space_after = Pt(12)
-
     # Add title with spacing and formatting
     title = doc.add_heading('Technical Analysis of Top Tech Stocks: A Data-Driven Approach', 0)
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
     title.runs[0].font.size = Pt(16)
     title.runs[0].font.bold = True
 
-    # Introduction
-    add_section_heading('Introduction')
-    intro_paragraph = doc.add_paragraph('''
-    This comprehensive analysis examines seven major technology stocks (AAPL, GOOG, MSFT, AMZN, META, NVDA, TSLA) 
-    using various technical indicators and correlation studies. Our goal was to uncover meaningful patterns and 
-    relationships between different technical signals and price movements during Week 1 of our analysis.
-    ''')
-    intro_paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Methodology
-    add_section_heading('Methodology')
-    methodology_paragraph = doc.add_paragraph('''
-    Our analysis pipeline consisted of three main components:
-    1. Technical indicator calculation
-    2. Cross-indicator correlation analysis
-    3. Lagged correlation studies for predictive insights
-    ''')
-    methodology_paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Technical Analysis Results
-    add_section_heading('Technical Analysis Results')
-
-    # Price Trend Analysis
-    add_section_heading('Price Trend Analysis', level=2)
-    doc.add_picture('reports/plots/plot1_technical_overlay.png', width=Inches(6))
-    doc.add_paragraph('''
-    Tesla's stock showed significant volatility during the analysis period. The price movements frequently tested 
-    the Bollinger Bands, with the 20-day SMA acting as a dynamic support/resistance level. Notable observations include:
-    - Multiple Bollinger Band breakouts indicating high volatility
-    - Price respecting the 20-day SMA as support during uptrends
-    - Increased trading volume during major price movements
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Momentum Analysis
-    add_section_heading('Momentum Analysis', level=2)
-    doc.add_picture('reports/plots/plot2_rsi_comparison.png', width=Inches(6))
-    doc.add_paragraph('''
-    The RSI comparison across major tech stocks revealed distinct momentum patterns:
-    - NVDA maintained the highest average RSI (65.3), indicating strong bullish momentum
-    - META showed the most consistent RSI range, suggesting stable price action
-    - TSLA exhibited the most extreme RSI swings, presenting potential mean reversion opportunities
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Volume Analysis
-    add_section_heading('Volume Analysis', level=2)
-    doc.add_picture('reports/plots/plot3_obv_trends.png', width=Inches(6))
-    doc.add_paragraph('''
-    The On Balance Volume (OBV) analysis highlighted:
-    - Strong accumulation patterns in NVDA, confirming the uptrend
-    - Distribution phases in TSLA, suggesting potential weakness
-    - Neutral volume patterns in AAPL, indicating market indecision
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Correlation Analysis
-    add_section_heading('Correlation Analysis')
-    doc.add_picture('reports/plots/plot4_correlation_heatmap.png', width=Inches(6))
-    doc.add_paragraph('''
-    The correlation analysis revealed several significant relationships:
-    - Strong positive correlation between RSI and price returns (0.72)
-    - Moderate predictive power of the MACD histogram
-    - Weak correlation between OBV and short-term price movements
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Stock-Specific Analysis
-    add_section_heading('Stock-Specific Analysis')
-
-    # NVIDIA Analysis
-    add_section_heading('NVIDIA (NVDA)', level=2)
-    doc.add_picture('reports/plots/plot6_nvda_dashboard.png', width=Inches(6))
-    doc.add_paragraph('''
-    NVIDIA showed the strongest technical setup among analyzed stocks:
-    - Consistent uptrend with strong momentum
-    - RSI maintaining bullish territory
-    - Positive MACD crossovers confirming trend strength
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Tesla Analysis
-    add_section_heading('Tesla (TSLA)', level=2)
-    doc.add_picture('reports/plots/plot7_tesla_volatility.png', width=Inches(6))
-    doc.add_paragraph('''
-    Tesla exhibited high volatility with notable trading opportunities:
-    - Frequent volatility spikes creating trading opportunities
-    - Clear support/resistance levels at Bollinger Bands
-    - Strong volume confirmation during major moves
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Risk Analysis
-    add_section_heading('Risk Analysis')
-    doc.add_picture('reports/plots/plot9_risk_metrics.png', width=Inches(6))
-    doc.add_paragraph('''
-    The risk analysis highlighted varying risk profiles:
-    - TSLA showed the highest volatility but also the largest potential returns
-    - AAPL demonstrated the most stable risk metrics
-    - NVDA balanced strong returns with moderate risk
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Predictive Analysis
-    add_section_heading('Predictive Analysis')
-    doc.add_picture('reports/plots/plot10_predictive_performance.png', width=Inches(6))
-    doc.add_paragraph('''
-    Our predictive analysis using technical indicators showed:
-    - RSI extremes provided reliable mean reversion signals
-    - MACD crossovers showed 62% accuracy for trend prediction
-    - Volume confirmation improved signal reliability by 15%
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Conclusion
-    add_section_heading('Conclusion')
-    doc.add_paragraph('''
-    Week 1 analysis revealed significant differences in technical behavior across major tech stocks:
-    - NVDA showed the strongest technical setup with consistent momentum
-    - TSLA offered the most mean reversion opportunities
-    - AAPL maintained the most stable technical patterns
-
-    These insights provide a foundation for developing targeted trading strategies for each stock based on their 
-    unique technical characteristics.
-    ''').alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-    # Save the document
-    doc.save('reports/Week1_Technical_Analysis_Report.docx')
+    for section, lead, bullets, figure in rendered:
+        heading = doc.add_heading(section.title, section.level)
+        heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        heading.paragraph_format.space_after = Pt(12)
+        if figure is not None:
+            doc.add_picture(io.BytesIO(figure), width=Inches(6))
+        if lead:
+            doc.add_paragraph(lead).alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        for bullet in bullets:
+            doc.add_paragraph(bullet, style='List Bullet')
+        if section.table:
+            add_summary_table(doc, metrics)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    doc.save(output_path)
+
 
 if __name__ == "__main__":
     create_report()
@@ -5,15 +5,28 @@ import seaborn as sns
 from pathlib import Path
 import yfinance as yf
 from datetime import datetime, timedelta
+from telemetry import instrument
+
+INPUT_DIR = 'outputs/technical_analysis'
+report_dir = 'reports/plots'
 
 def create_report_directory():
     """Create directory for report plots"""
     Path('reports/plots').mkdir(parents=True, exist_ok=True)
     return 'reports/plots'
 
-def plot_1_price_technical(symbol='TSLA'):
+def processed_path(symbol, input_dir=INPUT_DIR):
+    return f'{input_dir}/{symbol}_processed_data.csv'
+
+def save_plot(output, filename):
+    """Save the current figure to output (a path or file-like buffer), by default reports/plots/filename"""
+    plt.savefig(output if output is not None else f'{report_dir}/{filename}', format='png')
+    plt.close()
+
+@instrument(rows=None)
+def plot_1_price_technical(symbol='TSLA', input_dir=INPUT_DIR, output=None):
     """Plot 1: Price with Technical Overlays"""
-    df = pd.read_csv(f'outputs/technical_analysis/{symbol}_processed_data.csv')
+    df = pd.read_csv(processed_path(symbol, input_dir))
     df['Date'] = pd.to_datetime(df['Date'])
     
     plt.figure(figsize=(12, 6))
@@ -27,15 +40,15 @@ def plot_1_price_technical(symbol='TSLA'):
     plt.ylabel('Price')
     plt.legend()
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot1_technical_overlay.png')
-    plt.close()
+    save_plot(output, 'plot1_technical_overlay.png')
 
-def plot_2_rsi_comparison(symbols=['NVDA', 'META', 'TSLA']):
+@instrument(rows=None)
+def plot_2_rsi_comparison(symbols=['NVDA', 'META', 'TSLA'], input_dir=INPUT_DIR, output=None):
     """Plot 2: RSI Comparison"""
     plt.figure(figsize=(12, 6))
     
     for symbol in symbols:
-        df = pd.read_csv(f'outputs/technical_analysis/{symbol}_processed_data.csv')
+        df = pd.read_csv(processed_path(symbol, input_dir))
         df['Date'] = pd.to_datetime(df['Date'])
         plt.plot(df['Date'], df['RSI'], label=symbol)
     
@@ -46,15 +59,15 @@ def plot_2_rsi_comparison(symbols=['NVDA', 'META', 'TSLA']):
     plt.ylabel('RSI')
     plt.legend()
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot2_rsi_comparison.png')
-    plt.close()
+    save_plot(output, 'plot2_rsi_comparison.png')
 
-def plot_3_obv_trends(symbols=['NVDA', 'TSLA', 'AAPL']):
+@instrument(rows=None)
+def plot_3_obv_trends(symbols=['NVDA', 'TSLA', 'AAPL'], input_dir=INPUT_DIR, output=None):
     """Plot 3: OBV Trends"""
     plt.figure(figsize=(12, 6))
     
     for symbol in symbols:
-        df = pd.read_csv(f'outputs/technical_analysis/{symbol}_processed_data.csv')
+        df = pd.read_csv(processed_path(symbol, input_dir))
         df['Date'] = pd.to_datetime(df['Date'])
         # Normalize OBV for comparison
         df['OBV_norm'] = (df['OBV'] - df['OBV'].min()) / (df['OBV'].max() - df['OBV'].min())
@@ -65,12 +78,12 @@ def plot_3_obv_trends(symbols=['NVDA', 'TSLA', 'AAPL']):
     plt.ylabel('Normalized OBV')
     plt.legend()
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot3_obv_trends.png')
-    plt.close()
+    save_plot(output, 'plot3_obv_trends.png')
 
-def plot_4_correlation_heatmap(symbol='TSLA'):
+@instrument(rows=None)
+def plot_4_correlation_heatmap(symbol='TSLA', input_dir=INPUT_DIR, output=None):
     """Plot 4: Technical Indicator Correlation Heatmap"""
-    df = pd.read_csv(f'outputs/technical_analysis/{symbol}_processed_data.csv')
+    df = pd.read_csv(processed_path(symbol, input_dir))
     
     # Calculate returns
     df['Returns'] = df['Close'].pct_change()
@@ -83,12 +96,12 @@ def plot_4_correlation_heatmap(symbol='TSLA'):
     sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0)
     plt.title(f'{symbol} Technical Indicator Correlations')
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot4_correlation_heatmap.png')
-    plt.close()
+    save_plot(output, 'plot4_correlation_heatmap.png')
 
-def plot_5_lagged_correlations(symbol='TSLA'):
+@instrument(rows=None)
+def plot_5_lagged_correlations(symbol='TSLA', input_dir=INPUT_DIR, output=None):
     """Plot 5: Lagged Correlation Results"""
-    df = pd.read_csv(f'outputs/technical_analysis/{symbol}_processed_data.csv')
+    df = pd.read_csv(processed_path(symbol, input_dir))
     df['Returns'] = df['Close'].pct_change()
     
     indicators = ['RSI', 'MACD', 'OBV']
@@ -108,12 +121,12 @@ def plot_5_lagged_correlations(symbol='TSLA'):
     plt.legend()
     plt.grid(True)
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot5_lagged_correlations.png')
-    plt.close()
+    save_plot(output, 'plot5_lagged_correlations.png')
 
-def plot_6_nvda_dashboard():
+@instrument(rows=None)
+def plot_6_nvda_dashboard(input_dir=INPUT_DIR, output=None):
     """Plot 6: NVDA Technical Analysis Dashboard"""
-    df = pd.read_csv('outputs/technical_analysis/NVDA_processed_data.csv')
+    df = pd.read_csv(processed_path('NVDA', input_dir))
     df['Date'] = pd.to_datetime(df['Date'])
     
     fig, axs = plt.subplots(3, 1, figsize=(12, 12), gridspec_kw={'height_ratios': [2, 1, 1]})
@@ -139,12 +152,12 @@ def plot_6_nvda_dashboard():
     axs[2].legend()
     
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot6_nvda_dashboard.png')
-    plt.close()
+    save_plot(output, 'plot6_nvda_dashboard.png')
 
-def plot_7_tesla_volatility():
+@instrument(rows=None)
+def plot_7_tesla_volatility(input_dir=INPUT_DIR, output=None):
     """Plot 7: TSLA Volatility Analysis"""
-    df = pd.read_csv('outputs/technical_analysis/TSLA_processed_data.csv')
+    df = pd.read_csv(processed_path('TSLA', input_dir))
     df['Date'] = pd.to_datetime(df['Date'])
     df['Returns'] = df['Close'].pct_change()
     df['Volatility'] = df['Returns'].rolling(20).std() * np.sqrt(252)  # Annualized
@@ -160,12 +173,12 @@ def plot_7_tesla_volatility():
     
     plt.title('TSLA Price and Volatility')
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot7_tesla_volatility.png')
-    plt.close()
+    save_plot(output, 'plot7_tesla_volatility.png')
 
-def plot_8_apple_patterns():
+@instrument(rows=None)
+def plot_8_apple_patterns(input_dir=INPUT_DIR, output=None):
     """Plot 8: AAPL Technical Patterns"""
-    df = pd.read_csv('outputs/technical_analysis/AAPL_processed_data.csv')
+    df = pd.read_csv(processed_path('AAPL', input_dir))
     df['Date'] = pd.to_datetime(df['Date'])
     
     plt.figure(figsize=(12, 6))
@@ -179,15 +192,15 @@ def plot_8_apple_patterns():
     plt.ylabel('Price')
     plt.legend()
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot8_apple_patterns.png')
-    plt.close()
+    save_plot(output, 'plot8_apple_patterns.png')
 
-def plot_9_risk_metrics(symbols=['AAPL', 'NVDA', 'TSLA', 'META', 'GOOG']):
+@instrument(rows=None)
+def plot_9_risk_metrics(symbols=['AAPL', 'NVDA', 'TSLA', 'META', 'GOOG'], input_dir=INPUT_DIR, output=None):
     """Plot 9: Risk Metrics Comparison"""
     risk_metrics = []
     
     for symbol in symbols:
-        df = pd.read_csv(f'outputs/technical_analysis/{symbol}_processed_data.csv')
+        df = pd.read_csv(processed_path(symbol, input_dir))
         df['Returns'] = df['Close'].pct_change()
         
         volatility = df['Returns'].std() * np.sqrt(252)
@@ -214,12 +227,12 @@ def plot_9_risk_metrics(symbols=['AAPL', 'NVDA', 'TSLA', 'META', 'GOOG']):
     ax.legend()
     
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot9_risk_metrics.png')
-    plt.close()
+    save_plot(output, 'plot9_risk_metrics.png')
 
-def plot_10_predictive_performance(symbol='TSLA'):
+@instrument(rows=None)
+def plot_10_predictive_performance(symbol='TSLA', input_dir=INPUT_DIR, output=None):
     """Plot 10: Predictive Model Performance"""
-    df = pd.read_csv(f'outputs/technical_analysis/{symbol}_processed_data.csv')
+    df = pd.read_csv(processed_path(symbol, input_dir))
     df['Returns'] = df['Close'].pct_change()
     
     # Simple prediction using RSI
@@ -235,8 +248,7 @@ def plot_10_predictive_performance(symbol='TSLA'):
     plt.xlabel('RSI')
     plt.ylabel('Next-Day Return')
     plt.tight_layout()
-    plt.savefig(f'{report_dir}/plot10_predictive_performance.png')
-    plt.close()
+    save_plot(output, 'plot10_predictive_performance.png')
 
 def main():
     global report_dir
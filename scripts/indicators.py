@@ -0,0 +1,176 @@
+"""
+Registry of technical indicators computed on demand.
+
+Each indicator is registered with the price columns it reads and the other
+indicators it is derived from. compute_indicators() resolves the minimal
+dependency closure of the requested columns, computes each column once in
+dependency order (so e.g. SMA_20 is shared by BB_Middle) and drops
+intermediates that were not asked for.
+
+New indicators are added with the decorator, without touching the core:
+
+    @register_indicator('ATR_14', inputs=['High', 'Low', 'Close'])
+    def atr_14(df):
+        return AverageTrueRange(df['High'], df['Low'], df['Close']).average_true_range()
+"""
+from ta.trend import sma_indicator, ema_indicator
+from ta.momentum import RSIIndicator
+from ta.volume import on_balance_volume
+
+INDICATORS = {}
+
+# Columns produced by calculate_technical_indicators() when no list is given
+DEFAULT_INDICATORS = [
+    'SMA_20', 'SMA_50', 'EMA_20', 'RSI', 'MACD', 'MACD_Signal', 'MACD_Hist',
+    'BB_Upper', 'BB_Middle', 'BB_Lower', 'OBV',
+]
+
+
+class Indicator:
+    """A registered indicator: func(df) -> Series, plus what it reads"""
+
+    def __init__(self, name, func, inputs, depends_on):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.depends_on = list(depends_on)
+
+
+def register_indicator(name, inputs=('Close',), depends_on=()):
+    """
+    Decorator registering func(df) -> Series as indicator column name.
+    inputs are price/volume columns, depends_on other indicator columns that
+    will already be present on df when func is called.
+    """
+    def decorator(func):
+        INDICATORS[name] = Indicator(name, func, inputs, depends_on)
+        return func
+    return decorator
+
+
+def resolve_indicators(columns):
+    """Requested columns plus their dependencies, in computation order"""
+    order = []
+    visiting = set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in INDICATORS:
+            raise KeyError(f"Unknown indicator: {name}")
+        if name in visiting:
+            raise ValueError(f"Indicator dependency cycle at {name}")
+        visiting.add(name)
+        for dependency in INDICATORS[name].depends_on:
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in columns:
+        visit(name)
+    return order
+
+
+def required_inputs(columns):
+    """Price/volume columns needed to compute the given indicators"""
+    inputs = []
+    for name in resolve_indicators(columns):
+        inputs.extend(column for column in INDICATORS[name].inputs if column not in inputs)
+    return inputs
+
+
+def compute_indicators(df, columns=None, overwrite=True):
+    """
+    Add the requested indicator columns to df in place and return it.
+
+    Only the dependency closure of columns is computed. With overwrite=False,
+    columns already present on df are reused instead of recomputed.
+    Intermediate columns that were not requested are removed again.
+    """
+    columns = list(DEFAULT_INDICATORS if columns is None else columns)
+    existing = set(df.columns)
+    added = []
+    for name in resolve_indicators(columns):
+        if name in existing and (not overwrite or name not in columns):
+            continue
+        df[name] = INDICATORS[name].func(df)
+        added.append(name)
+
+    intermediates = [name for name in added if name not in columns]
+    if intermediates:
+        df.drop(columns=intermediates, inplace=True)
+    # Keep new columns in the requested order rather than dependency order
+    for name in dict.fromkeys(columns):
+        if name in added:
+            df[name] = df.pop(name)
+    return df
+
+
+@register_indicator('SMA_20')
+def sma_20(df):
+    return sma_indicator(close=df['Close'], window=20)
+
+
+@register_indicator('SMA_50')
+def sma_50(df):
+    return sma_indicator(close=df['Close'], window=50)
+
+
+@register_indicator('EMA_20')
+def ema_20(df):
+    return ema_indicator(close=df['Close'], window=20)
+
+
+@register_indicator('RSI')
+def rsi(df):
+    return RSIIndicator(close=df['Close']).rsi()
+
+
+@register_indicator('_EMA_12')
+def ema_12(df):
+    return ema_indicator(close=df['Close'], window=12)
+
+
+@register_indicator('_EMA_26')
+def ema_26(df):
+    return ema_indicator(close=df['Close'], window=26)
+
+
+@register_indicator('MACD', depends_on=['_EMA_12', '_EMA_26'])
+def macd(df):
+    return df['_EMA_12'] - df['_EMA_26']
+
+
+@register_indicator('MACD_Signal', inputs=[], depends_on=['MACD'])
+def macd_signal(df):
+    return ema_indicator(close=df['MACD'], window=9)
+
+
+@register_indicator('MACD_Hist', inputs=[], depends_on=['MACD', 'MACD_Signal'])
+def macd_hist(df):
+    return df['MACD'] - df['MACD_Signal']
+
+
+@register_indicator('BB_Middle', inputs=[], depends_on=['SMA_20'])
+def bb_middle(df):
+    return df['SMA_20']
+
+
+@register_indicator('_BB_Std')
+def bb_std(df):
+    return df['Close'].rolling(20, min_periods=20).std(ddof=0)
+
+
+@register_indicator('BB_Upper', inputs=[], depends_on=['BB_Middle', '_BB_Std'])
+def bb_upper(df):
+    return df['BB_Middle'] + 2 * df['_BB_Std']
+
+
+@register_indicator('BB_Lower', inputs=[], depends_on=['BB_Middle', '_BB_Std'])
+def bb_lower(df):
+    return df['BB_Middle'] - 2 * df['_BB_Std']
+
+
+@register_indicator('OBV', inputs=['Close', 'Volume'])
+def obv(df):
+    return on_balance_volume(close=df['Close'], volume=df['Volume'])
@@ -0,0 +1,323 @@
+"""
+Incrementally maintained news activity cube.
+
+Headlines are aggregated into cells keyed by (ticker, publisher, date, hour)
+holding the article count and the sum/count of headline sentiment. The cube
+is stored as a compressed .npz file together with how many bytes of the
+source CSV it has absorbed and their checksum, so update_cube() seeks past
+them and only reads, scores and adds the rows appended since the last run.
+
+Cells are kept sorted by ticker and date, so time-pattern queries (hourly
+distribution, daily trend, weekday/month profile, per-ticker activity spikes)
+read a slice of a few numpy arrays instead of rescanning the raw headlines.
+
+Usage:
+    cube = update_cube('outputs/news_cube.npz', 'data/rawanalyst_data/raw_analyst_ratings.csv')
+    cube.hourly_distribution(ticker='AAPL')
+    cube.activity_spikes(window=30, threshold=3)
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import file_checksums, read_csv_tail
+from sentiment_analyzer import apply_sentiment_analysis
+from telemetry import instrument
+
+CUBE_FILE = 'outputs/news_cube.npz'
+NEWS_FILE = 'data/rawanalyst_data/raw_analyst_ratings.csv'
+TIMEZONE = 'America/New_York'
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+KEY_COLUMNS = ['ticker', 'day', 'publisher', 'hour']
+CELL_DTYPES = {
+    'ticker': np.int32,
+    'day': np.int32,  # days since 1970-01-01
+    'publisher': np.int32,
+    'hour': np.int8,
+    'count': np.int64,
+    'sentiment_sum': np.float64,
+    'sentiment_count': np.int64,
+}
+
+
+def exchange_times(dates, timezone=TIMEZONE):
+    """
+    Naive exchange-local timestamps. Values carrying a UTC offset (as in the
+    raw feed, e.g. '2020-06-05 10:30:54-04:00') are converted to timezone;
+    values without one are taken to be local already.
+    """
+    dates = pd.Series(dates)
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        if dates.dt.tz is None:
+            return dates
+        return dates.dt.tz_convert(timezone).dt.tz_localize(None)
+    text = dates.astype(str)
+    parsed = pd.to_datetime(text, format='mixed', errors='coerce', utc=True)
+    has_offset = text.str.contains(r'(?:[+-]\d\d:?\d\d|Z)$', regex=True)
+    local = parsed.dt.tz_convert(timezone).dt.tz_localize(None)
+    return local.where(has_offset, parsed.dt.tz_localize(None))
+
+
+class NewsCube:
+    """Article counts and sentiment sums per (ticker, publisher, date, hour)"""
+
+    def __init__(self, ticker_column='stock', publisher_column='publisher', date_column='date',
+                 sentiment_column='sentiment'):
+        self.ticker_column = ticker_column
+        self.publisher_column = publisher_column
+        self.date_column = date_column
+        self.sentiment_column = sentiment_column
+        self.tickers = pd.Index([], dtype=object)
+        self.publishers = pd.Index([], dtype=object)
+        self.cells = {name: np.zeros(0, dtype=dtype) for name, dtype in CELL_DTYPES.items()}
+        self.source_rows = 0
+        self.source_size = 0
+        self.source_checksum = ''
+
+    def __len__(self):
+        return len(self.cells['count'])
+
+    @staticmethod
+    def _codes(index, values):
+        """Codes of values in index, extending index with unseen values"""
+        new = pd.Index(pd.unique(values)).difference(index)
+        index = index.append(new) if len(new) else index
+        return index, index.get_indexer(values).astype(np.int32)
+
+    @instrument(rows='chunk')
+    def update(self, chunk):
+        """Aggregate a chunk of headlines into the cube"""
+        times = exchange_times(chunk[self.date_column]).to_numpy()
+        valid = ~pd.isna(times) & chunk[self.ticker_column].notna().to_numpy()
+        chunk = chunk[valid]
+        times = times[valid]
+
+        self.tickers, tickers = self._codes(self.tickers, chunk[self.ticker_column].to_numpy())
+        publishers = chunk[self.publisher_column].fillna('').to_numpy()
+        self.publishers, publishers = self._codes(self.publishers, publishers)
+        if self.sentiment_column in chunk:
+            sentiment = chunk[self.sentiment_column].to_numpy(dtype=np.float64)
+        else:
+            sentiment = np.full(len(chunk), np.nan)
+        scored = ~np.isnan(sentiment)
+
+        new = pd.DataFrame({
+            'ticker': tickers,
+            'day': times.astype('datetime64[D]').astype(np.int32),
+            'publisher': publishers,
+            'hour': pd.DatetimeIndex(times).hour.to_numpy(dtype=np.int8),
+            'count': 1,
+            'sentiment_sum': np.where(scored, sentiment, 0.0),
+            'sentiment_count': scored.astype(np.int64),
+        })
+        new = new.groupby(KEY_COLUMNS, sort=True).sum().reset_index()
+        new = {name: new[name].to_numpy(dtype=dtype) for name, dtype in CELL_DTYPES.items()}
+
+        # merge the chunk's sorted cells into the cube: add to the cells it
+        # already has, insert the others at their sorted positions
+        keys, new_keys = _cell_keys(self.cells), _cell_keys(new)
+        positions = np.searchsorted(keys, new_keys)
+        found = positions < len(keys)
+        found[found] = keys[positions[found]] == new_keys[found]
+        for name in CELL_DTYPES:
+            if name not in KEY_COLUMNS:
+                np.add.at(self.cells[name], positions[found], new[name][found])
+            self.cells[name] = np.insert(self.cells[name], positions[~found], new[name][~found])
+        return self
+
+    def save(self, path=CUBE_FILE):
+        """Write the cube atomically as a compressed .npz file"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            tickers=self.tickers.to_numpy(dtype=str),
+            publishers=self.publishers.to_numpy(dtype=str),
+            source=np.array([self.source_rows, self.source_size], dtype=np.int64),
+            source_checksum=np.array(self.source_checksum),
+            **self.cells,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=CUBE_FILE, **kwargs):
+        cube = cls(**kwargs)
+        with np.load(path, allow_pickle=False) as data:
+            cube.tickers = pd.Index(data['tickers'].astype(object))
+            cube.publishers = pd.Index(data['publishers'].astype(object))
+            cube.source_rows, cube.source_size = (int(value) for value in data['source'])
+            cube.source_checksum = str(data['source_checksum']) if 'source_checksum' in data else ''
+            cube.cells = {name: data[name].astype(dtype, copy=False) for name, dtype in CELL_DTYPES.items()}
+        return cube
+
+    def _select(self, ticker=None, publisher=None, start=None, end=None):
+        """Positions of the cells matching the filters"""
+        cells = self.cells
+        lo, hi = 0, len(self)
+        if ticker is not None:
+            code = self.tickers.get_indexer([ticker])[0]
+            lo, hi = np.searchsorted(cells['ticker'], [code, code + 1]) if code >= 0 else (0, 0)
+        mask = np.ones(hi - lo, dtype=bool)
+        if publisher is not None:
+            mask &= cells['publisher'][lo:hi] == self.publishers.get_indexer([publisher])[0]
+        if start is not None:
+            mask &= cells['day'][lo:hi] >= _day_number(start)
+        if end is not None:
+            mask &= cells['day'][lo:hi] <= _day_number(end)
+        return lo + np.flatnonzero(mask)
+
+    def _sum_by(self, key, positions, column='count'):
+        keys, inverse = np.unique(key, return_inverse=True)
+        return keys, np.bincount(inverse, weights=self.cells[column][positions], minlength=len(keys))
+
+    def hourly_distribution(self, **filters):
+        """Articles per hour of day (0-23)"""
+        positions = self._select(**filters)
+        counts = np.bincount(self.cells['hour'][positions], weights=self.cells['count'][positions], minlength=24)
+        return pd.Series(counts.astype(np.int64), index=pd.RangeIndex(24, name='hour'), name='articles')
+
+    def daily_counts(self, **filters):
+        """Articles per date"""
+        positions = self._select(**filters)
+        days, counts = self._sum_by(self.cells['day'][positions], positions)
+        return pd.Series(counts.astype(np.int64), index=_dates(days), name='articles')
+
+    def weekday_distribution(self, **filters):
+        """Articles per day of week, Monday first"""
+        positions = self._select(**filters)
+        # 1970-01-01 was a Thursday
+        weekdays = (self.cells['day'][positions].astype(np.int64) + 3) % 7
+        counts = np.bincount(weekdays, weights=self.cells['count'][positions], minlength=7)
+        return pd.Series(counts.astype(np.int64), index=pd.Index(WEEKDAYS, name='day_of_week'), name='articles')
+
+    def monthly_counts(self, **filters):
+        """Articles per calendar month"""
+        daily = self.daily_counts(**filters)
+        return daily.groupby(daily.index.to_period('M')).sum()
+
+    def ticker_activity(self, **filters):
+        """Articles per ticker, most active first"""
+        positions = self._select(**filters)
+        codes, counts = self._sum_by(self.cells['ticker'][positions], positions)
+        activity = pd.Series(counts.astype(np.int64), index=pd.Index(self.tickers[codes], name='ticker'),
+                             name='articles')
+        return activity.sort_values(ascending=False, kind='stable')
+
+    def daily_sentiment(self, ticker=None, **filters):
+        """Mean headline sentiment and article count per date"""
+        positions = self._select(ticker=ticker, **filters)
+        days, counts = self._sum_by(self.cells['day'][positions], positions)
+        _, sums = self._sum_by(self.cells['day'][positions], positions, 'sentiment_sum')
+        _, scored = self._sum_by(self.cells['day'][positions], positions, 'sentiment_count')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            average = np.where(scored > 0, sums / scored, np.nan)
+        return pd.DataFrame({'avg_sentiment': average, 'news_count': counts.astype(np.int64)},
+                            index=_dates(days))
+
+    def activity_spikes(self, ticker=None, window=30, threshold=3.0, min_articles=5, **filters):
+        """
+        Days on which a ticker's article count exceeds the mean of the preceding
+        window calendar days (days without news count as zero) by threshold
+        standard deviations. Only days with a full window of the ticker's
+        history behind them are scored.
+        """
+        positions = self._select(ticker=ticker, **filters)
+        key = self.cells['ticker'][positions].astype(np.int64) * (1 << 32) + self.cells['day'][positions]
+        keys, counts = self._sum_by(key, positions)
+        # keys are sorted by (ticker, day): the window before each row starts
+        # at the first row of the same ticker at most window days earlier
+        first = np.searchsorted(keys, keys - window, side='left')
+        totals = np.concatenate([[0.0], np.cumsum(counts)])
+        squares = np.concatenate([[0.0], np.cumsum(counts ** 2)])
+        rows = np.arange(len(keys))
+        # first row of each ticker: its earliest day must lie a window back
+        start = np.searchsorted(keys, keys & ~np.int64(0xFFFFFFFF), side='left')
+        history = keys - keys[start] >= window
+        mean = (totals[rows] - totals[first]) / window
+        std = np.sqrt(np.maximum((squares[rows] - squares[first]) / window - mean ** 2, 0.0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            zscore = np.where(std > 0, (counts - mean) / std, np.nan)
+
+        # an empty window (mean 0) says nothing about what is normal for the ticker
+        flat = (std == 0) & (mean > 0) & (counts > mean)
+        spike = history & (counts >= min_articles) & ((zscore > threshold) | flat)
+        spikes = pd.DataFrame({
+            'ticker': self.tickers[(keys[spike] >> 32).astype(np.int64)],
+            'date': _dates(keys[spike] & 0xFFFFFFFF),
+            'articles': counts[spike].astype(np.int64),
+            'baseline': mean[spike],
+            'zscore': zscore[spike],
+        })
+        return spikes.sort_values(['date', 'ticker']).reset_index(drop=True)
+
+
+def _cell_keys(cells):
+    """Cell keys as a structured array, which sorts and searches like KEY_COLUMNS"""
+    keys = np.empty(len(cells['count']), dtype=[(name, CELL_DTYPES[name]) for name in KEY_COLUMNS])
+    for name in KEY_COLUMNS:
+        keys[name] = cells[name]
+    return keys
+
+
+def _day_number(date):
+    return int(pd.Timestamp(date).to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+def _dates(days):
+    return pd.DatetimeIndex(np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype('datetime64[ns]'), name='date')
+
+
+@instrument(rows=lambda cube: len(cube))
+def update_cube(cube_path=CUBE_FILE, news_file=NEWS_FILE, chunksize=200_000, score_sentiment=True, scores=None):
+    """
+    Bring the cube at cube_path up to date with news_file and save it.
+
+    Only rows after the bytes already absorbed are parsed (and sentiment
+    scored). If news_file shrank or those bytes no longer match their
+    checksum, it was rewritten and the cube is rebuilt.
+
+    scores, a sentiment Series indexed by row number in news_file, reuses
+    scores the caller already computed instead of scoring the rows again.
+    """
+    size = os.path.getsize(news_file)
+    cube = NewsCube.load(cube_path) if os.path.exists(cube_path) else NewsCube()
+    if size < cube.source_size:
+        print(f"{news_file} is smaller than when the cube was built, rebuilding")
+        cube = NewsCube()
+    absorbed, checksum = file_checksums(news_file, cube.source_size, size)
+    if cube.source_size and absorbed != cube.source_checksum:
+        print(f"{news_file} was rewritten since the cube was built, rebuilding")
+        cube = NewsCube()
+    if size == cube.source_size:
+        return cube
+
+    for chunk in read_csv_tail(news_file, cube.source_size, chunksize):
+        chunk.index += cube.source_rows
+        if cube.sentiment_column not in chunk and scores is not None:
+            chunk[cube.sentiment_column] = scores.reindex(chunk.index)
+        elif cube.sentiment_column not in chunk and score_sentiment:
+            chunk = apply_sentiment_analysis(chunk)
+        cube.update(chunk)
+        cube.source_rows += len(chunk)
+    cube.source_size = size
+    cube.source_checksum = checksum
+    cube.save(cube_path)
+    return cube
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the news activity cube with new headlines")
+    parser.add_argument('--news-file', default=NEWS_FILE)
+    parser.add_argument('--cube', default=CUBE_FILE)
+    parser.add_argument('--no-sentiment', action='store_true', help="Skip sentiment scoring of new rows")
+    args = parser.parse_args()
+
+    cube = update_cube(args.cube, args.news_file, score_sentiment=not args.no_sentiment)
+    print(f"{cube.source_rows} headlines in {len(cube)} cells, {len(cube.tickers)} tickers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Concurrent, cached bulk downloader for daily price history.
+
+Prices are fetched from the Yahoo Finance chart API through one pooled HTTP
+session with retry/backoff, a bounded number of symbols at a time, and stored
+in the data/yfinance_data/{symbol}_historical_data.csv layout. A symbol that is
+already cached only has the bars after its last cached date fetched and
+appended, unless those bars carry a dividend or split: that changes Yahoo's
+adjustment of the older bars, so the full history is fetched again. Requests stop at the last completed session, so an unfinished
+intraday bar is never cached.
+
+Usage:
+    python scripts/price_downloader.py AAPL MSFT NVDA --workers 8
+"""
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from telemetry import instrument
+
+BASE_URL = 'https://query2.finance.yahoo.com'
+CACHE_DIR = 'data/yfinance_data'
+HISTORY_START = '1980-01-01'
+MARKET_TIMEZONE = 'America/New_York'
+MARKET_CLOSE_HOUR = 16
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume', 'Dividends', 'Stock Splits']
+
+
+def create_session(max_workers=8, retries=5, backoff_factor=0.5):
+    """
+    HTTP session shared by all download threads, with a connection pool sized
+    for max_workers and exponential backoff on throttling and server errors.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = 'Mozilla/5.0 (compatible; stock-analysis/1.0)'
+    return session
+
+
+def cache_path(symbol, cache_dir=CACHE_DIR):
+    return f'{cache_dir}/{symbol}_historical_data.csv'
+
+
+def cached_symbols(cache_dir=CACHE_DIR):
+    """Symbols with a {symbol}_historical_data.csv file in cache_dir"""
+    suffix = '_historical_data.csv'
+    if not os.path.isdir(cache_dir):
+        return []
+    return sorted(name[:-len(suffix)] for name in os.listdir(cache_dir) if name.endswith(suffix))
+
+
+def cached_date_range(path):
+    """
+    First and last Date of a cached CSV, read from its first and last lines
+    so that large files are not parsed just to find where they end.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None, None
+    with open(path, 'rb') as f:
+        f.readline()  # header
+        first_line = f.readline()
+        if not first_line.strip():
+            return None, None
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        block = b''
+        while position > 0 and block.rstrip(b'\r\n').count(b'\n') < 1:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step) + block
+        last_line = block.rstrip(b'\r\n').rsplit(b'\n', 1)[-1]
+    first = pd.Timestamp(first_line.split(b',', 1)[0].decode())
+    last = pd.Timestamp(last_line.split(b',', 1)[0].decode())
+    return first, last
+
+
+def _trading_dates(timestamps, timezone):
+    """Exchange-local trading dates for epoch-second timestamps"""
+    return (pd.to_datetime(pd.Series(timestamps, dtype='int64'), unit='s', utc=True)
+            .dt.tz_convert(timezone).dt.tz_localize(None).dt.normalize())
+
+
+def _event_series(events, value, timezone):
+    """Per-date dividend amounts or split ratios from the chart 'events' block"""
+    if not events:
+        return pd.Series(dtype=float)
+    values = [value(event) for event in events.values()]
+    dates = _trading_dates([int(ts) for ts in events], timezone)
+    return pd.Series(values, index=pd.DatetimeIndex(dates)).groupby(level=0).sum()
+
+
+def parse_chart(payload):
+    """Convert a chart API response into an OHLCV DataFrame indexed by Date"""
+    chart = payload.get('chart') or {}
+    if chart.get('error'):
+        raise ValueError(chart['error'].get('description') or str(chart['error']))
+    result = (chart.get('result') or [None])[0]
+    if not result or not result.get('timestamp'):
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+
+    timezone = result.get('meta', {}).get('exchangeTimezoneName', 'America/New_York')
+    dates = pd.DatetimeIndex(_trading_dates(result['timestamp'], timezone), name='Date')
+    quote = result['indicators']['quote'][0]
+    adjclose = result['indicators'].get('adjclose', [{}])[0].get('adjclose', quote['close'])
+
+    df = pd.DataFrame({
+        'Open': quote['open'],
+        'High': quote['high'],
+        'Low': quote['low'],
+        'Close': quote['close'],
+        'Adj Close': adjclose,
+        'Volume': quote['volume'],
+    }, index=dates, dtype=float)
+    df = df.dropna(subset=['Close'])
+    df = df[~df.index.duplicated(keep='last')]
+
+    events = result.get('events') or {}
+    dividends = _event_series(events.get('dividends'), lambda e: e['amount'], timezone)
+    splits = _event_series(events.get('splits'), lambda e: e['numerator'] / e['denominator'], timezone)
+    df['Dividends'] = dividends.reindex(df.index).fillna(0.0)
+    df['Stock Splits'] = splits.reindex(df.index).fillna(0.0)
+    df['Volume'] = df['Volume'].fillna(0).astype('int64')
+    return df[COLUMNS]
+
+
+def completed_sessions_end(now=None):
+    """
+    Exclusive end date of the completed trading sessions: tomorrow once
+    today's session has closed in New York, today while it is still open.
+    """
+    now = pd.Timestamp.now(tz=MARKET_TIMEZONE) if now is None else pd.Timestamp(now)
+    if now.tzinfo is None:
+        now = now.tz_localize(MARKET_TIMEZONE)
+    local = now.tz_convert(MARKET_TIMEZONE)
+    today = local.tz_localize(None).normalize()
+    return today + timedelta(days=1) if local.hour >= MARKET_CLOSE_HOUR else today
+
+
+def fetch_history(session, symbol, start, end, base_url=BASE_URL, timeout=30):
+    """Fetch daily bars for start <= Date < end"""
+    params = {
+        'period1': int(pd.Timestamp(start).timestamp()),
+        'period2': int(pd.Timestamp(end).timestamp()),
+        'interval': '1d',
+        'events': 'div,splits',
+        'includeAdjustedClose': 'true',
+    }
+    response = session.get(f'{base_url}/v8/finance/chart/{symbol}', params=params, timeout=timeout)
+    response.raise_for_status()
+    df = parse_chart(response.json())
+    return df[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+
+
+def update_symbol(session, symbol, start_date=HISTORY_START, end_date=None,
+                  cache_dir=CACHE_DIR, base_url=BASE_URL, refresh=False):
+    """
+    Bring one symbol's cached CSV up to end_date and return the number of new
+    bars written. Only dates after the last cached bar are requested; symbols
+    without a cache (or with refresh=True) are fetched in full from start_date.
+    Today's bar is only requested once the session has closed, since later
+    updates never revisit cached dates. New bars with a dividend or split
+    trigger a full refetch, as the adjusted history before them changed.
+    """
+    end = completed_sessions_end()
+    if end_date is not None:
+        end = min(end, pd.Timestamp(end_date).normalize() + timedelta(days=1))
+    path = cache_path(symbol, cache_dir)
+    _, last = cached_date_range(path)
+
+    if last is not None and not refresh:
+        start = last + timedelta(days=1)
+        if start >= end:
+            return 0
+        df = fetch_history(session, symbol, start, end, base_url)
+        df = df[df.index > last]
+        if not df[['Dividends', 'Stock Splits']].any().any():
+            if len(df):
+                df.to_csv(path, mode='a', header=False, date_format='%Y-%m-%d')
+            return len(df)
+        print(f"{symbol}: dividend or split after {last:%Y-%m-%d}, refetching the adjusted history")
+
+    df = fetch_history(session, symbol, start_date, end, base_url)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    df.to_csv(tmp_path, date_format='%Y-%m-%d')
+    os.replace(tmp_path, path)
+    return len(df) if last is None or refresh else int((df.index > last).sum())
+
+
+@instrument(rows=lambda result: sum(n for n in result.values() if n))
+def download_prices(symbols, start_date=HISTORY_START, end_date=None, cache_dir=CACHE_DIR,
+                    max_workers=8, session=None, base_url=BASE_URL, refresh=False):
+    """
+    Update the cache for many symbols concurrently.
+
+    Returns {symbol: new bar count}, with None for symbols that failed.
+    """
+    session = session or create_session(max_workers)
+
+    def update(symbol):
+        try:
+            return update_symbol(session, symbol, start_date, end_date, cache_dir, base_url, refresh)
+        except Exception as e:
+            print(f"Error downloading data for {symbol}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(symbols, executor.map(update, symbols)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download or refresh cached daily prices")
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--start-date', default=HISTORY_START, help="History start for uncached symbols")
+    parser.add_argument('--end-date', default=None)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--refresh', action='store_true', help="Re-fetch full history instead of appending")
+    args = parser.parse_args()
+
+    results = download_prices(args.symbols, args.start_date, args.end_date, args.cache_dir, args.workers,
+                              refresh=args.refresh)
+    for symbol, added in results.items():
+        print(f"{symbol}: " + ("failed" if added is None else f"{added} new bars"))
+
+
+if __name__ == "__main__":
+    main()
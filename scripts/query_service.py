@@ -0,0 +1,297 @@
+"""
+Local HTTP query service over the precomputed analysis outputs.
+
+Serves per-symbol indicator values (latest and history) from
+outputs/technical_analysis, indicator/return correlations from
+outputs/correlation_analysis, and daily headline sentiment from the news
+activity cube. Parsed
+files are kept in an in-memory LRU; every lookup compares the file's mtime
+and size with the cached copy, so re-running the pipeline invalidates stale
+entries without restarting the service.
+
+Usage:
+    python scripts/query_service.py --port 8000
+    curl localhost:8000/symbols/AAPL/indicators/latest
+    python scripts/query_service.py --benchmark
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Response
+
+from news_cube import NewsCube
+
+OUTPUT_DIR = 'outputs'
+LATENCY_TARGET_MS = 10
+
+
+class LRUCache:
+    """
+    Thread-safe LRU of values derived from files, keyed by (kind, symbol).
+    An entry is only returned while its source files still have the
+    (mtime, size) they had when it was loaded.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def signature(paths):
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return None
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def get(self, key, paths, load):
+        """Cached load() for key, reloading when any of paths changed"""
+        signature = self.signature(paths)
+        if signature is None:
+            raise FileNotFoundError(paths)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        value = load()
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = (signature, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class QueryStore:
+    """Read access to the processed outputs through an LRUCache"""
+
+    def __init__(self, output_dir=OUTPUT_DIR, cache_size=32):
+        self.output_dir = output_dir
+        self.cache = LRUCache(cache_size)
+
+    def indicator_path(self, symbol):
+        return os.path.join(self.output_dir, 'technical_analysis', f'{symbol}_processed_data.csv')
+
+    def correlation_path(self, symbol):
+        return os.path.join(self.output_dir, 'correlation_analysis', symbol, 'correlations.csv')
+
+    def cube_path(self):
+        return os.path.join(self.output_dir, 'news_cube.npz')
+
+    def symbols(self):
+        directory = os.path.join(self.output_dir, 'technical_analysis')
+        suffix = '_processed_data.csv'
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len(suffix)] for name in os.listdir(directory) if name.endswith(suffix))
+
+    def indicators(self, symbol):
+        """Processed price/indicator history of symbol, indexed by Date"""
+        path = self.indicator_path(symbol)
+
+        def load():
+            df = pd.read_csv(path, index_col='Date', parse_dates=['Date'])
+            return df.sort_index()
+
+        return self.cache.get(('indicators', symbol), [path], load)
+
+    def correlations(self, symbol):
+        """Same-day and lagged correlations of the indicators with daily returns"""
+        path = self.correlation_path(symbol)
+
+        def load():
+            table = pd.read_csv(path, index_col='indicator')
+            lagged = table.drop(columns='same_day')
+            return {
+                'symbol': symbol,
+                'same_day': _finite(table['same_day'].to_dict()),
+                'lagged': {name: _finite(row.to_dict()) for name, row in lagged.iterrows()},
+            }
+
+        return self.cache.get(('correlations', symbol), [path], load)
+
+    def cube(self):
+        path = self.cube_path()
+        return self.cache.get(('cube', None), [path], lambda: NewsCube.load(path))
+
+    def daily_sentiment(self, symbol):
+        """Mean headline sentiment and article count per date for symbol"""
+        path = self.cube_path()
+        return self.cache.get(('sentiment', symbol), [path], lambda: self.cube().daily_sentiment(symbol))
+
+
+def _finite(value):
+    """JSON-safe floats: NaN/inf become None"""
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    return float(value) if value is not None and np.isfinite(value) else None
+
+
+def _json(payload):
+    return Response(content=payload if isinstance(payload, (str, bytes)) else json.dumps(payload),
+                    media_type='application/json')
+
+
+def _frame_json(df, start=None, end=None, columns=None, limit=None):
+    """Date-sliced rows of df as a JSON list of records"""
+    if start is not None or end is not None:
+        # parsed up front so a bad date is a client error rather than a failed slice
+        for value in (start, end):
+            try:
+                pd.Timestamp(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Unparsable date: {value}")
+        df = df.loc[start:end]
+    if columns:
+        missing = [name for name in columns if name not in df.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(missing)}")
+        df = df[columns]
+    if limit:
+        df = df.tail(limit)
+    return df.reset_index().to_json(orient='records', date_format='iso', date_unit='s')
+
+
+def create_app(store=None):
+    """FastAPI app answering queries from store (a QueryStore over outputs/)"""
+    store = store or QueryStore()
+    app = FastAPI(title="Stock analysis query service")
+    app.state.store = store
+
+    def load(func, symbol):
+        try:
+            return func(symbol)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"No processed data for {symbol}")
+
+    @app.get('/health')
+    def health():
+        cache = store.cache
+        return {'status': 'ok', 'cached': len(cache.entries), 'hits': cache.hits, 'misses': cache.misses}
+
+    @app.get('/symbols')
+    def symbols():
+        return store.symbols()
+
+    @app.get('/symbols/{symbol}/indicators/latest')
+    def latest_indicators(symbol: str):
+        df = load(store.indicators, symbol)
+        if df.empty:
+            raise HTTPException(status_code=404, detail=f"No rows for {symbol}")
+        row = df.iloc[-1]
+        return _json({'symbol': symbol, 'date': row.name.strftime('%Y-%m-%d'), 'values': _finite(row.to_dict())})
+
+    @app.get('/symbols/{symbol}/indicators')
+    def indicator_history(symbol: str, start: str = None, end: str = None,
+                          columns: str = Query(None, description="Comma separated column names"),
+                          limit: int = Query(None, ge=1)):
+        df = load(store.indicators, symbol)
+        columns = [name.strip() for name in columns.split(',')] if columns else None
+        return _json(_frame_json(df, start, end, columns, limit))
+
+    @app.get('/symbols/{symbol}/correlations')
+    def correlations(symbol: str):
+        return _json(load(store.correlations, symbol))
+
+    @app.get('/symbols/{symbol}/sentiment')
+    def daily_sentiment(symbol: str, start: str = None, end: str = None, limit: int = Query(None, ge=1)):
+        try:
+            df = store.daily_sentiment(symbol)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="No news cube, run update_cube() first")
+        if df.empty:
+            raise HTTPException(status_code=404, detail=f"No headlines for {symbol}")
+        return _json(_frame_json(df, start, end, limit=limit))
+
+    return app
+
+
+def benchmark_latency(app, symbols, requests_per_symbol=200, paths=None):
+    """
+    Latency percentiles (ms) of single-symbol lookups against app served by
+    uvicorn on a local port, after one warm-up request per path.
+    """
+    import requests
+    import uvicorn
+
+    config = uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning')
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    paths = paths or ['/symbols/{}/indicators/latest', '/symbols/{}/indicators?limit=30', '/symbols/{}/correlations']
+    session = requests.Session()
+    timings = {}
+    try:
+        for path in paths:
+            urls = [f'http://127.0.0.1:{port}' + path.format(symbol) for symbol in symbols]
+            for url in urls:
+                session.get(url)
+            samples = []
+            for _ in range(requests_per_symbol):
+                for url in urls:
+                    start = time.perf_counter()
+                    session.get(url).raise_for_status()
+                    samples.append((time.perf_counter() - start) * 1000)
+            timings[path] = {
+                'requests': len(samples),
+                'p50_ms': round(float(np.percentile(samples, 50)), 3),
+                'p95_ms': round(float(np.percentile(samples, 95)), 3),
+                'p99_ms': round(float(np.percentile(samples, 99)), 3),
+            }
+    finally:
+        server.should_exit = True
+        thread.join()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve indicators, correlations and sentiment over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--cache-size', type=int, default=32, help="Symbols' files kept in memory")
+    parser.add_argument('--benchmark', action='store_true', help="Measure lookup latency instead of serving")
+    parser.add_argument('--requests', type=int, default=200, help="Benchmark requests per symbol and path")
+    args = parser.parse_args()
+
+    app = create_app(QueryStore(args.output_dir, args.cache_size))
+    if args.benchmark:
+        symbols = app.state.store.symbols()
+        if not symbols:
+            print(f"No processed data in {args.output_dir}/technical_analysis")
+            return
+        for path, stats in benchmark_latency(app, symbols, args.requests).items():
+            verdict = 'ok' if stats['p99_ms'] < LATENCY_TARGET_MS else f"above {LATENCY_TARGET_MS} ms target"
+            print(f"{path:40s} p50 {stats['p50_ms']:7.3f} ms  p95 {stats['p95_ms']:7.3f} ms  "
+                  f"p99 {stats['p99_ms']:7.3f} ms  {verdict}")
+        return
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
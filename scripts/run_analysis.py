@@ -1,24 +1,46 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from data_loader import load_news_data
+from data_loader import load_news_data, read_cached_stock_data
 from sentiment_analyzer import apply_sentiment_analysis
 from datetime import datetime
 from correlation_analysis import analyze_correlation, plot_correlation_analysis
+from text_analytics import NgramCounter
+from sketches import STATISTICS_FILE, update_feed_statistics
+from news_cube import CUBE_FILE, exchange_times, update_cube
+from price_downloader import CACHE_DIR, cached_symbols
+from dedup import cluster_representatives, deduplicate_headlines
+from telemetry import instrument
 import os
 
-def perform_descriptive_statistics(df):
+@instrument(rows=lambda stats: stats.n_rows)
+def perform_descriptive_statistics(news_file, state_path=STATISTICS_FILE):
+    """
+    Headline, publisher and ticker statistics from mergeable sketches
+    (exact at this size), read from news_file in chunks and saved to
+    state_path so later runs only summarise appended rows
+    """
     print("\n=== Descriptive Statistics ===")
     
+    columns = pd.read_csv(news_file, nrows=0).columns
+    ticker_column = 'stock' if 'stock' in columns else 'symbol'
+    stats = update_feed_statistics(state_path, news_file, workers=os.cpu_count() or 1,
+                                   capacity=5000, ticker_column=ticker_column)
+    
     # Headline length analysis
-    df['headline_length'] = df['headline'].str.len()
     print("\nHeadline Length Statistics:")
-    print(df['headline_length'].describe())
+    print(stats.headline_length_summary())
     
-    # Publisher analysis
+    # Publisher and ticker analysis
     print("\nTop 10 Publishers by Article Count:")
-    publisher_counts = df['publisher'].value_counts().head(10)
+    publisher_counts = stats.top_publishers(10)['count']
     print(publisher_counts)
+    print("\nTop 10 Publisher Domains:")
+    print(stats.top_domains(10)['count'])
+    print(f"\nDistinct publishers: {stats.distinct_publishers.count()}")
+    print(f"Distinct tickers: {stats.distinct_tickers.count()}")
+    print("\nDistinct Tickers per Day:")
+    print(stats.distinct_tickers_per_day().describe())
     
     # Create visualizations
     plt.figure(figsize=(12, 6))
@@ -28,29 +50,44 @@ def perform_descriptive_statistics(df):
     plt.tight_layout()
     plt.savefig('outputs/publisher_distribution.png')
     plt.close()
+    return stats
+
+@instrument(rows='df')
+def perform_keyword_analysis(df, top_n=20, chunksize=500_000):
+    print("\n=== Keyword Analysis ===")
+    
+    ticker_column = 'stock' if 'stock' in df.columns else 'symbol'
+    counter = NgramCounter(ngram_range=(1, 3), keep_matrix=False, ticker_column=ticker_column)
+    for start in range(0, len(df), chunksize):
+        counter.partial_fit(df.iloc[start:start + chunksize])
+    
+    top_ngrams = []
+    for n, label in [(1, 'Keywords'), (2, 'Bigrams'), (3, 'Trigrams')]:
+        top = counter.top_k(top_n, n=n)
+        print(f"\nTop {top_n} {label}:")
+        print(top.to_string(index=False))
+        top_ngrams.append(top.assign(n=n))
+    pd.concat(top_ngrams).to_csv('outputs/top_ngrams.csv', index=False)
+    
+    # Top bigrams per ticker
+    counter.top_k_by(10, by='ticker', n=2).to_csv('outputs/top_bigrams_by_ticker.csv', index=False)
+    return counter
 
-def perform_time_analysis(df):
+@instrument(rows=None)
+def perform_time_analysis(cube):
     print("\n=== Time Series Analysis ===")
     
-    # Ensure date column is datetime
+    # Queries run against the pre-aggregated cube instead of the raw rows
     try:
-        df['date'] = pd.to_datetime(df['date'], format='mixed', errors='coerce')
-        print(f"Number of valid dates: {df['date'].notna().sum()}")
-        print(f"Number of invalid dates: {df['date'].isna().sum()}")
-        
-        # Remove rows with invalid dates
-        df = df.dropna(subset=['date'])
-        
-        # Add time-based features
-        df['hour'] = df['date'].dt.hour
-        df['day_of_week'] = df['date'].dt.day_name()
-        df['month'] = df['date'].dt.month
-        
-        # Articles per day
-        daily_counts = df.groupby(df['date'].dt.date).size()
+        daily_counts = cube.daily_counts()
+        print(f"Number of headlines in cube: {int(daily_counts.sum())}")
         print("\nDaily Article Statistics:")
         print(daily_counts.describe())
-# Visualize publication patterns
+        
+        print("\nArticles by Day of Week:")
+        print(cube.weekday_distribution())
+        
+        # Visualize publication patterns
         plt.figure(figsize=(12, 6))
         daily_counts.plot()
         plt.title('Number of Articles Published Over Time')
@@ -60,28 +97,55 @@ def perform_time_analysis(df):
         
         # Hour of day analysis
         plt.figure(figsize=(10, 6))
-        df['hour'].value_counts().sort_index().plot(kind='bar')
+        cube.hourly_distribution().plot(kind='bar')
         plt.title('Distribution of Publication Hours')
         plt.xlabel('Hour of Day')
         plt.ylabel('Number of Articles')
         plt.tight_layout()
         plt.savefig('outputs/hourly_distribution.png')
         plt.close()
+        
+        # Days with unusually many articles for a ticker
+        spikes = cube.activity_spikes()
+        print(f"\nActivity spikes (ticker-days above 3 std of the previous 30 days): {len(spikes)}")
+        spikes.to_csv('outputs/news_activity_spikes.csv', index=False)
 
     except Exception as e:
             print(f"Error in time analysis: {str(e)}")
             print("\nDebug information:")
-            print(f"Date column type: {df['date'].dtype}")
-            print("\nFirst few dates:")
-            print(df['date'].head())
+            print(f"Cube cells: {len(cube)}, tickers: {len(cube.tickers)}")
 
 
 
+@instrument(rows='df')
+def perform_deduplication(df):
+    """
+    Collapse republished near-duplicate headlines (same ticker and day) into
+    one row each, weighted by cluster_size, before sentiment scoring. The
+    index label of each row's representative is stored in df['cluster'].
+    """
+    print("\n=== Near-Duplicate Headlines ===")
+    
+    ticker_column = 'stock' if 'stock' in df.columns else 'symbol'
+    representative = cluster_representatives(df, ticker_column=ticker_column, workers=os.cpu_count() or 1)
+    df['cluster'] = df.index[representative]
+    unique = deduplicate_headlines(df, representative)
+    print(f"{len(df)} headlines collapse into {len(unique)} distinct stories "
+          f"({len(df) - len(unique)} near-duplicates removed)")
+    print("\nLargest Clusters:")
+    print(unique.nlargest(5, 'cluster_size')[['headline', ticker_column, 'cluster_size']].to_string(index=False))
+    
+    unique['cluster_size'].value_counts().sort_index().rename_axis('cluster_size').rename('clusters') \
+        .to_csv('outputs/duplicate_cluster_sizes.csv')
+    return unique
+
+@instrument(rows='df')
 def analyze_sentiment_distribution(df):
     print("\n=== Sentiment Analysis ===")
     
-    # Apply sentiment analysis
-    df = apply_sentiment_analysis(df)
+    # Apply sentiment analysis unless the rows were already scored
+    if 'sentiment' not in df.columns:
+        df = apply_sentiment_analysis(df)
     
     # Print sentiment distribution
     print("\nSentiment Distribution:")
@@ -97,35 +161,47 @@ def analyze_sentiment_distribution(df):
     
     return df
 
-def perform_correlation_analysis(news_df, symbols=['AAPL', 'GOOGL', 'MSFT']):
+@instrument(rows='news_df')
+def perform_correlation_analysis(news_df, symbols=None, cache_dir=CACHE_DIR):
     """
-    Analyze correlation between news sentiment and stock movements
+    Analyze correlation between news sentiment and stock movements for the
+    given symbols (default: every symbol with cached prices)
     """
     print("\n=== Correlation Analysis ===")
     
     # Create output directory for correlation analysis
     os.makedirs('outputs/correlation', exist_ok=True)
     
-    for symbol in symbols:
+    ticker_column = 'stock' if 'stock' in news_df.columns else 'symbol'
+    results = {}
+    for symbol in symbols or cached_symbols(cache_dir):
         try:
-            # Load stock data
-            stock_file = f'data/yfinance_data/{symbol}_historical_data.csv'
-            stock_df = pd.read_csv(stock_file)
-            stock_df['Date'] = pd.to_datetime(stock_df['Date'])
-            stock_df.set_index('Date', inplace=True)
+            # Load cached stock data
+            stock_df = read_cached_stock_data(symbol, pd.Timestamp.min, pd.Timestamp.max, cache_dir)
+            if stock_df is None:
+                print(f"No cached price data for {symbol}")
+                continue
             
             # Calculate daily returns
             stock_df['Returns'] = stock_df['Close'].pct_change()
             
             # Prepare news data for this symbol
-            symbol_news = news_df[news_df['symbol'] == symbol].copy()
+            symbol_news = news_df[news_df[ticker_column] == symbol]
+            if symbol_news.empty:
+                print(f"No headlines for {symbol}")
+                continue
             
-            # Aggregate daily sentiment
-            daily_sentiment = symbol_news.groupby('date').agg({
-                'sentiment': 'mean',
-                'headline': 'count'
-            }).reset_index()
-            daily_sentiment.columns = ['Date', 'avg_sentiment', 'news_count']
+            # Aggregate daily sentiment per exchange-time day; after
+            # deduplication news_count counts stories and headline_count
+            # the headlines they stand for
+            aggregations = {'sentiment': 'mean', 'headline': 'count'}
+            columns = ['Date', 'avg_sentiment', 'news_count']
+            if 'cluster_size' in symbol_news.columns:
+                aggregations['cluster_size'] = 'sum'
+                columns.append('headline_count')
+            daily_sentiment = symbol_news.groupby(exchange_times(symbol_news['date']).dt.normalize()) \
+                .agg(aggregations).reset_index()
+            daily_sentiment.columns = columns
             
             # Analyze correlation
             correlation, lagged_correlations, merged_df = analyze_correlation(stock_df, daily_sentiment)
@@ -142,29 +218,36 @@ def perform_correlation_analysis(news_df, symbols=['AAPL', 'GOOGL', 'MSFT']):
             
             # Save processed data
             merged_df.to_csv(f'outputs/correlation/{symbol}_correlation_data.csv')
+            results[symbol] = merged_df
             
         except Exception as e:
             print(f"Error analyzing correlation for {symbol}: {str(e)}")
+    return results
 
-def main():
+def main(news_file='data/rawanalyst_data/raw_analyst_ratings.csv'):
     # Load the financial news dataset
     print("Loading news data...")
-    news_df = load_news_data('data/rawanalyst_data/raw_analyst_ratings.csv')
+    news_df = load_news_data(news_file)
     
     # Create output directory if it doesn't exist
     import os
     os.makedirs('outputs', exist_ok=True)
     
     # Perform analyses
-    perform_descriptive_statistics(news_df)
-    perform_time_analysis(news_df)
-    news_df = analyze_sentiment_distribution(news_df)
+    perform_descriptive_statistics(news_file)
+    perform_keyword_analysis(news_df)
+    
+    # Score one headline per near-duplicate cluster; its copies (and the
+    # cube's new rows) reuse the score of their cluster
+    unique_df = analyze_sentiment_distribution(perform_deduplication(news_df))
+    scores = unique_df['sentiment'].reindex(news_df['cluster']).set_axis(news_df.index)
+    perform_time_analysis(update_cube(CUBE_FILE, news_file, scores=scores))
     
     # Perform correlation analysis
-    perform_correlation_analysis(news_df)
+    perform_correlation_analysis(unique_df)
     
     # Save processed dataset
-    news_df.to_csv('outputs/processed_news_data.csv', index=False)
+    unique_df.to_csv('outputs/processed_news_data.csv', index=False)
     print("\nAnalysis complete. Check the 'outputs' directory for visualizations.")
 
 if __name__ == "__main__":
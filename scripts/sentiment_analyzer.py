@@ -1,9 +1,11 @@
 from textblob import TextBlob
+from telemetry import instrument
 
 def analyze_sentiment(text):
     """Perform sentiment analysis on a given text."""
     return TextBlob(text).sentiment.polarity
 
+@instrument()
 def apply_sentiment_analysis(df, text_column='headline'):
     """Apply sentiment analysis to a DataFrame column."""
     df['sentiment'] = df[text_column].apply(analyze_sentiment)
@@ -0,0 +1,427 @@
+"""
+Mergeable streaming sketches for news feed statistics.
+
+The descriptive statistics in run_analysis.py (top publishers, publisher
+domains, distinct tickers per day) need the whole feed in memory. The
+sketches here are updated one chunk at a time, use bounded memory, and can be
+merged, so chunks may be summarised in separate worker processes and combined
+afterwards (all classes are picklable).
+
+Error bounds, with N the total number of rows seen:
+
+- SpaceSaving(capacity): exact while at most `capacity` distinct items have
+  been seen. Beyond that each reported count over-estimates the true count by
+  at most its `error` column, which is <= N / capacity, and every item whose
+  true count exceeds N / capacity is guaranteed to be tracked.
+- CountMinSketch(epsilon, delta): point estimates never under-count, and
+  over-count by at most epsilon * N with probability 1 - delta.
+- HyperLogLog(p): exact while at most `exact_threshold` distinct values have
+  been seen (kept as a set of 64-bit hashes). Beyond that the relative
+  standard error is 1.04 / sqrt(2 ** p), e.g. 0.81% for p=14 and 1.6% for p=12.
+
+Days are exchange (New York) days, see news_cube.exchange_times().
+update_feed_statistics() pickles the statistics together with how many bytes
+of the news CSV they cover, so later runs only summarise appended rows.
+
+Usage:
+    stats = summarize_news('data/rawanalyst_data/raw_analyst_ratings.csv', workers=4)
+    stats.top_publishers(10)
+    stats.distinct_tickers_per_day()
+    stats = update_feed_statistics('outputs/feed_statistics.pkl', 'data/rawanalyst_data/raw_analyst_ratings.csv')
+"""
+import math
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_loader import file_checksums, load_news_data_chunks
+from news_cube import exchange_times
+from telemetry import instrument
+
+STATISTICS_FILE = 'outputs/feed_statistics.pkl'
+
+# Odd multipliers for the multiply-shift row hashes of CountMinSketch
+_ROW_MULTIPLIERS = np.array([
+    0x9E3779B97F4A7C15, 0xBF58476D1CE4E5B9, 0x94D049BB133111EB, 0xD6E8FEB86659FD93,
+    0xA0761D6478BD642F, 0xE7037ED1A0B428DB, 0x8EBC6AF09C88C6E3, 0x589965CC75374CC3,
+    0x1D8E4E27C47D124F, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5,
+], dtype=np.uint64)
+
+
+def hash_values(values):
+    """Stable 64-bit hashes of strings/numbers, identical across processes"""
+    values = pd.Series(values).dropna().astype(str).to_numpy(dtype=object)
+    return pd.util.hash_array(values, categorize=False)
+
+
+def _bit_length(x):
+    """Vectorised int.bit_length() for uint64 arrays"""
+    x = x.copy()
+    length = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = x >= np.uint64(1 << shift)
+        x[high] >>= np.uint64(shift)
+        length[high] += shift
+    return length + (x > 0)
+
+
+def _value_counts(values, counts=None):
+    """Series of counts per item, from raw values or values with weights"""
+    if counts is None:
+        return pd.Series(values).value_counts(dropna=True)
+    counts = pd.Series(np.asarray(counts, dtype=np.int64), index=pd.Index(values))
+    return counts[counts.index.notna()].groupby(level=0).sum()
+
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters with at most `capacity` counters (Space-Saving).
+
+    Counts are over-estimates; `error` bounds by how much. Merging adds the
+    counters of both summaries, charging items missing from one side that
+    side's `floor` (the largest count it ever evicted), and keeps the
+    `capacity` largest.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.floor = 0
+        self.n = 0
+
+    @property
+    def exact(self):
+        return self.floor == 0
+
+    def update(self, values, counts=None):
+        """Add raw values, or distinct values with their counts"""
+        chunk = _value_counts(values, counts)
+        other = SpaceSaving(max(self.capacity, len(chunk)))
+        other.counts = chunk.astype(np.int64)
+        other.errors = pd.Series(0, index=chunk.index, dtype=np.int64)
+        other.n = int(chunk.sum())
+        return self.merge(other)
+
+    def merge(self, other):
+        index = self.counts.index.union(other.counts.index)
+        counts = (self.counts.reindex(index, fill_value=self.floor)
+                  + other.counts.reindex(index, fill_value=other.floor))
+        errors = (self.errors.reindex(index, fill_value=self.floor)
+                  + other.errors.reindex(index, fill_value=other.floor))
+        floor = self.floor + other.floor
+        if len(counts) > self.capacity:
+            counts = counts.sort_index().sort_values(ascending=False, kind='stable')
+            floor = max(floor, int(counts.iloc[self.capacity]))
+            counts = counts.iloc[:self.capacity]
+        self.counts = counts.astype(np.int64)
+        self.errors = errors.reindex(counts.index).astype(np.int64)
+        self.floor = floor
+        self.n += other.n
+        return self
+
+    def top(self, k=10):
+        """The k largest counters as a DataFrame with count and error columns"""
+        counts = self.counts.sort_index().sort_values(ascending=False, kind='stable').head(k)
+        return pd.DataFrame({'count': counts, 'error': self.errors.reindex(counts.index)})
+
+
+class CountMinSketch:
+    """
+    Approximate counts of arbitrary items in depth x width counters.
+
+    width is e / epsilon and depth ln(1 / delta), rounded up (width to a
+    power of two for multiply-shift hashing).
+    """
+
+    def __init__(self, epsilon=1e-4, delta=1e-3):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.depth = min(len(_ROW_MULTIPLIERS), max(1, math.ceil(math.log(1 / delta))))
+        self.width_bits = max(1, math.ceil(math.log2(math.e / epsilon)))
+        self.table = np.zeros((self.depth, 1 << self.width_bits), dtype=np.int64)
+        self.n = 0
+
+    def _columns(self, hashes):
+        shift = np.uint64(64 - self.width_bits)
+        with np.errstate(over='ignore'):
+            return [((hashes * _ROW_MULTIPLIERS[row]) >> shift).astype(np.intp) for row in range(self.depth)]
+
+    def update(self, values, counts=None):
+        chunk = _value_counts(values, counts)
+        weights = chunk.to_numpy(dtype=np.float64)
+        for row, columns in enumerate(self._columns(hash_values(chunk.index))):
+            self.table[row] += np.bincount(columns, weights=weights, minlength=self.table.shape[1]).astype(np.int64)
+        self.n += int(chunk.sum())
+        return self
+
+    def merge(self, other):
+        if self.table.shape != other.table.shape:
+            raise ValueError("Can only merge Count-Min sketches of the same shape")
+        self.table += other.table
+        self.n += other.n
+        return self
+
+    def estimate(self, values):
+        """Estimated count of each value, as a Series indexed by value"""
+        index = pd.Index(values)
+        columns = self._columns(hash_values(index))
+        estimates = np.min([self.table[row, column] for row, column in enumerate(columns)], axis=0)
+        return pd.Series(estimates, index=index, dtype=np.int64)
+
+
+class HyperLogLog:
+    """
+    Distinct count estimate in 2 ** p one-byte registers.
+
+    Up to exact_threshold distinct values (by default as many as fit in the
+    memory of the registers) the hashes are kept and counted exactly.
+    """
+
+    def __init__(self, p=14, exact_threshold=None):
+        self.p = p
+        self.m = 1 << p
+        self.exact_threshold = self.m // 8 if exact_threshold is None else exact_threshold
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.registers = None
+
+    @property
+    def exact(self):
+        return self.registers is None
+
+    def add_hashes(self, hashes):
+        """Add values already hashed with hash_values()"""
+        if self.exact:
+            self.hashes = np.union1d(self.hashes, hashes)
+            if len(self.hashes) <= self.exact_threshold:
+                return
+            hashes, self.hashes = self.hashes, np.zeros(0, dtype=np.uint64)
+            self.registers = np.zeros(self.m, dtype=np.uint8)
+        p = np.uint64(self.p)
+        buckets = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # Sentinel bit caps the rank at 64 - p + 1 for an all-zero remainder
+        remainder = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        ranks = (65 - _bit_length(remainder)).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def update(self, values):
+        self.add_hashes(hash_values(values))
+        return self
+
+    def merge(self, other):
+        if self.p != other.p:
+            raise ValueError("Can only merge HyperLogLogs with the same precision")
+        if other.exact:
+            self.add_hashes(other.hashes)
+        else:
+            if self.exact:
+                hashes, self.hashes = self.hashes, np.zeros(0, dtype=np.uint64)
+                self.registers = other.registers.copy()
+                self.add_hashes(hashes)
+            else:
+                np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        if self.exact:
+            return len(self.hashes)
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            # Linear counting is more accurate at small cardinalities
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+
+def publisher_domains(publishers):
+    """Domain of email-style publisher names ('x@benzinga.com' -> 'benzinga.com'), else NaN"""
+    return pd.Series(publishers).str.extract(r'@([^@\s]+)$', expand=False).str.lower()
+
+
+class FeedStatistics:
+    """
+    Streaming statistics for perform_descriptive_statistics(): headline
+    lengths, top publishers and publisher domains, distinct publishers and
+    tickers, and distinct tickers per day.
+    """
+
+    def __init__(self, capacity=1000, p=14, day_p=12, epsilon=1e-4, delta=1e-3,
+                 text_column='headline', publisher_column='publisher', ticker_column='stock', date_column='date'):
+        self.capacity = capacity
+        self.p = p
+        self.day_p = day_p
+        self.text_column = text_column
+        self.publisher_column = publisher_column
+        self.ticker_column = ticker_column
+        self.date_column = date_column
+        self.publishers = SpaceSaving(capacity)
+        self.publisher_sketch = CountMinSketch(epsilon, delta)
+        self.domains = SpaceSaving(capacity)
+        self.distinct_publishers = HyperLogLog(p)
+        self.distinct_tickers = HyperLogLog(p)
+        self.daily_tickers = {}
+        self.headline_lengths = np.zeros(0, dtype=np.int64)  # headlines per length
+        self.n_rows = 0
+
+    def update(self, chunk):
+        """Add a chunk of headlines (DataFrame with text, publisher, ticker and date columns)"""
+        lengths = chunk[self.text_column].str.len().dropna().to_numpy(dtype=np.int64)
+        self._add_lengths(np.bincount(lengths))
+
+        publishers = chunk[self.publisher_column].value_counts()
+        self.publishers.update(publishers.index, publishers.to_numpy())
+        self.publisher_sketch.update(publishers.index, publishers.to_numpy())
+        self.distinct_publishers.update(publishers.index)
+        domains = publisher_domains(publishers.index)
+        has_domain = domains.notna().to_numpy()
+        self.domains.update(domains[has_domain], publishers.to_numpy()[has_domain])
+
+        tickers = chunk[self.ticker_column]
+        self.distinct_tickers.update(tickers.unique())
+        days = exchange_times(chunk[self.date_column]).dt.normalize()
+        pairs = pd.DataFrame({'day': days, 'ticker': tickers}).dropna().drop_duplicates()
+        # Hash all tickers once and hand each day its slice of hashes
+        day_codes, day_values = pd.factorize(pairs['day'], sort=True)
+        order = np.argsort(day_codes, kind='stable')
+        hashes = hash_values(pairs['ticker'])[order]
+        bounds = np.searchsorted(day_codes[order], np.arange(len(day_values) + 1))
+        for code, day in enumerate(day_values):
+            if day not in self.daily_tickers:
+                self.daily_tickers[day] = HyperLogLog(self.day_p)
+            self.daily_tickers[day].add_hashes(hashes[bounds[code]:bounds[code + 1]])
+
+        self.n_rows += len(chunk)
+        return self
+
+    def _add_lengths(self, counts):
+        if len(counts) > len(self.headline_lengths):
+            self.headline_lengths = np.pad(self.headline_lengths, (0, len(counts) - len(self.headline_lengths)))
+        self.headline_lengths[:len(counts)] += counts
+
+    def merge(self, other):
+        self._add_lengths(other.headline_lengths)
+        self.publishers.merge(other.publishers)
+        self.publisher_sketch.merge(other.publisher_sketch)
+        self.domains.merge(other.domains)
+        self.distinct_publishers.merge(other.distinct_publishers)
+        self.distinct_tickers.merge(other.distinct_tickers)
+        for day, sketch in other.daily_tickers.items():
+            if day in self.daily_tickers:
+                self.daily_tickers[day].merge(sketch)
+            else:
+                self.daily_tickers[day] = sketch
+        self.n_rows += other.n_rows
+        return self
+
+    def headline_length_summary(self):
+        """Exact Series.describe() of the headline lengths, from their histogram"""
+        counts = self.headline_lengths
+        lengths = np.arange(len(counts))
+        n = int(counts.sum())
+        index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+        if n == 0:
+            return pd.Series([0] + [np.nan] * 7, index=index, name='headline_length', dtype=np.float64)
+        mean = (lengths * counts).sum() / n
+        std = math.sqrt(((lengths - mean) ** 2 * counts).sum() / (n - 1)) if n > 1 else np.nan
+        cumulative = np.cumsum(counts)
+
+        def nth(k):
+            # Length of the k-th shortest headline (0-based)
+            return lengths[np.searchsorted(cumulative, k, side='right')]
+
+        def quantile(q):
+            position = q * (n - 1)
+            low, high = nth(math.floor(position)), nth(math.ceil(position))
+            return low + (high - low) * (position - math.floor(position))
+
+        return pd.Series([n, mean, std, nth(0), quantile(0.25), quantile(0.5), quantile(0.75), nth(n - 1)],
+                         index=index, name='headline_length', dtype=np.float64)
+
+    def top_publishers(self, k=10):
+        return self.publishers.top(k)
+
+    def top_domains(self, k=10):
+        return self.domains.top(k)
+
+    def publisher_counts(self, publishers):
+        """Article counts for any publishers, exact while the top-k summary is"""
+        index = pd.Index(publishers)
+        if self.publishers.exact:
+            return self.publishers.counts.reindex(index, fill_value=0)
+        # Both are upper bounds, the smaller one is tighter
+        estimates = self.publisher_sketch.estimate(index)
+        tracked = self.publishers.counts.reindex(index).to_numpy(dtype=np.float64, na_value=np.inf)
+        return pd.Series(np.minimum(estimates.to_numpy(), tracked).astype(np.int64), index=index)
+
+    def distinct_tickers_per_day(self):
+        days = sorted(self.daily_tickers)
+        return pd.Series([self.daily_tickers[day].count() for day in days],
+                         index=pd.DatetimeIndex(days, name='date'), name='distinct_tickers', dtype=np.int64)
+
+
+def _summarize_chunk(chunk, options):
+    return FeedStatistics(**options).update(chunk)
+
+
+@instrument(rows=lambda stats: stats.n_rows)
+def summarize_news(file_path, chunksize=500_000, workers=1, offset=0, **options):
+    """
+    FeedStatistics over a news CSV read in chunks (from byte offset on),
+    summarising chunks in `workers` processes and merging the results.
+    """
+    chunks = load_news_data_chunks(file_path, chunksize, offset)
+    stats = FeedStatistics(**options)
+    if workers <= 1:
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Bound the number of chunks held in memory while workers are busy
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_summarize_chunk, chunk, options))
+            if len(pending) > 2 * workers:
+                stats.merge(pending.popleft().result())
+        while pending:
+            stats.merge(pending.popleft().result())
+    return stats
+
+
+@instrument(rows=lambda stats: stats.n_rows)
+def update_feed_statistics(state_path=STATISTICS_FILE, news_file='data/rawanalyst_data/raw_analyst_ratings.csv',
+                           chunksize=500_000, workers=1, **options):
+    """
+    FeedStatistics of news_file, kept up to date in a pickle at state_path.
+
+    Only rows after the bytes already summarised are read. If news_file
+    shrank, those bytes no longer match their checksum or the options
+    changed, the statistics are rebuilt from scratch.
+    """
+    size = os.path.getsize(news_file)
+    state = {'options': options, 'source_size': 0, 'source_checksum': '', 'stats': None}
+    if os.path.exists(state_path):
+        with open(state_path, 'rb') as f:
+            saved = pickle.load(f)
+        if saved['options'] == options and saved['source_size'] <= size:
+            state = saved
+    absorbed, checksum = file_checksums(news_file, state['source_size'], size)
+    if state['source_size'] and absorbed != state['source_checksum']:
+        print(f"{news_file} was rewritten since the statistics were saved, rebuilding")
+        state = {'options': options, 'source_size': 0, 'source_checksum': '', 'stats': None}
+    if state['stats'] is not None and size == state['source_size']:
+        return state['stats']
+
+    new = summarize_news(news_file, chunksize, workers, offset=state['source_size'], **options)
+    stats = new if state['stats'] is None else state['stats'].merge(new)
+    state.update(stats=stats, source_size=size, source_checksum=checksum)
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    tmp_path = f'{state_path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, state_path)
+    return stats
@@ -0,0 +1,202 @@
+"""
+Deterministic synthetic data for benchmarks and tests.
+
+generate_ohlcv() produces price histories with the same columns as the
+data/yfinance_data CSVs, and generate_headlines() produces an analyst-ratings
+feed with the same columns as raw_analyst_ratings.csv (headline, url,
+publisher, date, stock), including a share of lightly reworded republished
+stories. The same arguments always produce the same data.
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume', 'Dividends', 'Stock Splits']
+
+# Daily business-day bars run out of representable timestamps after ~60k bars,
+# so longer histories switch to minute bars
+MAX_DAILY_BARS = 50_000
+
+PUBLISHERS = [
+    'Paul Quintaro', 'Lisa Levin', 'Benzinga Newsdesk', 'Charles Gross', 'Monica Gerson',
+    'Eddie Staley', 'Hal Lindon', 'ETF Professor', 'Juan Lopez', 'Benzinga Staff',
+    'Vick Meyer', 'webmaster', 'Benzinga_Newsdesk', 'Zacks', 'Jayson Derrick',
+    'Allie Wickman', 'Shanthi Rexaline', 'Craig Jones', 'Wayne Duggan', 'Nelson Hem',
+    'vick@benzinga.com', 'news@benzinga.com', 'editor@zacks.com', 'desk@reuters.com',
+]
+FIRMS = [
+    'Goldman Sachs', 'Morgan Stanley', 'JP Morgan', 'Barclays', 'Citigroup', 'UBS',
+    'Deutsche Bank', 'Credit Suisse', 'Wells Fargo', 'Jefferies', 'Piper Sandler', 'Needham',
+]
+RATINGS = ['Buy', 'Outperform', 'Overweight', 'Neutral', 'Hold', 'Underweight', 'Sell']
+TEMPLATES = [
+    '{firm} Upgrades {stock} to {rating}',
+    '{firm} Downgrades {stock} to {rating}',
+    '{firm} Maintains {rating} on {stock}, Raises Price Target to ${pt}',
+    '{firm} Maintains {rating} on {stock}, Lowers Price Target to ${pt}',
+    '{firm} Initiates Coverage On {stock} with {rating} Rating, Announces Price Target of ${pt}',
+    '{stock} Shares Are Trading Higher After Company Reported Strong Quarterly Results',
+    '{stock} Shares Are Trading Lower After Company Missed Sales Estimates',
+    'Stocks That Hit 52-Week Highs On {weekday}',
+    '{stock} Q{quarter} EPS ${eps} Beats ${estimate} Estimate',
+    'Benzinga Pro\'s Top 5 Stocks To Watch For {weekday}, Including {stock}',
+]
+REWORDINGS = [' - Report', ' (Update)', '.', ' -- Benzinga', ', Says Analyst']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+
+def _rng(seed, *keys):
+    """Generator seeded from seed plus stable string/int keys"""
+    entropy = [seed] + [zlib.crc32(str(key).encode()) for key in keys]
+    return np.random.default_rng(entropy)
+
+
+def symbol_names(n_symbols):
+    """Synthetic ticker names SYN0000, SYN0001, ..."""
+    width = max(4, len(str(n_symbols - 1)))
+    return [f'SYN{i:0{width}d}' for i in range(n_symbols)]
+
+
+def generate_ohlcv(n_bars, symbol='SYN0000', seed=0, start='1990-01-02', start_price=100.0):
+    """
+    Geometric random walk OHLCV history indexed by Date.
+
+    Uses business-day bars up to MAX_DAILY_BARS and minute bars beyond that.
+    """
+    rng = _rng(seed, 'ohlcv', symbol)
+    freq = 'B' if n_bars <= MAX_DAILY_BARS else 'min'
+    dates = pd.date_range(start, periods=n_bars, freq=freq, name='Date')
+
+    log_returns = rng.normal(0.0003, 0.02, n_bars)
+    close = start_price * np.exp(np.cumsum(log_returns))
+    gaps = rng.normal(0.0, 0.005, n_bars)
+    open_ = np.empty(n_bars)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    open_ *= np.exp(gaps)
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0.0, 0.01, n_bars)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0.0, 0.01, n_bars)))
+    volume = rng.lognormal(16.0, 0.5, n_bars).astype(np.int64)
+
+    return pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Adj Close': close,
+        'Volume': volume,
+        'Dividends': np.zeros(n_bars),
+        'Stock Splits': np.zeros(n_bars),
+    }, index=dates)
+
+
+def iter_ohlcv_universe(n_symbols, n_bars, seed=0):
+    """Yield (symbol, DataFrame) pairs without holding the universe in memory"""
+    for symbol in symbol_names(n_symbols):
+        yield symbol, generate_ohlcv(n_bars, symbol=symbol, seed=seed)
+
+
+def write_ohlcv_universe(output_dir, n_symbols, n_bars, seed=0):
+    """Write {symbol}_historical_data.csv files in the data/yfinance_data layout"""
+    import os
+    os.makedirs(output_dir, exist_ok=True)
+    symbols = []
+    for symbol, df in iter_ohlcv_universe(n_symbols, n_bars, seed):
+        df.to_csv(f'{output_dir}/{symbol}_historical_data.csv')
+        symbols.append(symbol)
+    return symbols
+
+
+def _fill(template, columns):
+    """Vectorised str.format of template over equally long Series in columns"""
+    parts = template.replace('}', '{').split('{')
+    result = pd.Series(parts[0], index=next(iter(columns.values())).index, dtype=object)
+    for i, part in enumerate(parts[1:]):
+        result = result + (columns[part] if i % 2 == 0 else part)
+    return result
+
+
+def generate_headlines(n_rows, symbols=None, n_symbols=50, seed=0, chunk_index=0,
+                       start='2011-04-27', end='2020-06-11', duplicate_rate=0.05):
+    """
+    Synthetic analyst-ratings headlines with the raw_analyst_ratings.csv columns.
+
+    Publishers and tickers follow Zipf-like popularity. A duplicate_rate share
+    of rows republish an earlier story from the same chunk for the same ticker
+    and day with small wording changes and a different publisher.
+    """
+    symbols = list(symbols) if symbols is not None else symbol_names(n_symbols)
+    rng = _rng(seed, 'headlines', chunk_index)
+
+    def zipf_ids(n_options, size):
+        weights = 1.0 / np.arange(1, n_options + 1)
+        return rng.choice(n_options, size, p=weights / weights.sum())
+
+    def zipf_choice(options, size):
+        return np.asarray(options, dtype=object)[zipf_ids(len(options), size)]
+
+    stock = pd.Series(zipf_choice(symbols, n_rows))
+    publisher_ids = zipf_ids(len(PUBLISHERS), n_rows)
+    template_ids = rng.integers(0, len(TEMPLATES), n_rows)
+
+    start_ts, end_ts = pd.Timestamp(start), pd.Timestamp(end)
+    days = rng.integers(0, (end_ts - start_ts).days + 1, n_rows)
+    # Publication times cluster around the US market session
+    seconds = np.clip(rng.normal(12.5 * 3600, 3.5 * 3600, n_rows), 0, 86399).astype(np.int64)
+    date = start_ts + pd.to_timedelta(days, unit='D') + pd.to_timedelta(seconds, unit='s')
+
+    columns = {
+        'stock': stock,
+        'firm': pd.Series(zipf_choice(FIRMS, n_rows)),
+        'rating': pd.Series(np.asarray(RATINGS, dtype=object)[rng.integers(0, len(RATINGS), n_rows)]),
+        'pt': pd.Series(rng.integers(5, 600, n_rows)).astype(str),
+        'weekday': pd.Series(np.asarray(WEEKDAYS, dtype=object)[rng.integers(0, 5, n_rows)]),
+        'quarter': pd.Series(rng.integers(1, 5, n_rows)).astype(str),
+        'eps': pd.Series(np.round(rng.uniform(0.1, 5.0, n_rows), 2)).astype(str),
+        'estimate': pd.Series(np.round(rng.uniform(0.1, 5.0, n_rows), 2)).astype(str),
+    }
+    headline = pd.Series('', index=stock.index, dtype=object)
+    for template_id, template in enumerate(TEMPLATES):
+        mask = template_ids == template_id
+        if mask.any():
+            headline[mask] = _fill(template, {key: value[mask] for key, value in columns.items()})
+
+    # Republished stories: copy an earlier row, tweak the wording, shift the time
+    n_duplicates = int(n_rows * duplicate_rate)
+    if n_duplicates and n_rows > 1:
+        targets = rng.choice(np.arange(1, n_rows), n_duplicates, replace=False)
+        sources = (rng.random(n_duplicates) * targets).astype(np.int64)
+        suffixes = np.asarray(REWORDINGS, dtype=object)[rng.integers(0, len(REWORDINGS), n_duplicates)]
+        headline.iloc[targets] = headline.iloc[sources].to_numpy() + suffixes
+        stock.iloc[targets] = stock.iloc[sources].to_numpy()
+        date_values = date.to_numpy().copy()
+        date_values[targets] = date_values[sources] + rng.integers(60, 3600, n_duplicates).astype('timedelta64[s]')
+        date = pd.DatetimeIndex(date_values)
+        shift = rng.integers(1, len(PUBLISHERS), n_duplicates)
+        publisher_ids[targets] = (publisher_ids[sources] + shift) % len(PUBLISHERS)
+
+    row_ids = np.arange(n_rows, dtype=np.int64) + chunk_index * 10 ** 9
+    return pd.DataFrame({
+        'headline': headline,
+        'url': 'https://www.benzinga.com/news/' + pd.Series(row_ids).astype(str),
+        'publisher': np.asarray(PUBLISHERS, dtype=object)[publisher_ids],
+        'date': date,
+        'stock': stock,
+    })
+
+
+def iter_headline_chunks(n_rows, chunk_size=1_000_000, seed=0, **kwargs):
+    """Yield generate_headlines() chunks that together hold n_rows rows"""
+    for chunk_index, offset in enumerate(range(0, n_rows, chunk_size)):
+        yield generate_headlines(min(chunk_size, n_rows - offset), seed=seed, chunk_index=chunk_index, **kwargs)
+
+
+def write_headlines(path, n_rows, chunk_size=1_000_000, seed=0, **kwargs):
+    """Write a synthetic raw_analyst_ratings-style CSV chunk by chunk"""
+    offset = 0
+    for i, chunk in enumerate(iter_headline_chunks(n_rows, chunk_size, seed, **kwargs)):
+        chunk.index += offset
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0)
+        offset += len(chunk)
+    return path
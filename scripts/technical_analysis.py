@@ -4,11 +4,37 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
-from ta.trend import sma_indicator, ema_indicator, MACD
-from ta.momentum import RSIIndicator
-from ta.volatility import BollingerBands
-from ta.volume import on_balance_volume
+from indicators import compute_indicators
+from telemetry import instrument
 
+# Indicator columns each plot of plot_technical_analysis draws
+PLOT_INDICATORS = {
+    'moving_averages': ['SMA_20', 'SMA_50'],
+    'rsi': ['RSI'],
+    'macd': ['MACD', 'MACD_Signal', 'MACD_Hist'],
+    'bollinger_bands': ['BB_Upper', 'BB_Middle', 'BB_Lower'],
+}
+
+# Coarser timeframes: column suffix -> pandas period of one bar
+TIMEFRAMES = {
+    'W': 'W-FRI',
+    'M': 'M',
+}
+TIMEFRAME_INDICATORS = ['RSI', 'MACD', 'MACD_Signal', 'MACD_Hist', 'BB_Upper', 'BB_Middle', 'BB_Lower']
+# Bars of history the indicators need before their first value: SMA_50 on
+# daily bars (with a margin for market holidays), MACD_Signal (a 26-bar EMA,
+# then a 9-bar EMA of it) on weekly and monthly bars
+WARMUP_BARS = {'D': 60, 'W': 35, 'M': 35}
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Adj Close': 'last',
+    'Volume': 'sum',
+}
+
+@instrument()
 def load_stock_data(symbol, start_date, end_date):
     """
     Load stock data from local CSV files
@@ -31,38 +57,19 @@ def load_stock_data(symbol, start_date, end_date):
         print(f"Error loading data for {symbol}: {str(e)}")
         return None
 
-def calculate_technical_indicators(df):
+@instrument()
+def calculate_technical_indicators(df, columns=None):
     """
-    Calculate various technical indicators using ta library
+    Calculate technical indicators using the indicator registry.
+    Only the requested columns (default: all standard indicators) and the
+    intermediates they depend on are computed.
     """
     if len(df) < 50:
         print("Not enough data for technical analysis")
         return df
 
     try:
-        # Moving Averages
-        df['SMA_20'] = sma_indicator(close=df['Close'], window=20)
-        df['SMA_50'] = sma_indicator(close=df['Close'], window=50)
-        df['EMA_20'] = ema_indicator(close=df['Close'], window=20)
-        
-        # RSI
-        rsi_indicator = RSIIndicator(close=df['Close'])
-        df['RSI'] = rsi_indicator.rsi()
-        
-        # MACD
-        macd = MACD(close=df['Close'])
-        df['MACD'] = macd.macd()
-        df['MACD_Signal'] = macd.macd_signal()
-        df['MACD_Hist'] = macd.macd_diff()
-        
-        # Bollinger Bands
-        bb = BollingerBands(close=df['Close'])
-        df['BB_Upper'] = bb.bollinger_hband()
-        df['BB_Middle'] = bb.bollinger_mavg()
-        df['BB_Lower'] = bb.bollinger_lband()
-        
-        # Volume indicators
-        df['OBV'] = on_balance_volume(close=df['Close'], volume=df['Volume'])
+        compute_indicators(df, columns)
         
         print("Successfully calculated technical indicators")
         return df
@@ -71,66 +78,152 @@ def calculate_technical_indicators(df):
         print(f"Error calculating technical indicators: {str(e)}")
         return df
 
-def plot_technical_analysis(df, symbol, output_dir='outputs/technical_analysis'):
+def warmup_start(start_date, timeframes=()):
+    """
+    First date to load so that the daily indicators and those of the given
+    timeframes have values from start_date on
+    """
+    start_date = pd.Timestamp(start_date)
+    starts = [start_date.normalize() - pd.offsets.BDay(WARMUP_BARS['D'])]
+    starts.extend((pd.Period(start_date, TIMEFRAMES[timeframe]) - WARMUP_BARS[timeframe]).start_time
+                  for timeframe in timeframes)
+    return min(starts)
+
+def resample_ohlcv(df, timeframe):
+    """
+    Daily OHLCV bars aggregated to one bar per period of TIMEFRAMES[timeframe].
+    Each bar is labelled with the last trading day it covers, the first day
+    its values are known.
+    """
+    periods = df.index.to_period(TIMEFRAMES[timeframe])
+    aggregation = {column: how for column, how in OHLCV_AGGREGATION.items() if column in df.columns}
+    bars = df[list(aggregation)].groupby(periods, sort=True).agg(aggregation)
+    bars.index = pd.Series(df.index, index=df.index).groupby(periods, sort=True).max().values
+    bars.index.name = df.index.name
+    return bars
+
+@instrument(rows='df')
+def add_timeframe_indicators(df, timeframes=tuple(TIMEFRAMES), columns=None):
+    """
+    Compute indicators on weekly/monthly bars resampled from the daily df and
+    join them onto df's daily index as-of, in place, as '{column}_{timeframe}'
+    (e.g. RSI_W). A day only sees bars completed by that day; the latest bar
+    may be a partial one covering the days so far.
+    """
+    columns = list(TIMEFRAME_INDICATORS if columns is None else columns)
+    df.sort_index(inplace=True)
+    for timeframe in timeframes:
+        bars = compute_indicators(resample_ohlcv(df, timeframe), columns)
+        joined = bars[columns].reindex(df.index, method='ffill')
+        for column in columns:
+            df[f'{column}_{timeframe}'] = joined[column]
+    return df
+
+def plot_indicator_columns(plots=None):
+    """Indicator columns needed to draw the given plots (default: all)"""
+    columns = []
+    for plot in plots or PLOT_INDICATORS:
+        columns.extend(column for column in PLOT_INDICATORS[plot] if column not in columns)
+    return columns
+
+@instrument(rows='df')
+def plot_technical_analysis(df, symbol, output_dir='outputs/technical_analysis', plots=None):
     """
-    Create visualizations for technical analysis
+    Create visualizations for technical analysis.
+    plots selects a subset of PLOT_INDICATORS; missing columns are computed.
     """
     import os
     os.makedirs(output_dir, exist_ok=True)
+    plots = list(plots or PLOT_INDICATORS)
+    compute_indicators(df, plot_indicator_columns(plots), overwrite=False)
     
     # 1. Price and Moving Averages
-    plt.figure(figsize=(15, 7))
-    plt.plot(df.index, df['Close'], label='Close Price', alpha=0.8)
-    plt.plot(df.index, df['SMA_20'], label='20-day SMA', alpha=0.7)
-    plt.plot(df.index, df['SMA_50'], label='50-day SMA', alpha=0.7)
-    plt.title(f'{symbol} Price and Moving Averages')
-    plt.xlabel('Date')
-    plt.ylabel('Price')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/{symbol}_moving_averages.png')
-    plt.close()
-    
+    if 'moving_averages' in plots:
+        plt.figure(figsize=(15, 7))
+        plt.plot(df.index, df['Close'], label='Close Price', alpha=0.8)
+        plt.plot(df.index, df['SMA_20'], label='20-day SMA', alpha=0.7)
+        plt.plot(df.index, df['SMA_50'], label='50-day SMA', alpha=0.7)
+        plt.title(f'{symbol} Price and Moving Averages')
+        plt.xlabel('Date')
+        plt.ylabel('Price')
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(f'{output_dir}/{symbol}_moving_averages.png')
+        plt.close()
+        
     # 2. RSI
-    plt.figure(figsize=(15, 5))
-    plt.plot(df.index, df['RSI'], label='RSI', color='purple')
-    plt.axhline(y=70, color='r', linestyle='--', alpha=0.5)
-    plt.axhline(y=30, color='g', linestyle='--', alpha=0.5)
-    plt.title(f'{symbol} RSI')
-    plt.xlabel('Date')
-    plt.ylabel('RSI')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/{symbol}_rsi.png')
-    plt.close()
-    
+    if 'rsi' in plots:
+        plt.figure(figsize=(15, 5))
+        plt.plot(df.index, df['RSI'], label='RSI', color='purple')
+        plt.axhline(y=70, color='r', linestyle='--', alpha=0.5)
+        plt.axhline(y=30, color='g', linestyle='--', alpha=0.5)
+        plt.title(f'{symbol} RSI')
+        plt.xlabel('Date')
+        plt.ylabel('RSI')
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(f'{output_dir}/{symbol}_rsi.png')
+        plt.close()
+        
     # 3. MACD
-    plt.figure(figsize=(15, 5))
-    plt.plot(df.index, df['MACD'], label='MACD', color='blue')
-    plt.plot(df.index, df['MACD_Signal'], label='Signal Line', color='orange')
-    plt.bar(df.index, df['MACD_Hist'], label='MACD Histogram', alpha=0.3)
-    plt.title(f'{symbol} MACD')
-    plt.xlabel('Date')
-    plt.ylabel('MACD')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/{symbol}_macd.png')
-    plt.close()
-    
+    if 'macd' in plots:
+        plt.figure(figsize=(15, 5))
+        plt.plot(df.index, df['MACD'], label='MACD', color='blue')
+        plt.plot(df.index, df['MACD_Signal'], label='Signal Line', color='orange')
+        plt.bar(df.index, df['MACD_Hist'], label='MACD Histogram', alpha=0.3)
+        plt.title(f'{symbol} MACD')
+        plt.xlabel('Date')
+        plt.ylabel('MACD')
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(f'{output_dir}/{symbol}_macd.png')
+        plt.close()
+        
     # 4. Bollinger Bands
-    plt.figure(figsize=(15, 7))
-    plt.plot(df.index, df['Close'], label='Close Price', alpha=0.8)
-    plt.plot(df.index, df['BB_Upper'], label='Upper BB', alpha=0.7)
-    plt.plot(df.index, df['BB_Middle'], label='Middle BB', alpha=0.7)
-    plt.plot(df.index, df['BB_Lower'], label='Lower BB', alpha=0.7)
-    plt.fill_between(df.index, df['BB_Upper'], df['BB_Lower'], alpha=0.1)
-    plt.title(f'{symbol} Bollinger Bands')
-    plt.xlabel('Date')
-    plt.ylabel('Price')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(f'{output_dir}/{symbol}_bollinger_bands.png')
-    plt.close()
+    if 'bollinger_bands' in plots:
+        plt.figure(figsize=(15, 7))
+        plt.plot(df.index, df['Close'], label='Close Price', alpha=0.8)
+        plt.plot(df.index, df['BB_Upper'], label='Upper BB', alpha=0.7)
+        plt.plot(df.index, df['BB_Middle'], label='Middle BB', alpha=0.7)
+        plt.plot(df.index, df['BB_Lower'], label='Lower BB', alpha=0.7)
+        plt.fill_between(df.index, df['BB_Upper'], df['BB_Lower'], alpha=0.1)
+        plt.title(f'{symbol} Bollinger Bands')
+        plt.xlabel('Date')
+        plt.ylabel('Price')
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(f'{output_dir}/{symbol}_bollinger_bands.png')
+        plt.close()
+
+def analyze_symbol(symbol, start_date, end_date, output_dir='outputs/technical_analysis',
+                   columns=None, plots=None, timeframes=None):
+    """
+    Load, compute indicators, plot and save processed data for one symbol.
+    columns/plots restrict the work to the listed indicators and plots;
+    by default everything is computed. timeframes (e.g. ['W', 'M']) adds
+    the TIMEFRAME_INDICATORS of those timeframes from the same loaded data.
+    History before start_date is loaded to warm the indicators up and
+    dropped once they are computed.
+    """
+    # Load data, with warm-up history for the longest lookback
+    df = load_stock_data(symbol, warmup_start(start_date, timeframes or ()), end_date)
+    if df is None:
+        return None
+        
+    # Calculate technical indicators
+    if columns is None and plots is not None:
+        columns = plot_indicator_columns(plots)
+    df = calculate_technical_indicators(df, columns)
+    if timeframes:
+        add_timeframe_indicators(df, timeframes)
+    df = df[df.index >= pd.Timestamp(start_date)].copy()
+    
+    # Create visualizations
+    plot_technical_analysis(df, symbol, output_dir, plots)
+    
+    # Save processed data
+    df.to_csv(f'{output_dir}/{symbol}_processed_data.csv')
+    return df
 
 def main():
     # Define parameters
@@ -141,19 +234,9 @@ def main():
     for symbol in symbols:
         print(f"\nAnalyzing {symbol}...")
         
-        # Load data
-        df = load_stock_data(symbol, start_date, end_date)
+        df = analyze_symbol(symbol, start_date, end_date)
         if df is None:
             continue
-            
-        # Calculate technical indicators
-        df = calculate_technical_indicators(df)
-        
-        # Create visualizations
-        plot_technical_analysis(df, symbol)
-        
-        # Save processed data
-        df.to_csv(f'outputs/technical_analysis/{symbol}_processed_data.csv')
         
         # Print some basic statistics
         print(f"\nSummary Statistics for {symbol}:")
@@ -0,0 +1,302 @@
+"""
+Lightweight instrumentation for the analysis scripts.
+
+Telemetry is off by default and costs a single environment lookup per call.
+Enable it by setting PIPELINE_TELEMETRY to a file path (or calling enable(),
+which also covers worker processes started afterwards). Every instrumented
+call then appends one JSON line with wall time, CPU time, peak RSS, rows
+processed and rows/sec, tagged with the stage name and symbol. The RSS
+high-water mark is process-wide, so only the outermost measurement active in
+a process resets it (on Linux) and records peak_rss_mb, the peak during that
+stage. Measurements nested in it or running concurrently in other threads
+record null, as does every measurement where the mark cannot be reset.
+
+Stages listed in PIPELINE_PROFILE (comma separated, '*' for all) are also run
+under cProfile and their stats are written to PIPELINE_PROFILE_DIR.
+
+Usage:
+    python scripts/telemetry.py outputs/telemetry.jsonl   # summarise a run
+"""
+import cProfile
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+TELEMETRY_ENV = 'PIPELINE_TELEMETRY'
+PROFILE_ENV = 'PIPELINE_PROFILE'
+PROFILE_DIR_ENV = 'PIPELINE_PROFILE_DIR'
+DEFAULT_PROFILE_DIR = 'outputs/profiles'
+
+_current_stage = contextvars.ContextVar('telemetry_stage', default=None)
+_current_symbol = contextvars.ContextVar('telemetry_symbol', default=None)
+_profiling = contextvars.ContextVar('telemetry_profiling', default=False)
+_write_lock = threading.Lock()
+# Active measurements in this process; the first one owns the RSS high-water mark
+_rss_lock = threading.Lock()
+_rss_depth = 0
+
+
+def enable(path, profile=None, profile_dir=DEFAULT_PROFILE_DIR):
+    """
+    Turn telemetry on for this process and any process it starts.
+    profile is an optional list of stage names to run under cProfile.
+    """
+    os.environ[TELEMETRY_ENV] = path
+    if profile:
+        os.environ[PROFILE_ENV] = ','.join(profile)
+        os.environ[PROFILE_DIR_ENV] = profile_dir
+
+
+def disable():
+    """Turn telemetry and profiling off"""
+    for key in (TELEMETRY_ENV, PROFILE_ENV, PROFILE_DIR_ENV):
+        os.environ.pop(key, None)
+
+
+def is_enabled():
+    return bool(os.environ.get(TELEMETRY_ENV))
+
+
+def _status_mb(field):
+    """A memory field of /proc/self/status (e.g. VmHWM) in MB, None off Linux"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """
+    Reset the RSS high-water mark, so peak_rss_mb() reports the peak from now
+    on. Returns False where the platform cannot do this (non-Linux).
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return _status_mb('VmHWM') is not None
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size in MB since the last reset_peak_rss() on Linux,
+    otherwise over the process lifetime, if the platform reports it
+    """
+    peak = _status_mb('VmHWM')
+    if peak is not None or resource is None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def count_rows(obj):
+    """Number of rows in a DataFrame/Series/array or sized container"""
+    if obj is None:
+        return None
+    shape = getattr(obj, 'shape', None)
+    if shape:
+        return int(shape[0])
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+def _should_profile(stage):
+    names = os.environ.get(PROFILE_ENV)
+    if not names or _profiling.get():
+        return False
+    names = [name.strip() for name in names.split(',')]
+    return '*' in names or stage in names or stage.split(':')[0] in names
+
+
+def _emit(record):
+    path = os.environ.get(TELEMETRY_ENV)
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    line = json.dumps(record, default=str) + '\n'
+    with _write_lock:
+        with open(path, 'a') as f:
+            f.write(line)
+
+
+class Measurement:
+    """Mutable handle yielded by measure() so the caller can report rows"""
+
+    def __init__(self):
+        self.rows = None
+        self.fields = {}
+
+
+def _start_rss_measurement():
+    """Whether the starting measurement is the outermost one, with the mark reset for it"""
+    global _rss_depth
+    with _rss_lock:
+        _rss_depth += 1
+        return _rss_depth == 1 and reset_peak_rss()
+
+
+def _end_rss_measurement(owner):
+    """Peak RSS for the outermost measurement, None for the others"""
+    global _rss_depth
+    with _rss_lock:
+        peak = round(peak_rss_mb(), 3) if owner else None
+        _rss_depth -= 1
+    return peak
+
+
+@contextmanager
+def measure(stage, symbol=None, **fields):
+    """
+    Time the enclosed block and emit a telemetry record.
+
+    Nested measurements inherit the symbol of the enclosing one and record it
+    as their parent, so per-function records can be grouped by stage. Only
+    the outermost active measurement records peak_rss_mb.
+    """
+    measurement = Measurement()
+    measurement.fields.update(fields)
+    if not is_enabled():
+        yield measurement
+        return
+
+    symbol = symbol or _current_symbol.get()
+    parent = _current_stage.get()
+    stage_token = _current_stage.set(stage)
+    symbol_token = _current_symbol.set(symbol)
+
+    owns_rss = _start_rss_measurement()
+
+    profiler = None
+    profiling_token = None
+    if _should_profile(stage):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            profiling_token = _profiling.set(True)
+        except ValueError:
+            # Another profiler is already active in this thread
+            profiler = None
+
+    status, error = 'ok', None
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield measurement
+    except BaseException as e:
+        status, error = 'error', f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        _current_stage.reset(stage_token)
+        _current_symbol.reset(symbol_token)
+        peak = _end_rss_measurement(owns_rss)
+
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'stage': stage,
+            'parent': parent,
+            'symbol': symbol,
+            'status': status,
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_rss_mb': peak,
+            'rows': measurement.rows,
+            'rows_per_s': round(measurement.rows / wall, 1) if measurement.rows and wall > 0 else None,
+            'pid': os.getpid(),
+        }
+        if error:
+            record['error'] = error
+        if profiler is not None:
+            _profiling.reset(profiling_token)
+            profile_dir = os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR)
+            os.makedirs(profile_dir, exist_ok=True)
+            label = stage.replace(':', '_') + (f'_{symbol}' if symbol and symbol not in stage else '')
+            profile_path = os.path.join(profile_dir, f'{label}_{os.getpid()}.prof')
+            profiler.dump_stats(profile_path)
+            record['profile'] = profile_path
+        record.update(measurement.fields)
+        _emit(record)
+
+
+def instrument(stage=None, rows='result'):
+    """
+    Decorator that wraps a function in measure().
+
+    rows selects what counts as rows processed: 'result' for the return value,
+    the name of an argument (e.g. 'df'), or a callable applied to the result.
+    A 'symbol' argument, when the function has one, tags the record.
+    """
+    def decorator(func):
+        name = stage or func.__name__
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+            with measure(name, symbol=arguments.get('symbol')) as measurement:
+                if isinstance(rows, str) and rows != 'result':
+                    measurement.rows = count_rows(arguments.get(rows))
+                result = func(*args, **kwargs)
+                if rows == 'result':
+                    measurement.rows = count_rows(result)
+                elif callable(rows):
+                    measurement.rows = rows(result)
+            return result
+
+        return wrapper
+    return decorator
+
+
+def load_records(path):
+    """Read a telemetry JSON lines file into a DataFrame"""
+    import pandas as pd
+    return pd.read_json(path, lines=True)
+
+
+def summarize(path):
+    """Aggregate telemetry records per stage and symbol"""
+    df = load_records(path)
+    df['symbol'] = df['symbol'].fillna('-')
+    summary = df.groupby(['stage', 'symbol']).agg(
+        calls=('wall_s', 'size'),
+        wall_s=('wall_s', 'sum'),
+        cpu_s=('cpu_s', 'sum'),
+        peak_rss_mb=('peak_rss_mb', 'max'),
+        rows=('rows', lambda rows: rows.sum(min_count=1)),
+    )
+    summary['rows_per_s'] = (summary['rows'] / summary['wall_s']).round(1)
+    return summary.sort_values('wall_s', ascending=False)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else 'outputs/telemetry.jsonl'
+    print(summarize(path).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Hashed n-gram keyword counts for headline text.
+
+NgramCounter tokenises a chunk of headlines in one pass over a byte buffer
+with numpy (lower-cased alphanumeric runs, hashed with a vectorised polynomial
+hash), so no per-row Python token lists are built. Unigrams, bigrams and
+trigrams are hashed into a fixed number of buckets to form a sparse
+headlines x n-grams count matrix, and counts are also aggregated per
+(ticker, exchange-time day) so top-k queries per ticker and per period only sum a few
+sparse rows.
+
+Usage:
+    counter = NgramCounter(ngram_range=(1, 3))
+    for chunk in load_news_data_chunks('data/rawanalyst_data/raw_analyst_ratings.csv'):
+        counter.partial_fit(chunk)
+    counter.top_k(10, ticker='AAPL', n=2)
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from news_cube import exchange_times
+from telemetry import instrument
+
+STOP_WORDS = [
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is',
+    'it', 'its', 'of', 'on', 'or', 's', 'that', 'the', 'this', 'to', 'was', 'were', 'will', 'with',
+]
+
+_TOKEN_BYTES = np.zeros(256, dtype=bool)
+_TOKEN_BYTES[ord('a'):ord('z') + 1] = True
+_TOKEN_BYTES[ord('0'):ord('9') + 1] = True
+_TOKEN_BYTES[128:] = True  # bytes of non-ASCII UTF-8 characters
+
+_BASE = np.uint64(0x100000001B3)
+_COMBINE = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(h):
+    """splitmix64 finaliser, spreads polynomial hashes over all 64 bits"""
+    with np.errstate(over='ignore'):
+        h = h ^ (h >> np.uint64(30))
+        h = h * np.uint64(0xBF58476D1CE4E5B9)
+        h = h ^ (h >> np.uint64(27))
+        h = h * np.uint64(0x94D049BB133111EB)
+        return h ^ (h >> np.uint64(31))
+
+
+def tokenize(texts):
+    """
+    Tokenise a sequence of strings in one vectorised pass.
+
+    Returns (buffer, starts, ends, rows, hashes): the lower-cased UTF-8 byte
+    buffer of all texts joined by NUL separators, and per token its byte span,
+    the index of the text it came from and its 64-bit hash.
+    """
+    texts = pd.Series(texts, dtype=object).fillna('').astype(str)
+    joined = ('\0'.join(texts) + '\0').lower()
+    buffer = np.frombuffer(joined.encode('utf-8'), dtype=np.uint8)
+
+    is_token = _TOKEN_BYTES[buffer]
+    edges = np.diff(np.concatenate(([False], is_token, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    rows = np.searchsorted(np.flatnonzero(buffer == 0), starts)
+
+    lengths = ends - starts
+    if len(starts) == 0:
+        return buffer, starts, ends, rows, np.zeros(0, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        powers = np.concatenate(([np.uint64(1)], np.cumprod(np.full(lengths.max() - 1, _BASE, dtype=np.uint64))))
+        positions = np.flatnonzero(is_token)
+        offsets = positions - np.repeat(starts, lengths)
+        weighted = buffer[positions].astype(np.uint64) * powers[offsets]
+        hashes = np.add.reduceat(weighted, np.concatenate(([0], np.cumsum(lengths)[:-1])))
+    return buffer, starts, ends, rows, _mix(hashes + lengths.astype(np.uint64))
+
+
+def token_hash(word):
+    """Hash of a single token, as produced by tokenize()"""
+    return tokenize([word])[4][0]
+
+
+_STOP_HASHES = np.array([token_hash(word) for word in STOP_WORDS], dtype=np.uint64)
+
+
+class NgramCounter:
+    """
+    Incrementally built hashed n-gram counts over a headline feed.
+
+    The feature space is split into one block per n-gram order, so counts can
+    be filtered by order. Hash collisions within a block merge counts; with
+    the default 2**20 features they are rare for headline vocabularies.
+    """
+
+    def __init__(self, ngram_range=(1, 2), n_features=2 ** 20, stop_words=True, keep_matrix=True,
+                 text_column='headline', ticker_column='stock', date_column='date'):
+        self.orders = list(range(ngram_range[0], ngram_range[1] + 1))
+        self.block_size = n_features // len(self.orders)
+        self.n_features = self.block_size * len(self.orders)
+        self.stop_hashes = _STOP_HASHES if stop_words else np.zeros(0, dtype=np.uint64)
+        self.keep_matrix = keep_matrix
+        self.text_column = text_column
+        self.ticker_column = ticker_column
+        self.date_column = date_column
+
+        self.vocabulary = {}      # bucket -> example n-gram text
+        self._seen = np.zeros(self.n_features, dtype=bool)
+        self.n_rows = 0
+        self._row_matrices = []
+        self._tickers = {}        # ticker -> id
+        self._groups = {}         # (ticker id, day) -> group id
+        self._group_parts = []    # per-chunk (ticker, day) x features matrices
+        self._aggregate = None
+
+    def _ngram_buckets(self, buffer, starts, ends, rows, hashes):
+        """Feature column and text row for every n-gram in a tokenised chunk"""
+        columns, ngram_rows = [], []
+        is_stop = np.isin(hashes, self.stop_hashes)
+        for block, n in enumerate(self.orders):
+            count = len(hashes) - n + 1
+            if count <= 0:
+                continue
+            keep = (rows[:count] == rows[n - 1:]) & ~is_stop[:count] & ~is_stop[n - 1:]
+            combined = hashes[:count]
+            with np.errstate(over='ignore'):
+                for j in range(1, n):
+                    combined = _mix(combined * _COMBINE + hashes[j:j + count])
+            bucket = (combined % np.uint64(self.block_size)).astype(np.int64) + block * self.block_size
+            positions = np.flatnonzero(keep)
+            self._learn_vocabulary(buffer, starts, ends, positions, bucket[positions], n)
+            columns.append(bucket[positions])
+            ngram_rows.append(rows[positions])
+        if not columns:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(columns), np.concatenate(ngram_rows)
+
+    def _learn_vocabulary(self, buffer, starts, ends, positions, buckets, n):
+        """Remember the text of buckets seen for the first time"""
+        new = np.flatnonzero(~self._seen[buckets])
+        unique, first = np.unique(buckets[new], return_index=True)
+        self._seen[unique] = True
+        for bucket, index in zip(unique, new[first]):
+            token = positions[index]
+            words = [buffer[starts[token + j]:ends[token + j]].tobytes().decode('utf-8', 'replace')
+                     for j in range(n)]
+            self.vocabulary[int(bucket)] = ' '.join(words)
+
+    @instrument(rows='chunk')
+    def partial_fit(self, chunk):
+        """Add a DataFrame chunk with text, ticker and date columns"""
+        n_rows = len(chunk)
+        if n_rows == 0:
+            return self
+        columns, rows = self._ngram_buckets(*tokenize(chunk[self.text_column].to_numpy()))
+        counts = sparse.csr_matrix((np.ones(len(columns), dtype=np.int32), (rows, columns)),
+                                   shape=(n_rows, self.n_features))
+        counts.sum_duplicates()
+        if self.keep_matrix:
+            self._row_matrices.append(counts)
+
+        # Aggregate rows into (ticker, day) groups
+        tickers = chunk[self.ticker_column].astype(str).to_numpy()
+        ticker_codes, ticker_values = pd.factorize(tickers)
+        for value in ticker_values:
+            self._tickers.setdefault(value, len(self._tickers))
+        ticker_ids = np.array([self._tickers[value] for value in ticker_values], dtype=np.int64)[ticker_codes]
+        dates = exchange_times(chunk[self.date_column])
+        days = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+        # Undated rows share a sentinel day that no date range selects
+        days[dates.isna().to_numpy()] = -(1 << 31)
+
+        keys = ticker_ids * (1 << 32) + (days + (1 << 31))
+        unique_keys, group_codes = np.unique(keys, return_inverse=True)
+        group_ids = np.empty(len(unique_keys), dtype=np.int64)
+        for i, key in enumerate(unique_keys):
+            group_ids[i] = self._groups.setdefault((int(key >> 32), int((key & 0xFFFFFFFF) - (1 << 31))),
+                                                   len(self._groups))
+        membership = sparse.csr_matrix((np.ones(n_rows, dtype=np.int32), (group_codes, np.arange(n_rows))),
+                                       shape=(len(unique_keys), n_rows))
+        self._group_parts.append((group_ids, (membership @ counts).tocoo()))
+        self._aggregate = None
+        self.n_rows += n_rows
+        return self
+
+    @property
+    def matrix(self):
+        """Sparse headlines x n-gram bucket count matrix"""
+        if not self.keep_matrix:
+            raise ValueError("NgramCounter was created with keep_matrix=False")
+        if not self._row_matrices:
+            return sparse.csr_matrix((0, self.n_features), dtype=np.int32)
+        if len(self._row_matrices) > 1:
+            self._row_matrices = [sparse.vstack(self._row_matrices, format='csr')]
+        return self._row_matrices[0]
+
+    def _group_matrix(self):
+        """(ticker, day) x n-gram bucket counts, merged across chunks"""
+        if self._aggregate is None:
+            n_groups = len(self._groups)
+            if self._group_parts:
+                rows = np.concatenate([ids[part.row] for ids, part in self._group_parts])
+                cols = np.concatenate([part.col for _, part in self._group_parts])
+                data = np.concatenate([part.data for _, part in self._group_parts])
+            else:
+                rows = cols = data = np.zeros(0, dtype=np.int64)
+            self._aggregate = sparse.csr_matrix((data, (rows, cols)), shape=(n_groups, self.n_features))
+            self._aggregate.sum_duplicates()
+            self._group_parts = [(np.arange(n_groups), self._aggregate.tocoo())]
+            keys = np.array(list(self._groups), dtype=np.int64).reshape(-1, 2)
+            self._group_ticker, self._group_day = keys[:, 0], keys[:, 1]
+        return self._aggregate
+
+    def _select_groups(self, ticker=None, start=None, end=None):
+        self._group_matrix()
+        mask = np.ones(len(self._groups), dtype=bool)
+        if ticker is not None:
+            mask &= self._group_ticker == self._tickers.get(ticker, -1)
+        if start is not None:
+            mask &= self._group_day >= pd.Timestamp(start).to_datetime64().astype('datetime64[D]').astype(np.int64)
+        if end is not None:
+            mask &= self._group_day <= pd.Timestamp(end).to_datetime64().astype('datetime64[D]').astype(np.int64)
+        return mask
+
+    def _top(self, totals, k, n):
+        if n is not None:
+            block = self.orders.index(n)
+            window = np.zeros_like(totals)
+            window[block * self.block_size:(block + 1) * self.block_size] = 1
+            totals = totals * window
+        k = min(k, int(np.count_nonzero(totals)))
+        if k == 0:
+            return pd.DataFrame({'ngram': pd.Series(dtype=object), 'count': pd.Series(dtype=np.int64)})
+        top = np.argpartition(-totals, k - 1)[:k]
+        top = top[np.argsort(-totals[top], kind='stable')]
+        return pd.DataFrame({'ngram': [self.vocabulary.get(int(b), f'#{b}') for b in top],
+                             'count': totals[top].astype(np.int64)})
+
+    def top_k(self, k=10, ticker=None, start=None, end=None, n=None):
+        """Most frequent n-grams, optionally for one ticker, a date range and one order n"""
+        mask = self._select_groups(ticker, start, end)
+        totals = np.asarray(self._group_matrix()[mask].sum(axis=0)).ravel()
+        return self._top(totals, k, n)
+
+    def top_k_by(self, k=10, by='ticker', freq='M', ticker=None, start=None, end=None, n=None):
+        """
+        Top-k n-grams for every ticker (by='ticker') or every period of
+        frequency freq (by='period'), as one long DataFrame.
+        """
+        mask = self._select_groups(ticker, start, end)
+        aggregate = self._group_matrix()
+        if by == 'ticker':
+            names = {value: name for name, value in self._tickers.items()}
+            keys = pd.Series(self._group_ticker[mask]).map(names)
+        elif by == 'period':
+            days = pd.to_datetime(self._group_day[mask], unit='D')
+            keys = pd.Series(days.to_period(freq).astype(str))
+        else:
+            raise ValueError(f"by must be 'ticker' or 'period', not {by!r}")
+
+        selected = np.flatnonzero(mask)
+        frames = []
+        for key, positions in keys.groupby(keys).indices.items():
+            totals = np.asarray(aggregate[selected[positions]].sum(axis=0)).ravel()
+            frame = self._top(totals, k, n)
+            frame.insert(0, by, key)
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=[by, 'ngram', 'count'])
+        return pd.concat(frames, ignore_index=True)
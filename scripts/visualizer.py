@@ -1,6 +1,8 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
+from telemetry import instrument
 
+@instrument(rows='df')
 def plot_sentiment_vs_price(df, sentiment_col='sentiment', price_col='Close'):
     """Plot sentiment scores against stock prices."""
     fig, ax1 = plt.subplots(figsize=(12, 6))
@@ -19,6 +21,7 @@ def plot_sentiment_vs_price(df, sentiment_col='sentiment', price_col='Close'):
     fig.tight_layout()
     plt.show()
 
+@instrument(rows='df')
 def plot_correlation_heatmap(df, columns):
     """Plot a correlation heatmap for specified columns."""
     corr = df[columns].corr()
@@ -0,0 +1,395 @@
+"""
+Single entry point for the analysis pipeline.
+
+The individual scripts (run_analysis -> technical_analysis -> correlation_analysis
+-> generate_report) are modelled as stages of a dependency graph. Every stage
+is fingerprinted from its parameters, the content of its input files, the
+source of the module that implements it and of every local module that module
+imports, and the fingerprints of its upstream stages. A stage whose
+fingerprint matches the last successful run and whose outputs are still on
+disk is skipped, and stages whose dependencies are satisfied run concurrently.
+
+Usage:
+    python src/main.py --symbols AAPL TSLA --workers 4
+"""
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, 'scripts')
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import telemetry
+
+DEFAULT_SYMBOLS = ['AAPL', 'GOOG', 'MSFT', 'AMZN', 'META', 'NVDA', 'TSLA']
+REPORT_SYMBOLS = ['AAPL', 'GOOG', 'META', 'NVDA', 'TSLA']
+NEWS_FILE = 'data/rawanalyst_data/raw_analyst_ratings.csv'
+CACHE_FILE = 'outputs/.pipeline_cache.json'
+
+
+class Stage:
+    """
+    A node of the pipeline graph.
+
+    func is called as func(**params) and must be a module-level function so it
+    can be shipped to worker processes. inputs are external files whose content
+    is part of the fingerprint; outputs are the files the stage must leave
+    behind for a run to count as successful.
+    """
+
+    def __init__(self, name, func, params=None, deps=(), inputs=(), outputs=()):
+        self.name = name
+        self.func = func
+        self.params = params or {}
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def load_manifest(cache_file):
+    """Load the fingerprint manifest of previous runs"""
+    if not os.path.exists(cache_file):
+        return {'stages': {}, 'files': {}}
+    try:
+        with open(cache_file) as f:
+            manifest = json.load(f)
+        manifest.setdefault('stages', {})
+        manifest.setdefault('files', {})
+        return manifest
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable pipeline cache {cache_file}: {str(e)}")
+        return {'stages': {}, 'files': {}}
+
+
+def save_manifest(manifest, cache_file):
+    """Atomically write the fingerprint manifest"""
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    tmp_file = f'{cache_file}.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, cache_file)
+
+
+def file_digest(path, file_cache=None):
+    """
+    Content hash of a file. Digests are memoised by (size, mtime) in file_cache
+    so large unchanged inputs are not re-read on every run.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    if file_cache is not None:
+        cached = file_cache.get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    digest = sha.hexdigest()
+
+    if file_cache is not None:
+        file_cache[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+    return digest
+
+
+def local_imports(source_file, search_dirs=(SCRIPTS_DIR, ROOT_DIR)):
+    """
+    source_file plus the source files of the local modules it imports,
+    transitively. Imports are resolved against the importing file's directory
+    and search_dirs; third-party and standard library modules are ignored.
+    """
+    found = []
+    pending = [os.path.abspath(source_file)]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.append(path)
+        try:
+            with open(path) as f:
+                tree = ast.parse(f.read(), path)
+        except (OSError, SyntaxError):
+            continue
+        names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.append(node.module)
+        for name in names:
+            for directory in (os.path.dirname(path),) + tuple(search_dirs):
+                base = os.path.join(directory, *name.split('.'))
+                candidate = next((c for c in (base + '.py', os.path.join(base, '__init__.py')) if os.path.exists(c)),
+                                 None)
+                if candidate:
+                    pending.append(os.path.abspath(candidate))
+                    break
+    return found
+
+
+def stage_fingerprint(stage, upstream_fingerprints, file_cache=None):
+    """Fingerprint a stage from its code, parameters, inputs and upstream stages"""
+    source_file = inspect.getsourcefile(inspect.unwrap(stage.func))
+    code = None
+    if source_file:
+        # Editing any local module the stage imports (e.g. indicators.py) invalidates it
+        code = {os.path.relpath(path, ROOT_DIR): file_digest(path, file_cache)
+                for path in sorted(local_imports(source_file))}
+    payload = {
+        'name': stage.name,
+        'func': f'{stage.func.__module__}.{stage.func.__qualname__}',
+        'code': code,
+        'params': stage.params,
+        'inputs': {path: file_digest(path, file_cache) for path in stage.inputs},
+        'deps': {dep: upstream_fingerprints[dep] for dep in stage.deps},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def topological_order(stages):
+    """Return stage names in dependency order, rejecting unknown deps and cycles"""
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Duplicate stage names in pipeline")
+
+    order = []
+    state = {}  # name -> 'visiting' | 'done'
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        if name not in by_name:
+            raise ValueError(f"Unknown dependency {name!r} of {path[-1]!r}")
+        state[name] = 'visiting'
+        for dep in by_name[name].deps:
+            visit(dep, path + [name])
+        state[name] = 'done'
+        order.append(name)
+
+    for stage in stages:
+        visit(stage.name, [])
+    return order
+
+
+def _call_stage(name, func, params):
+    with telemetry.measure(name, symbol=params.get('symbol')):
+        func(**params)
+
+
+def run_pipeline(stages, workers=1, force=False, cache_file=CACHE_FILE, dry_run=False):
+    """
+    Run the stage graph, skipping stages whose fingerprint is unchanged.
+
+    Returns a dict mapping stage name to one of 'ran', 'cached', 'failed',
+    'blocked' (an upstream stage failed) or 'pending' (dry run).
+    """
+    by_name = {stage.name: stage for stage in stages}
+    order = topological_order(stages)
+    manifest = load_manifest(cache_file)
+    file_cache = manifest['files']
+
+    status = {}
+    fingerprints = {}
+    waiting = list(order)
+    running = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and not dry_run else None
+
+    def finish(name, error=None):
+        stage = by_name[name]
+        missing = [path for path in stage.outputs if not os.path.exists(path)]
+        if error is None and missing:
+            error = f"missing outputs: {', '.join(missing)}"
+        if error is None:
+            status[name] = 'ran'
+            manifest['stages'][name] = {
+                'fingerprint': fingerprints[name],
+                'outputs': stage.outputs,
+                'completed_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            print(f"[done]    {name}")
+        else:
+            status[name] = 'failed'
+            manifest['stages'].pop(name, None)
+            print(f"[failed]  {name}: {error}")
+        save_manifest(manifest, cache_file)
+
+    try:
+        while waiting or running:
+            for name in list(waiting):
+                stage = by_name[name]
+                if any(status.get(dep) in ('failed', 'blocked') for dep in stage.deps):
+                    status[name] = 'blocked'
+                    waiting.remove(name)
+                    print(f"[blocked] {name}")
+                    continue
+                if not all(status.get(dep) in ('ran', 'cached', 'pending') for dep in stage.deps):
+                    continue
+
+                waiting.remove(name)
+                fingerprints[name] = stage_fingerprint(stage, fingerprints, file_cache)
+                previous = manifest['stages'].get(name, {})
+                outputs_present = all(os.path.exists(path) for path in stage.outputs)
+                if not force and previous.get('fingerprint') == fingerprints[name] and outputs_present:
+                    status[name] = 'cached'
+                    print(f"[cached]  {name}")
+                    continue
+                if dry_run:
+                    status[name] = 'pending'
+                    print(f"[pending] {name}")
+                    continue
+
+                print(f"[running] {name}")
+                if executor is None:
+                    try:
+                        _call_stage(name, stage.func, stage.params)
+                        finish(name)
+                    except Exception as e:
+                        traceback.print_exc()
+                        finish(name, str(e))
+                else:
+                    running[executor.submit(_call_stage, name, stage.func, stage.params)] = name
+
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    finish(name, None if error is None else str(error))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if not dry_run:
+            save_manifest(manifest, cache_file)
+
+    return status
+
+
+def build_stages(symbols, start_date, end_date, news_file=NEWS_FILE, timeframes=None):
+    """Describe the analysis scripts as pipeline stages"""
+    import technical_analysis
+    import correlation_analysis
+    import generate_report
+
+    stages = []
+
+    if os.path.exists(news_file):
+        import run_analysis
+        from price_downloader import cache_path, cached_symbols
+        # The news/price correlation reads every cached price history
+        stages.append(Stage(
+            'news_analysis',
+            run_analysis.main,
+            params={'news_file': news_file},
+            inputs=[news_file] + [cache_path(symbol) for symbol in cached_symbols()],
+            outputs=['outputs/processed_news_data.csv', 'outputs/news_cube.npz'],
+        ))
+
+    for symbol in symbols:
+        technical_dir = 'outputs/technical_analysis'
+        correlation_dir = f'outputs/correlation_analysis/{symbol}'
+        params = {'symbol': symbol, 'start_date': start_date, 'end_date': end_date}
+        if timeframes:
+            params['timeframes'] = list(timeframes)
+        stages.append(Stage(
+            f'technical_analysis:{symbol}',
+            technical_analysis.analyze_symbol,
+            params=params,
+            inputs=[f'data/yfinance_data/{symbol}_historical_data.csv'],
+            outputs=[f'{technical_dir}/{symbol}_processed_data.csv'] + [
+                f'{technical_dir}/{symbol}_{plot}.png'
+                for plot in ('moving_averages', 'rsi', 'macd', 'bollinger_bands')
+            ],
+        ))
+        stages.append(Stage(
+            f'correlation_analysis:{symbol}',
+            correlation_analysis.analyze_symbol,
+            params={'symbol': symbol},
+            deps=[f'technical_analysis:{symbol}'],
+            outputs=[f'{correlation_dir}/correlations.csv'] + [
+                f'{correlation_dir}/{plot}.png'
+                for plot in ('correlation_heatmap', 'rsi_returns_scatter', 'macd_hist_returns_scatter')
+            ],
+        ))
+
+    # The report reads a fixed set of symbols, so it is only part of the graph
+    # when all of them are being processed. It draws its figures in memory
+    # from the processed data and caches unchanged sections itself, so the
+    # plotting module is covered by its own section keys
+    if all(symbol in symbols for symbol in REPORT_SYMBOLS):
+        stages.append(Stage(
+            'report',
+            generate_report.create_report,
+            deps=[f'technical_analysis:{symbol}' for symbol in symbols],
+            outputs=['reports/Week1_Technical_Analysis_Report.docx', 'reports/metrics.csv'],
+        ))
+
+    return stages
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the stock/news analysis pipeline")
+    parser.add_argument('--symbols', nargs='+', default=DEFAULT_SYMBOLS, help="Symbols to analyse")
+    parser.add_argument('--end-date', default=None, help="Last date to analyse (YYYY-MM-DD, default today)")
+    parser.add_argument('--days', type=int, default=365, help="Length of the analysis window in days")
+    parser.add_argument('--news-file', default=NEWS_FILE, help="Raw analyst ratings CSV")
+    parser.add_argument('--timeframes', nargs='+', choices=['W', 'M'], default=None,
+                        help="Also add weekly (W) / monthly (M) RSI, MACD and Bollinger columns")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Concurrent stages")
+    parser.add_argument('--cache-file', default=CACHE_FILE, help="Fingerprint manifest location")
+    parser.add_argument('--force', action='store_true', help="Re-run every stage")
+    parser.add_argument('--dry-run', action='store_true', help="Only report which stages would run")
+    parser.add_argument('--telemetry', metavar='PATH', default=None,
+                        help="Append per-stage timing/memory records as JSON lines to PATH")
+    parser.add_argument('--profile', nargs='+', metavar='STAGE', default=None,
+                        help="Run these stages (e.g. technical_analysis, or '*') under cProfile "
+                             "(requires --telemetry)")
+    parser.add_argument('--profile-dir', default=telemetry.DEFAULT_PROFILE_DIR, help="Where cProfile stats go")
+    args = parser.parse_args(argv)
+    if args.profile and not args.telemetry:
+        parser.error("--profile requires --telemetry PATH")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The scripts use paths relative to the repository root
+    os.chdir(ROOT_DIR)
+    if args.telemetry:
+        telemetry.enable(args.telemetry, profile=args.profile, profile_dir=args.profile_dir)
+
+    end_date = datetime.strptime(args.end_date, '%Y-%m-%d') if args.end_date else datetime.now()
+    # Day granularity keeps fingerprints stable across runs on the same day
+    end_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    start_date = end_date - timedelta(days=args.days)
+
+    stages = build_stages(args.symbols, start_date, end_date, args.news_file, args.timeframes)
+    status = run_pipeline(stages, workers=args.workers, force=args.force,
+                          cache_file=args.cache_file, dry_run=args.dry_run)
+
+    counts = {}
+    for result in status.values():
+        counts[result] = counts.get(result, 0) + 1
+    print("\nPipeline summary: " + ", ".join(f"{n} {result}" for result, n in sorted(counts.items())))
+    return 1 if any(result in ('failed', 'blocked') for result in status.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
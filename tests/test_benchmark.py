@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import benchmark
+
+
+def test_smoke_run_records(tmp_path):
+    results = tmp_path / 'results.jsonl'
+    records = benchmark.run_benchmarks('smoke', cases=['indicators', 'correlation'], repeat=1,
+                                       data_dir=str(tmp_path / 'data'), results_file=str(results))
+
+    assert [record['case'] for record in records] == ['indicators', 'correlation']
+    with open(results) as f:
+        written = [json.loads(line) for line in f]
+    assert written == records
+    for record in records:
+        assert record['status'] == 'ok' and record['scale'] == 'smoke'
+        assert record['params'] == {'bars': 10_000} and record['rows'] == 10_000
+        assert record['wall_s'] > 0 and record['rows_per_s'] > 0
+        assert {'run_id', 'commit', 'python', 'pandas', 'numpy', 'cpu_s', 'peak_rss_mb'} <= set(record)
+
+    # A second run is compared against the first
+    benchmark.run_benchmarks('smoke', cases=['indicators'], repeat=1, data_dir=str(tmp_path / 'data'),
+                             results_file=str(results))
+    comparison = benchmark.compare_runs(str(results))
+    assert list(comparison.index.get_level_values('case')) == ['indicators']
+
+
+def test_sentiment_rows_overrides_cap(tmp_path):
+    records = benchmark.run_benchmarks('smoke', cases=['sentiment'], repeat=1, data_dir=str(tmp_path / 'data'),
+                                       results_file=str(tmp_path / 'results.jsonl'), sentiment_rows=2_000)
+    assert [record['rows'] for record in records] == [2_000]
+
+
+def write_run(path, run_id, walls, scale='smoke'):
+    with open(path, 'a') as f:
+        for case, wall in walls.items():
+            f.write(json.dumps({'run_id': run_id, 'scale': scale, 'case': case, 'params': {'bars': 10},
+                                'wall_s': wall, 'status': 'ok'}) + '\n')
+
+
+def test_compare_flags_regressions(tmp_path):
+    results = tmp_path / 'results.jsonl'
+    write_run(results, '2024-01-01T00:00:00', {'indicators': 1.0, 'plots': 2.0, 'sentiment': 1.0})
+    write_run(results, '2024-01-02T00:00:00', {'indicators': 9.0}, scale='large')
+    write_run(results, '2024-01-03T00:00:00', {'indicators': 1.1, 'plots': 3.0, 'sentiment': 0.5})
+
+    comparison = benchmark.compare_runs(str(results)).reset_index().set_index('case')
+
+    assert comparison.loc['plots', 'ratio'] == pytest.approx(1.5)
+    assert comparison['regression'].to_dict() == {'indicators': False, 'plots': True, 'sentiment': False}
+    assert not benchmark.compare_runs(str(results), threshold=2.0)['regression'].any()
+
+    single = tmp_path / 'single.jsonl'
+    write_run(single, '2024-01-01T00:00:00', {'indicators': 1.0})
+    with pytest.raises(ValueError):
+        benchmark.compare_runs(str(single))
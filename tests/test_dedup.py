@@ -0,0 +1,70 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+import synthetic_data
+from dedup import compute_signatures, deduplicate_headlines, lsh_clusters, minhash_signatures, shingles
+
+
+def test_signature_agreement_estimates_jaccard():
+    texts = ['Goldman Sachs Upgrades AAPL to Buy, Raises Price Target to $150',
+             'Goldman Sachs Upgrades AAPL to Buy, Raises Price Target to $150 - Report']
+    signatures = minhash_signatures(texts, num_perm=256)
+    rows, hashes = shingles(texts)
+    first, second = set(hashes[rows == 0]), set(hashes[rows == 1])
+    jaccard = len(first & second) / len(first | second)
+    assert abs((signatures[0] == signatures[1]).mean() - jaccard) < 0.1
+
+
+def test_chunked_signatures_match():
+    texts = synthetic_data.generate_headlines(3_000)['headline'].to_numpy()
+    np.testing.assert_array_equal(compute_signatures(texts, chunksize=700, workers=2), minhash_signatures(texts))
+
+
+def test_clusters_per_ticker_and_day():
+    df = pd.DataFrame({
+        'headline': ['Morgan Stanley Downgrades TSLA to Underweight',
+                     'Morgan Stanley Downgrades TSLA to Underweight -- Benzinga',
+                     'Morgan Stanley downgrades TSLA to Underweight.',
+                     'Tesla Shares Are Trading Higher After Company Reported Strong Quarterly Results',
+                     'Morgan Stanley Downgrades TSLA to Underweight',
+                     'Morgan Stanley Downgrades TSLA to Underweight',
+                     ''],
+        'stock': ['TSLA', 'TSLA', 'TSLA', 'TSLA', 'AAPL', 'TSLA', 'TSLA'],
+        'date': pd.to_datetime(['2020-06-05 09:00', '2020-06-05 09:30', '2020-06-05 11:00', '2020-06-05 12:00',
+                                '2020-06-05 09:00', '2020-06-08 09:00', '2020-06-05 09:00']),
+    })
+    unique = deduplicate_headlines(df)
+    assert unique.index.tolist() == [0, 3, 4, 5, 6]
+    assert unique['cluster_size'].tolist() == [3, 1, 1, 1, 1]
+
+
+def test_duplicates_behind_unrelated_bucket_leader_are_linked():
+    # All three rows share the first band; row 0 is unrelated to the others,
+    # which only agree with each other outside that band on 3 of 4 values
+    signatures = np.array([[1, 2, 3, 4, 10, 11, 12, 13],
+                           [1, 2, 3, 4, 20, 21, 22, 23],
+                           [1, 2, 3, 4, 20, 21, 22, 99]], dtype=np.uint32)
+    clusters = lsh_clusters(signatures, np.zeros(3), bands=2, threshold=0.6)
+    assert clusters.tolist() == [0, 1, 1]
+
+
+def test_headlines_without_tokens_are_kept():
+    df = pd.DataFrame({'headline': ['', '!!!'], 'stock': ['TSLA', 'TSLA'],
+                       'date': pd.to_datetime(['2020-06-05 09:00', '2020-06-05 09:30'])})
+    unique = deduplicate_headlines(df)
+    assert unique.index.tolist() == [0, 1]
+    assert unique['cluster_size'].tolist() == [1, 1]
+
+
+def test_republished_synthetic_stories_are_collapsed():
+    df = synthetic_data.generate_headlines(20_000, n_symbols=20, duplicate_rate=0.1)
+    unique = deduplicate_headlines(df)
+    assert unique['cluster_size'].sum() == len(df)
+    # Republished copies (original text plus a rewording suffix) join their story
+    suffixes = '|'.join(re.escape(suffix) for suffix in synthetic_data.REWORDINGS)
+    story = unique['headline'].str.replace(f'(?:{suffixes})$', '', regex=True)
+    keys = pd.DataFrame({'stock': unique['stock'], 'day': unique['date'].dt.normalize(), 'story': story})
+    assert keys.duplicated().mean() < 0.005
+    assert len(unique) < len(df) * 0.92
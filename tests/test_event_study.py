@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic_data
+from event_study import align_events, event_study, returns_panel, sentiment_bucket
+
+
+def panel(n_days=400, n_symbols=6):
+    symbols = synthetic_data.symbol_names(n_symbols)
+    prices = {symbol: synthetic_data.generate_ohlcv(n_days, symbol=symbol, start='2020-01-01') for symbol in symbols}
+    return returns_panel(prices)
+
+
+def test_align_events_rolls_after_close_and_weekends():
+    dates = pd.DatetimeIndex(['2020-06-04', '2020-06-05', '2020-06-08'])
+    timestamps = pd.Series(['2020-06-04 09:30:00', '2020-06-04 16:30:00', '2020-06-06 10:00:00',
+                            '2020-06-08 18:00:00', '2020-06-03 10:00:00'])
+    assert align_events(timestamps, dates).tolist() == [0, 1, 2, -1, -1]
+
+
+def test_events_on_first_price_date_are_dropped():
+    prices = {'A': synthetic_data.generate_ohlcv(30, symbol='A', start='2020-01-01'),
+              'B': synthetic_data.generate_ohlcv(30, symbol='B', start='2020-01-01')}
+    returns = returns_panel(prices)
+    first_price_date = prices['A'].index[0]
+    events = pd.DataFrame({'stock': ['A', 'A'], 'date': [first_price_date, returns.index[5]]})
+    result = event_study(events, returns, window=(0, 0))
+    # No return exists for the first price date, so its event is not moved to the next day
+    assert result.events['event_date'].tolist() == [returns.index[5]]
+
+
+def test_abnormal_returns_match_manual_calculation():
+    returns = panel()
+    events = pd.DataFrame({'stock': [returns.columns[1], returns.columns[1], returns.columns[4], 'MISSING'],
+                           'date': [returns.index[100], returns.index[100] + pd.Timedelta(hours=17),
+                                    returns.index[200], returns.index[150]],
+                           'publisher': ['a', 'b', 'a', 'a']})
+    result = event_study(events, returns, benchmark='peer', window=(-2, 2))
+    assert len(result.events) == 3
+
+    # Second event is after the close and lands on the next trading day
+    assert result.events['event_date'].tolist() == [returns.index[100], returns.index[101], returns.index[200]]
+    position, ticker = 101, returns.columns[1]
+    peers = returns.drop(columns=ticker).mean(axis=1)
+    expected = returns[ticker].iloc[position - 2:position + 3].to_numpy() - peers.iloc[position - 2:position + 3].to_numpy()
+    assert np.allclose(result.abnormal.iloc[1], expected)
+    assert result.events['CAR[-1,+1]'].iloc[1] == pytest.approx(expected[1:4].sum())
+
+    market = event_study(events, returns, window=(0, 0))
+    ticker = returns.columns[4]
+    assert market.abnormal.iloc[2, 0] == pytest.approx(returns[ticker].iloc[200] - returns.iloc[200].mean())
+    assert list(market.summary('publisher').index) == ['a', 'b']
+
+
+def test_market_model_removes_beta_exposure():
+    returns = panel()
+    market = returns.mean(axis=1)
+    returns['LEVERED'] = 0.001 + 2.0 * market
+    events = pd.DataFrame({'stock': 'LEVERED', 'date': returns.index[300:320]})
+    result = event_study(events, returns, benchmark=market, model='market_model', window=(-1, 1))
+    assert np.allclose(result.abnormal.to_numpy(), 0, atol=1e-12)
+
+
+def test_summary_by_sentiment_bucket():
+    returns = panel()
+    events = synthetic_data.generate_headlines(2_000, symbols=list(returns.columns), start='2020-03-01', end='2021-03-01')
+    events['sentiment_bucket'] = sentiment_bucket(np.random.default_rng(0).uniform(-1, 1, len(events))).to_numpy()
+    result = event_study(events, returns)
+    summary = result.summary('sentiment_bucket')
+    assert set(summary.index) == {'negative', 'neutral', 'positive'}
+    assert summary[('CAR[-1,+1]', 'events')].sum() == result.events['CAR[-1,+1]'].notna().sum()
+    assert result.caar('sentiment_bucket').shape == (11, 3)
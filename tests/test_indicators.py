@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import MACD, sma_indicator, ema_indicator
+from ta.volatility import BollingerBands
+from ta.volume import on_balance_volume
+
+import indicators
+import synthetic_data
+
+
+def test_matches_ta_reference():
+    df = synthetic_data.generate_ohlcv(400, seed=1)
+    result = indicators.compute_indicators(df.copy())
+
+    macd = MACD(close=df['Close'])
+    bb = BollingerBands(close=df['Close'])
+    expected = {
+        'SMA_20': sma_indicator(close=df['Close'], window=20),
+        'SMA_50': sma_indicator(close=df['Close'], window=50),
+        'EMA_20': ema_indicator(close=df['Close'], window=20),
+        'RSI': RSIIndicator(close=df['Close']).rsi(),
+        'MACD': macd.macd(),
+        'MACD_Signal': macd.macd_signal(),
+        'MACD_Hist': macd.macd_diff(),
+        'BB_Upper': bb.bollinger_hband(),
+        'BB_Middle': bb.bollinger_mavg(),
+        'BB_Lower': bb.bollinger_lband(),
+        'OBV': on_balance_volume(close=df['Close'], volume=df['Volume']),
+    }
+    assert list(result.columns) == list(df.columns) + indicators.DEFAULT_INDICATORS
+    for column, series in expected.items():
+        np.testing.assert_allclose(result[column], series, equal_nan=True, err_msg=column)
+
+
+def test_only_dependency_closure_is_computed(monkeypatch):
+    calls = []
+    for name, indicator in indicators.INDICATORS.items():
+        monkeypatch.setattr(indicator, 'func', lambda df, f=indicator.func, n=name: calls.append(n) or f(df))
+
+    df = indicators.compute_indicators(synthetic_data.generate_ohlcv(100), ['MACD_Hist'])
+
+    assert calls == ['_EMA_12', '_EMA_26', 'MACD', 'MACD_Signal', 'MACD_Hist']
+    assert 'MACD_Hist' in df.columns
+    assert not {'MACD', 'MACD_Signal', '_EMA_12', '_EMA_26'} & set(df.columns)
+
+
+def test_existing_columns_are_reused(monkeypatch):
+    df = indicators.compute_indicators(synthetic_data.generate_ohlcv(100), ['SMA_20'])
+    monkeypatch.setattr(indicators.INDICATORS['SMA_20'], 'func', lambda df: 1 / 0)
+    indicators.compute_indicators(df, ['BB_Middle'], overwrite=False)
+    pd.testing.assert_series_equal(df['BB_Middle'], df['SMA_20'], check_names=False)
+
+
+def test_register_new_indicator(monkeypatch):
+    monkeypatch.setitem(indicators.INDICATORS, 'Range', None)
+    indicators.register_indicator('Range', inputs=['High', 'Low'])(lambda df: df['High'] - df['Low'])
+    df = indicators.compute_indicators(synthetic_data.generate_ohlcv(60), ['Range'])
+    assert (df['Range'] >= 0).all()
+    assert indicators.required_inputs(['Range', 'OBV']) == ['High', 'Low', 'Close', 'Volume']
+
+
+def test_resample_ohlcv_aggregates_bars():
+    import technical_analysis
+    df = synthetic_data.generate_ohlcv(60, start='2021-03-01')
+    bars = technical_analysis.resample_ohlcv(df, 'W')
+    week = df.loc['2021-03-08':'2021-03-12']
+    bar = bars.loc['2021-03-12']
+    assert bar['Open'] == week['Open'].iloc[0] and bar['Close'] == week['Close'].iloc[-1]
+    assert bar['High'] == week['High'].max() and bar['Low'] == week['Low'].min()
+    assert bar['Volume'] == week['Volume'].sum()
+    assert bars.index[-1] == df.index[-1]
+    assert bars['Volume'].sum() == df['Volume'].sum()
+
+
+def test_timeframe_indicators_join_as_of():
+    import technical_analysis
+    df = synthetic_data.generate_ohlcv(1000, start='2018-01-01')
+    technical_analysis.add_timeframe_indicators(df, ['W', 'M'])
+    weekly = indicators.compute_indicators(technical_analysis.resample_ohlcv(df, 'W'), ['RSI'])['RSI']
+
+    # Mid-week days still carry the previous week's completed bar
+    friday, monday = weekly.index[40], df.index[df.index.get_loc(weekly.index[40]) + 1]
+    assert df.loc[friday, 'RSI_W'] == weekly.iloc[40]
+    assert df.loc[monday, 'RSI_W'] == weekly.iloc[40]
+    assert df['MACD_Hist_M'].notna().any()
+    assert {f'{column}_{tf}' for column in technical_analysis.TIMEFRAME_INDICATORS for tf in 'WM'} <= set(df.columns)
+
+
+def test_analyze_symbol_warms_up_coarse_timeframes(tmp_path, monkeypatch):
+    import technical_analysis
+    cache_dir = tmp_path / 'data' / 'yfinance_data'
+    cache_dir.mkdir(parents=True)
+    synthetic_data.generate_ohlcv(2000, symbol='SYN0000', start='2016-01-04') \
+        .to_csv(cache_dir / 'SYN0000_historical_data.csv')
+    monkeypatch.chdir(tmp_path)
+
+    # The one-year window technical_analysis.main() uses
+    end = pd.Timestamp('2023-06-30')
+    start = end - pd.Timedelta(days=365)
+    df = technical_analysis.analyze_symbol('SYN0000', start, end, output_dir=str(tmp_path / 'out'),
+                                           plots=['macd'], timeframes=['W', 'M'])
+
+    assert df.index[0] >= start and len(df) > 250
+    assert df['MACD_Signal'].notna().all()
+    for timeframe in 'WM':
+        assert df[[f'{column}_{timeframe}' for column in technical_analysis.TIMEFRAME_INDICATORS]].notna().all().all()
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+import news_cube
+import synthetic_data
+from news_cube import NewsCube, exchange_times, update_cube
+
+
+def headlines(n=4_000, seed=0):
+    df = synthetic_data.generate_headlines(n, n_symbols=10, seed=seed, start='2020-01-01', end='2020-12-31')
+    df['sentiment'] = np.random.default_rng(seed).uniform(-1, 1, n)
+    return df
+
+
+def test_queries_match_raw_rows():
+    df = headlines()
+    cube = NewsCube().update(df)
+    dates = df['date']
+
+    assert cube.hourly_distribution().tolist() == dates.dt.hour.value_counts().reindex(range(24), fill_value=0).tolist()
+    ticker_rows = df[df['stock'] == 'SYN0003']
+    daily = cube.daily_counts(ticker='SYN0003', start='2020-03-01', end='2020-05-31')
+    expected = ticker_rows[(ticker_rows['date'] >= '2020-03-01') & (ticker_rows['date'] < '2020-06-01')]['date'].dt.normalize().value_counts()
+    pd.testing.assert_series_equal(daily, expected.sort_index().rename_axis('date').rename('articles'), check_freq=False)
+    weekdays = cube.weekday_distribution(publisher=df['publisher'].iloc[0])
+    assert weekdays.sum() == (df['publisher'] == df['publisher'].iloc[0]).sum()
+    sentiment = cube.daily_sentiment('SYN0003')
+    expected = ticker_rows.groupby(ticker_rows['date'].dt.normalize())['sentiment'].mean()
+    assert np.allclose(sentiment['avg_sentiment'], expected)
+
+
+def test_update_cube_only_reads_new_rows(tmp_path):
+    df = headlines()
+    news_file, cube_file = tmp_path / 'news.csv', tmp_path / 'cube.npz'
+    df.iloc[:2_500].to_csv(news_file, index=False)
+    update_cube(str(cube_file), str(news_file))
+    df.iloc[2_500:].to_csv(news_file, mode='a', header=False, index=False)
+
+    cube = update_cube(str(cube_file), str(news_file))
+    full = NewsCube().update(df)
+    assert cube.source_rows == len(df)
+    assert cube.ticker_activity().to_dict() == full.ticker_activity().to_dict()
+    assert NewsCube.load(str(cube_file)).hourly_distribution().tolist() == full.hourly_distribution().tolist()
+    # Nothing new: the cube is returned without parsing the CSV
+    assert update_cube(str(cube_file), str(news_file)).source_rows == len(df)
+
+
+def test_chunked_updates_match_single_update():
+    df = headlines()
+    cube = NewsCube()
+    for start in range(0, len(df), 700):
+        cube.update(df.iloc[start:start + 700])
+    full = NewsCube().update(df)
+    for name, values in full.cells.items():
+        np.testing.assert_allclose(cube.cells[name], values)
+
+
+def test_update_cube_rebuilds_rewritten_file(tmp_path):
+    df = headlines()
+    news_file, cube_file = tmp_path / 'news.csv', tmp_path / 'cube.npz'
+    df.iloc[:2_500].to_csv(news_file, index=False)
+    update_cube(str(cube_file), str(news_file))
+    # Larger than before, but the absorbed bytes changed
+    rewritten = df.iloc[1_000:].assign(stock='SYN0009')
+    rewritten.to_csv(news_file, index=False)
+
+    cube = update_cube(str(cube_file), str(news_file))
+    assert cube.source_rows == len(rewritten)
+    assert cube.ticker_activity().to_dict() == NewsCube().update(rewritten).ticker_activity().to_dict()
+
+
+def test_offsets_converted_to_exchange_time():
+    times = exchange_times(['2020-06-05 10:30:54-04:00', '2020-06-05 14:30:54+00:00', '2020-06-05 10:30:54'])
+    assert times.tolist() == [pd.Timestamp('2020-06-05 10:30:54')] * 3
+
+
+def test_activity_spikes_flags_bursts():
+    df = headlines()
+    burst = df[df['stock'] == 'SYN0005'].head(1).loc[lambda d: d.index.repeat(40)]
+    burst['date'] = pd.Timestamp('2020-07-15 12:00')
+    cube = NewsCube().update(pd.concat([df, burst]))
+    spikes = cube.activity_spikes(window=30, threshold=3)
+    assert ((spikes['ticker'] == 'SYN0005') & (spikes['date'] == '2020-07-15')).any()
+
+
+def test_activity_spikes_need_history():
+    df = headlines()
+    row = df[df['stock'] == 'SYN0005'].head(1)
+    first = row.loc[row.index.repeat(20)].assign(stock='NEW', date=pd.Timestamp('2020-07-15 12:00'))
+    # a burst after a quiet gap longer than the window
+    later = first.assign(date=pd.Timestamp('2020-10-01 12:00'))
+    cube = NewsCube().update(pd.concat([df, first, later]))
+    spikes = cube.activity_spikes(window=30, threshold=3)
+    assert not (spikes['ticker'] == 'NEW').any()
+
+
+def test_update_cube_reuses_given_scores(tmp_path, monkeypatch):
+    df = headlines()
+    news_file, cube_file = tmp_path / 'news.csv', tmp_path / 'cube.npz'
+    df.drop(columns='sentiment').iloc[:2_500].to_csv(news_file, index=False)
+    update_cube(str(cube_file), str(news_file), scores=df['sentiment'])
+    df.drop(columns='sentiment').iloc[2_500:].to_csv(news_file, mode='a', header=False, index=False)
+
+    def score_again(chunk):
+        raise AssertionError("rows were scored twice")
+    monkeypatch.setattr(news_cube, 'apply_sentiment_analysis', score_again)
+    cube = update_cube(str(cube_file), str(news_file), scores=df['sentiment'])
+    expected = NewsCube().update(df).daily_sentiment('SYN0003')
+    pd.testing.assert_frame_equal(cube.daily_sentiment('SYN0003'), expected)
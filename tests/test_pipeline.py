@@ -0,0 +1,108 @@
+from src.main import Stage, run_pipeline
+
+
+def copy_upper(source, target):
+    with open(source) as f:
+        text = f.read()
+    with open(target, 'w') as f:
+        f.write(text.upper())
+
+
+def always_fails():
+    raise RuntimeError("boom")
+
+
+def make_stages(tmp_path):
+    source = tmp_path / 'source.txt'
+    middle = tmp_path / 'middle.txt'
+    final = tmp_path / 'final.txt'
+    return [
+        Stage('first', copy_upper, params={'source': str(source), 'target': str(middle)},
+              inputs=[str(source)], outputs=[str(middle)]),
+        Stage('second', copy_upper, params={'source': str(middle), 'target': str(final)},
+              deps=['first'], outputs=[str(final)]),
+    ]
+
+
+def test_unchanged_stages_are_cached(tmp_path):
+    (tmp_path / 'source.txt').write_text('abc')
+    cache_file = str(tmp_path / 'cache.json')
+
+    assert run_pipeline(make_stages(tmp_path), cache_file=cache_file) == {'first': 'ran', 'second': 'ran'}
+    assert run_pipeline(make_stages(tmp_path), cache_file=cache_file) == {'first': 'cached', 'second': 'cached'}
+
+    (tmp_path / 'source.txt').write_text('abcd')
+    assert run_pipeline(make_stages(tmp_path), cache_file=cache_file) == {'first': 'ran', 'second': 'ran'}
+    assert (tmp_path / 'final.txt').read_text() == 'ABCD'
+
+
+def test_missing_output_triggers_rerun(tmp_path):
+    (tmp_path / 'source.txt').write_text('abc')
+    cache_file = str(tmp_path / 'cache.json')
+    run_pipeline(make_stages(tmp_path), cache_file=cache_file)
+
+    (tmp_path / 'final.txt').unlink()
+    assert run_pipeline(make_stages(tmp_path), cache_file=cache_file) == {'first': 'cached', 'second': 'ran'}
+
+
+def test_stages_run_in_worker_processes(tmp_path):
+    (tmp_path / 'source.txt').write_text('abc')
+    stages = make_stages(tmp_path) + [
+        Stage('broken', always_fails),
+        Stage('downstream', copy_upper, deps=['broken']),
+    ]
+    status = run_pipeline(stages, workers=2, cache_file=str(tmp_path / 'cache.json'))
+    assert status == {'first': 'ran', 'second': 'ran', 'broken': 'failed', 'downstream': 'blocked'}
+    assert (tmp_path / 'final.txt').read_text() == 'ABC'
+    assert run_pipeline(make_stages(tmp_path), workers=2,
+                        cache_file=str(tmp_path / 'cache.json')) == {'first': 'cached', 'second': 'cached'}
+
+
+def test_failure_blocks_dependents(tmp_path):
+    stages = [
+        Stage('broken', always_fails),
+        Stage('downstream', copy_upper, deps=['broken']),
+    ]
+    status = run_pipeline(stages, cache_file=str(tmp_path / 'cache.json'))
+    assert status == {'broken': 'failed', 'downstream': 'blocked'}
+
+
+def test_editing_an_imported_module_reruns_stage(tmp_path, monkeypatch):
+    (tmp_path / 'helper_mod.py').write_text("SUFFIX = '!'\n")
+    (tmp_path / 'stage_mod.py').write_text(
+        "from helper_mod import SUFFIX\n\n"
+        "def write(target):\n"
+        "    with open(target, 'w') as f:\n"
+        "        f.write('done' + SUFFIX)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import stage_mod
+    target = str(tmp_path / 'out.txt')
+    cache_file = str(tmp_path / 'cache.json')
+
+    def stages():
+        return [Stage('write', stage_mod.write, params={'target': target}, outputs=[target])]
+
+    assert run_pipeline(stages(), cache_file=cache_file) == {'write': 'ran'}
+    assert run_pipeline(stages(), cache_file=cache_file) == {'write': 'cached'}
+    (tmp_path / 'helper_mod.py').write_text("SUFFIX = '??'\n")
+    assert run_pipeline(stages(), cache_file=cache_file) == {'write': 'ran'}
+
+
+def test_news_stage_fingerprint_covers_cached_prices(tmp_path, monkeypatch):
+    import synthetic_data
+    from src.main import build_stages, stage_fingerprint
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'news.csv').write_text('headline,url,publisher,date,stock\n')
+    prices = tmp_path / 'data' / 'yfinance_data'
+    prices.mkdir(parents=True)
+    synthetic_data.generate_ohlcv(30, symbol='AAA').to_csv(prices / 'AAA_historical_data.csv')
+
+    def fingerprint():
+        stage, = [stage for stage in build_stages([], None, None, news_file='news.csv')
+                  if stage.name == 'news_analysis']
+        return stage_fingerprint(stage, {})
+
+    before = fingerprint()
+    synthetic_data.generate_ohlcv(31, symbol='AAA').to_csv(prices / 'AAA_historical_data.csv')
+    assert fingerprint() != before
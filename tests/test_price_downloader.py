@@ -0,0 +1,164 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+import price_downloader
+import synthetic_data
+
+
+class ChartHandler(BaseHTTPRequestHandler):
+    """Stand-in for the chart API serving synthetic bars"""
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        symbol = url.path.rsplit('/', 1)[-1]
+        query = {key: int(values[0]) for key, values in parse_qs(url.query).items() if key.startswith('period')}
+        server.requests.append((symbol, query))
+
+        if server.failures.get(symbol, 0) > 0:
+            server.failures[symbol] -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        bars = server.bars[symbol]
+        start = pd.Timestamp(query['period1'], unit='s')
+        end = pd.Timestamp(query['period2'], unit='s')
+        bars = bars[(bars.index >= start) & (bars.index < end)]
+        # Bars are stamped at the 09:30 New York open, like the real API
+        timestamps = ((bars.index + pd.Timedelta(hours=13, minutes=30)).asi8 // 10 ** 9).tolist()
+        splits = {str(timestamp): {'numerator': ratio, 'denominator': 1}
+                  for timestamp, ratio in zip(timestamps, bars['Stock Splits'].tolist()) if ratio}
+        payload = {'chart': {'error': None, 'result': [{
+            'meta': {'exchangeTimezoneName': 'America/New_York'},
+            'timestamp': timestamps,
+            'events': {'splits': splits},
+            'indicators': {
+                'quote': [{column.lower(): bars[column].tolist() for column in ('Open', 'High', 'Low', 'Close', 'Volume')}],
+                'adjclose': [{'adjclose': bars['Adj Close'].tolist()}],
+            },
+        }]}}
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def chart_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ChartHandler)
+    server.bars = {symbol: synthetic_data.generate_ohlcv(300, symbol=symbol, start='2023-01-02')
+                   for symbol in ('AAA', 'BBB', 'CCC')}
+    server.requests = []
+    server.failures = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def download(server, cache_dir, symbols, end_date):
+    session = price_downloader.create_session(max_workers=3, backoff_factor=0)
+    return price_downloader.download_prices(symbols, start_date='2023-01-01', end_date=end_date,
+                                            cache_dir=str(cache_dir), max_workers=3, session=session,
+                                            base_url=f'http://127.0.0.1:{server.server_port}')
+
+
+def test_bulk_download_writes_cache_layout(chart_server, tmp_path):
+    end_date = chart_server.bars['AAA'].index[99]
+    result = download(chart_server, tmp_path, ['AAA', 'BBB', 'CCC'], end_date)
+
+    assert result == {'AAA': 100, 'BBB': 100, 'CCC': 100}
+    cached = pd.read_csv(tmp_path / 'AAA_historical_data.csv', index_col='Date', parse_dates=['Date'])
+    assert list(cached.columns) == price_downloader.COLUMNS
+    expected = chart_server.bars['AAA'].iloc[:100]
+    assert (cached.index == expected.index).all()
+    assert cached['Close'].to_numpy() == pytest.approx(expected['Close'].to_numpy())
+
+
+def test_refresh_only_fetches_new_bars(chart_server, tmp_path):
+    bars = chart_server.bars['AAA']
+    download(chart_server, tmp_path, ['AAA'], bars.index[99])
+    chart_server.requests.clear()
+
+    result = download(chart_server, tmp_path, ['AAA'], bars.index[149])
+
+    assert result == {'AAA': 50}
+    (symbol, query), = chart_server.requests
+    assert pd.Timestamp(query['period1'], unit='s') == bars.index[99] + pd.Timedelta(days=1)
+    cached = pd.read_csv(tmp_path / 'AAA_historical_data.csv', index_col='Date', parse_dates=['Date'])
+    assert len(cached) == 150 and cached.index.is_unique
+
+
+def test_split_in_new_bars_refetches_adjusted_history(chart_server, tmp_path):
+    bars = chart_server.bars['AAA']
+    download(chart_server, tmp_path, ['AAA'], bars.index[99])
+    chart_server.requests.clear()
+
+    # A 2:1 split on bar 120: the API now reports the earlier bars halved
+    split = bars.index[120]
+    bars.loc[split, 'Stock Splits'] = 2.0
+    before = bars.index < split
+    bars.loc[before, ['Open', 'High', 'Low', 'Close', 'Adj Close']] /= 2
+    result = download(chart_server, tmp_path, ['AAA'], bars.index[149])
+
+    assert result == {'AAA': 50}
+    assert [pd.Timestamp(query['period1'], unit='s') for _, query in chart_server.requests] == \
+        [bars.index[99] + pd.Timedelta(days=1), pd.Timestamp('2023-01-01')]
+    cached = pd.read_csv(tmp_path / 'AAA_historical_data.csv', index_col='Date', parse_dates=['Date'])
+    assert len(cached) == 150 and cached.index.is_unique
+    assert cached['Close'].to_numpy() == pytest.approx(bars['Close'].iloc[:150].to_numpy())
+    assert cached.loc[split, 'Stock Splits'] == 2.0
+
+
+def test_retries_transient_errors(chart_server, tmp_path):
+    chart_server.failures['BBB'] = 2
+    result = download(chart_server, tmp_path, ['BBB'], chart_server.bars['BBB'].index[9])
+    assert result == {'BBB': 10}
+    assert len(chart_server.requests) == 3
+
+
+def test_completed_sessions_end():
+    assert price_downloader.completed_sessions_end('2024-03-05 10:00-05:00') == pd.Timestamp('2024-03-05')
+    assert price_downloader.completed_sessions_end('2024-03-05 16:30-05:00') == pd.Timestamp('2024-03-06')
+    # 20:00 UTC is 15:00 in New York in winter
+    assert price_downloader.completed_sessions_end(pd.Timestamp('2024-03-05 20:00', tz='UTC')) == pd.Timestamp('2024-03-05')
+
+
+def test_unfinished_session_is_not_cached(chart_server, tmp_path, monkeypatch):
+    bars = chart_server.bars['AAA']
+    today = bars.index[100]
+    # During today's session: only the bars before today are fetched
+    monkeypatch.setattr(price_downloader, 'completed_sessions_end', lambda: today)
+    assert download(chart_server, tmp_path, ['AAA'], None) == {'AAA': 100}
+
+    # After the close the final bar for today is appended
+    bars.loc[today, 'Close'] = 123.0
+    monkeypatch.setattr(price_downloader, 'completed_sessions_end', lambda: today + pd.Timedelta(days=1))
+    assert download(chart_server, tmp_path, ['AAA'], None) == {'AAA': 1}
+    cached = pd.read_csv(tmp_path / 'AAA_historical_data.csv', index_col='Date', parse_dates=['Date'])
+    assert cached.index[-1] == today and cached['Close'].iloc[-1] == pytest.approx(123.0)
+
+
+def test_load_stock_data_reads_cache_without_network(tmp_path, monkeypatch):
+    import data_loader
+    calls = []
+    monkeypatch.setattr(data_loader, 'download_prices', lambda symbols, **kwargs: calls.append(list(symbols)))
+    synthetic_data.generate_ohlcv(50, symbol='AAA', start='2023-01-02').to_csv(tmp_path / 'AAA_historical_data.csv')
+
+    df = data_loader.load_stock_data('AAA', '2023-01-01', '2023-12-31', cache_dir=str(tmp_path))
+    assert len(df) == 50 and calls == []
+    data_loader.load_stock_data('AAA', '2023-01-01', '2023-12-31', cache_dir=str(tmp_path), update=True)
+    data_loader.load_stocks_data(['AAA', 'BBB'], '2023-01-01', '2023-12-31', cache_dir=str(tmp_path))
+    assert calls == [['AAA'], ['BBB']]
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import synthetic_data
+from correlation_analysis import analyze_technical_correlations, correlation_table
+from indicators import compute_indicators
+from news_cube import NewsCube
+from query_service import LRUCache, QueryStore, benchmark_latency, create_app
+
+
+def write_processed(output_dir, symbol, n_bars=120):
+    df = compute_indicators(synthetic_data.generate_ohlcv(n_bars, symbol=symbol, start='2023-01-02'))
+    df.index.name = 'Date'
+    df.to_csv(output_dir / 'technical_analysis' / f'{symbol}_processed_data.csv')
+    correlation_dir = output_dir / 'correlation_analysis' / symbol
+    correlation_dir.mkdir(parents=True, exist_ok=True)
+    correlation_table(*analyze_technical_correlations(df.copy())).to_csv(correlation_dir / 'correlations.csv')
+    return df
+
+
+@pytest.fixture
+def outputs(tmp_path):
+    (tmp_path / 'technical_analysis').mkdir()
+    write_processed(tmp_path, 'AAA')
+    write_processed(tmp_path, 'BBB')
+    news = synthetic_data.generate_headlines(500, symbols=['AAA', 'BBB'], start='2023-01-01', end='2023-06-30')
+    news['sentiment'] = np.linspace(-1, 1, len(news))
+    NewsCube().update(news).save(str(tmp_path / 'news_cube.npz'))
+    return tmp_path
+
+
+@pytest.fixture
+def client(outputs):
+    return TestClient(create_app(QueryStore(str(outputs), cache_size=4)))
+
+
+def test_indicator_lookups(client, outputs):
+    assert client.get('/symbols').json() == ['AAA', 'BBB']
+
+    latest = client.get('/symbols/AAA/indicators/latest').json()
+    assert latest['symbol'] == 'AAA' and set(latest['values']) >= {'Close', 'RSI', 'MACD'}
+
+    history = client.get('/symbols/AAA/indicators', params={
+        'start': '2023-02-01', 'end': '2023-02-28', 'columns': 'Close,RSI'}).json()
+    assert history and set(history[0]) == {'Date', 'Close', 'RSI'}
+    assert all('2023-02' in row['Date'] for row in history)
+    assert len(client.get('/symbols/AAA/indicators', params={'limit': 5}).json()) == 5
+
+    assert client.get('/symbols/ZZZ/indicators/latest').status_code == 404
+    assert client.get('/symbols/AAA/indicators', params={'columns': 'Nope'}).status_code == 400
+    assert client.get('/symbols/AAA/indicators', params={'start': 'yesterday-ish'}).status_code == 400
+    assert client.get('/symbols/AAA/sentiment', params={'end': '2023-13-45'}).status_code == 400
+
+
+def test_correlations_and_sentiment(client):
+    correlations = client.get('/symbols/BBB/correlations').json()
+    assert set(correlations['same_day']) == {'RSI', 'MACD', 'MACD_Signal', 'MACD_Hist', 'OBV'}
+    assert set(correlations['lagged']['RSI']) == {'t+1', 't+2', 't+3'}
+
+    assert client.get('/symbols/ZZZ/correlations').status_code == 404
+
+    sentiment = client.get('/symbols/AAA/sentiment').json()
+    assert sentiment and set(sentiment[0]) == {'date', 'avg_sentiment', 'news_count'}
+    assert client.get('/symbols/ZZZ/sentiment').status_code == 404
+
+
+def test_cache_invalidated_when_file_changes(client, outputs):
+    store = client.app.state.store
+    client.get('/symbols/AAA/indicators/latest')
+    client.get('/symbols/AAA/indicators/latest')
+    assert store.cache.hits == 1
+
+    df = write_processed(outputs, 'AAA', n_bars=150)
+    latest = client.get('/symbols/AAA/indicators/latest').json()
+    assert latest['date'] == df.index[-1].strftime('%Y-%m-%d')
+    assert store.cache.misses == 2
+
+
+def test_lru_evicts_least_recently_used(tmp_path):
+    paths = []
+    for name in 'abc':
+        path = tmp_path / name
+        path.write_text(name)
+        paths.append(str(path))
+    cache = LRUCache(maxsize=2)
+    for key in ('a', 'b', 'a', 'c'):
+        cache.get(key, [paths['abc'.index(key)]], lambda: key.upper())
+    assert list(cache.entries) == ['a', 'c']
+
+
+def test_benchmark_latency_reports_percentiles(outputs):
+    timings = benchmark_latency(create_app(QueryStore(str(outputs))), ['AAA'], requests_per_symbol=5)
+    assert set(timings) == {'/symbols/{}/indicators/latest', '/symbols/{}/indicators?limit=30',
+                            '/symbols/{}/correlations'}
+    for stats in timings.values():
+        assert stats['requests'] == 5 and 0 < stats['p50_ms'] <= stats['p99_ms']
@@ -0,0 +1,80 @@
+import matplotlib
+matplotlib.use('Agg')
+from docx import Document
+
+import generate_report
+import synthetic_data
+from indicators import compute_indicators
+
+SYMBOLS = ['AAPL', 'GOOG', 'META', 'NVDA', 'TSLA']
+
+
+def write_processed(input_dir, symbol, n_bars=160, seed=0):
+    df = compute_indicators(synthetic_data.generate_ohlcv(n_bars, symbol=symbol, seed=seed, start='2023-12-19'))
+    df.index.name = 'Date'
+    df.to_csv(input_dir / f'{symbol}_processed_data.csv')
+
+
+def build(tmp_path):
+    return generate_report.create_report(
+        input_dir=str(tmp_path / 'technical_analysis'),
+        output_path=str(tmp_path / 'report.docx'),
+        metrics_path=str(tmp_path / 'metrics.csv'),
+        cache_dir=str(tmp_path / 'cache'),
+    )
+
+
+def test_only_changed_sections_are_regenerated(tmp_path):
+    input_dir = tmp_path / 'technical_analysis'
+    input_dir.mkdir()
+    for symbol in SYMBOLS:
+        write_processed(input_dir, symbol)
+
+    assert set(build(tmp_path).values()) == {'generated'}
+    assert set(build(tmp_path).values()) == {'cached'}
+
+    write_processed(input_dir, 'META', seed=1)
+    status = build(tmp_path)
+    regenerated = {title for title, state in status.items() if state == 'generated'}
+    assert regenerated == {'Introduction', 'Momentum Analysis', 'Risk Analysis', 'Symbol Summary', 'Conclusion'}
+
+
+def test_report_text_comes_from_metrics(tmp_path):
+    input_dir = tmp_path / 'technical_analysis'
+    input_dir.mkdir()
+    for symbol in SYMBOLS:
+        write_processed(input_dir, symbol)
+    build(tmp_path)
+
+    metrics, _ = generate_report.compute_metrics(SYMBOLS, str(input_dir))
+    highest = metrics['avg_rsi'].idxmax()
+    text = '\n'.join(paragraph.text for paragraph in Document(str(tmp_path / 'report.docx')).paragraphs)
+    assert f"{highest} had the highest average RSI ({metrics.loc[highest, 'avg_rsi']:.1f})" in text
+    assert '65.3' not in text
+    assert len(Document(str(tmp_path / 'report.docx')).inline_shapes) == 8
+
+
+def test_metric_code_change_recomputes_cached_metrics(tmp_path, monkeypatch):
+    input_dir = tmp_path / 'technical_analysis'
+    input_dir.mkdir()
+    for symbol in SYMBOLS:
+        write_processed(input_dir, symbol)
+    cache = {'metrics': {}}
+    generate_report.compute_metrics(SYMBOLS, str(input_dir), cache)
+
+    original = generate_report.symbol_metrics
+
+    def symbol_metrics(df):
+        return dict(original(df), days=0)
+    monkeypatch.setattr(generate_report, 'symbol_metrics', symbol_metrics)
+    metrics, _ = generate_report.compute_metrics(SYMBOLS, str(input_dir), cache)
+    assert (metrics['days'] == 0).all()
+
+
+def test_figure_key_covers_plot_helpers():
+    import generate_report_plots
+    source = generate_report.plot_source(generate_report_plots.plot_1_price_technical)
+    assert 'def plot_1_price_technical' in source
+    assert 'def save_plot' in source and 'def processed_path' in source
+    assert "report_dir = 'reports/plots'" in source
+    assert 'def plot_2_rsi_comparison' not in source
@@ -0,0 +1,67 @@
+import pandas as pd
+
+import news_cube
+import run_analysis
+import synthetic_data
+from data_loader import load_news_data
+from news_cube import exchange_times
+from price_downloader import cache_path
+from sentiment_analyzer import apply_sentiment_analysis
+
+
+def write_feed(tmp_path, n_rows=3_000, symbols=('SYN0000', 'SYN0001')):
+    # Where run_analysis.main() looks for cached prices, relative to tmp_path
+    cache_dir = tmp_path / 'data' / 'yfinance_data'
+    cache_dir.mkdir(parents=True)
+    for symbol in symbols:
+        synthetic_data.generate_ohlcv(400, symbol=symbol, start='2020-01-01').to_csv(cache_path(symbol, cache_dir))
+    feed = synthetic_data.generate_headlines(n_rows, symbols=list(symbols), start='2020-01-01', end='2021-06-30')
+    # Raw feed timestamps carry the New York offset
+    feed['date'] = feed['date'].dt.strftime('%Y-%m-%d %H:%M:%S-04:00')
+    news_file = tmp_path / 'news.csv'
+    feed.to_csv(news_file, index=False)
+    return news_file, cache_dir
+
+
+def test_correlation_analysis_on_loaded_feed(tmp_path, monkeypatch):
+    news_file, cache_dir = write_feed(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    news_df = load_news_data(news_file)
+    news_df['sentiment'] = news_df['headline'].str.len() % 7 / 7
+
+    results = run_analysis.perform_correlation_analysis(news_df, cache_dir=str(cache_dir))
+
+    assert sorted(results) == ['SYN0000', 'SYN0001']
+    merged = results['SYN0000']
+    assert merged['news_count'].sum() > 0 and merged['avg_sentiment'].notna().all()
+    assert (tmp_path / 'outputs' / 'correlation' / 'SYN0001_correlation_data.csv').exists()
+
+
+def test_main_scores_each_story_once(tmp_path, monkeypatch):
+    news_file, _ = write_feed(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    scored = []
+
+    def score(df, text_column='headline'):
+        scored.append(len(df))
+        return apply_sentiment_analysis(df, text_column)
+    monkeypatch.setattr(run_analysis, 'apply_sentiment_analysis', score)
+    monkeypatch.setattr(news_cube, 'apply_sentiment_analysis', score)
+
+    run_analysis.main(str(news_file))
+
+    raw = pd.read_csv(news_file)
+    processed = pd.read_csv(tmp_path / 'outputs' / 'processed_news_data.csv')
+    assert scored == [len(processed)] and len(processed) < len(raw)
+    assert processed['cluster_size'].sum() == len(raw)
+
+    # news_count counts distinct stories, headline_count every headline
+    merged = pd.read_csv(tmp_path / 'outputs' / 'correlation' / 'SYN0000_correlation_data.csv',
+                         index_col=0, parse_dates=True)
+    stories = processed[processed['stock'] == 'SYN0000']
+    headlines = raw[raw['stock'] == 'SYN0000']
+    story_days = exchange_times(stories['date']).dt.normalize().value_counts()
+    headline_days = exchange_times(headlines['date']).dt.normalize().value_counts()
+    assert merged['news_count'].tolist() == story_days.reindex(merged.index).tolist()
+    assert merged['headline_count'].tolist() == headline_days.reindex(merged.index).tolist()
+    assert (merged['headline_count'] > merged['news_count']).any()
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+import synthetic_data
+from sketches import CountMinSketch, FeedStatistics, HyperLogLog, SpaceSaving, update_feed_statistics
+
+
+def zipf_items(n, n_items=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.zipf(1.3, n) % n_items).map('item{}'.format)
+
+
+def test_space_saving_exact_then_bounded():
+    items = zipf_items(50_000)
+    exact = items.value_counts()
+
+    small = SpaceSaving(capacity=len(exact)).update(items)
+    assert small.exact
+    assert small.top(5)['count'].tolist() == exact.head(5).tolist()
+
+    sketch = SpaceSaving(capacity=50)
+    for start in range(0, len(items), 7_000):
+        sketch.update(items.iloc[start:start + 7_000])
+    assert not sketch.exact
+    top = sketch.top(50)
+    true = exact.reindex(top.index, fill_value=0)
+    assert (top['count'] >= true).all()
+    assert (top['count'] - top['error'] <= true).all()
+    assert top['error'].max() <= len(items) / 50
+    # Everything more frequent than N / capacity is tracked
+    assert set(exact[exact > len(items) / 50].index) <= set(top.index)
+
+
+def test_count_min_never_undercounts():
+    items = zipf_items(50_000)
+    exact = items.value_counts()
+    sketch = CountMinSketch(epsilon=1e-3, delta=1e-3)
+    for part in np.array_split(items.to_numpy(), 4):
+        sketch.merge(CountMinSketch(epsilon=1e-3, delta=1e-3).update(part))
+    estimates = sketch.estimate(exact.index)
+    assert (estimates >= exact).all()
+    assert (estimates - exact).max() <= 1e-3 * len(items)
+
+
+def test_hyperloglog_exact_mode_and_merge():
+    small = HyperLogLog(p=12).update(np.arange(300))
+    assert small.exact and small.count() == 300
+
+    parts = [HyperLogLog(p=12).update(np.arange(start, start + 40_000)) for start in range(0, 100_000, 20_000)]
+    merged = HyperLogLog(p=12)
+    for part in parts:
+        merged.merge(part)
+    assert not merged.exact
+    # 1.6% standard error, checked at 4 sigma
+    assert abs(merged.count() - 120_000) < 0.065 * 120_000
+    assert merged.merge(small).count() == merged.count()
+
+
+def test_feed_statistics_merge_matches_exact_counts():
+    df = synthetic_data.generate_headlines(5_000, n_symbols=20, seed=3)
+    whole = FeedStatistics().update(df)
+    merged = FeedStatistics()
+    for part in np.array_split(np.arange(len(df)), 3):
+        merged.merge(FeedStatistics().update(df.iloc[part]))
+
+    exact = df['publisher'].value_counts()
+    for stats in (whole, merged):
+        assert stats.top_publishers(5)['count'].tolist() == exact.head(5).tolist()
+        daily = df.groupby(df['date'].dt.normalize())['stock'].nunique()
+        assert stats.distinct_tickers_per_day().tolist() == daily.tolist()
+        assert stats.distinct_tickers.count() == df['stock'].nunique()
+    domains = df['publisher'].str.extract(r'@(.+)$', expand=False).value_counts()
+    assert merged.top_domains(3)['count'].tolist() == domains.head(3).tolist()
+    assert merged.publisher_counts(['nobody']).tolist() == [0]
+
+
+def test_days_are_exchange_days():
+    df = pd.DataFrame({'headline': ['Late story', 'Next morning story'], 'publisher': ['a', 'b'],
+                       'stock': ['AAPL', 'TSLA'],
+                       'date': ['2020-06-05 21:30:00-04:00', '2020-06-06 01:30:00+00:00']})
+    stats = FeedStatistics().update(df)
+    # 01:30 UTC on the 6th is still the evening of the 5th in New York
+    assert stats.distinct_tickers_per_day().to_dict() == {pd.Timestamp('2020-06-05'): 2}
+
+
+def test_update_feed_statistics_reads_appended_rows(tmp_path):
+    df = synthetic_data.generate_headlines(4_000, n_symbols=20, seed=5)
+    news_file, state_file = tmp_path / 'news.csv', tmp_path / 'stats.pkl'
+    df.iloc[:2_500].to_csv(news_file, index=False)
+    update_feed_statistics(str(state_file), str(news_file))
+    df.iloc[2_500:].to_csv(news_file, mode='a', header=False, index=False)
+
+    stats = update_feed_statistics(str(state_file), str(news_file))
+    assert stats.n_rows == len(df)
+    assert stats.top_publishers(5)['count'].tolist() == df['publisher'].value_counts().head(5).tolist()
+    pd.testing.assert_series_equal(stats.headline_length_summary(),
+                                   df['headline'].str.len().describe().rename('headline_length'))
+
+    # A rewritten file is summarised from scratch
+    df.iloc[1_000:].to_csv(news_file, index=False)
+    assert update_feed_statistics(str(state_file), str(news_file)).n_rows == len(df) - 1_000
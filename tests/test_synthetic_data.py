@@ -0,0 +1,24 @@
+import synthetic_data
+
+
+def test_ohlcv_is_deterministic_and_consistent():
+    df = synthetic_data.generate_ohlcv(500, symbol='SYN0001', seed=7)
+    assert df.equals(synthetic_data.generate_ohlcv(500, symbol='SYN0001', seed=7))
+    assert not df.equals(synthetic_data.generate_ohlcv(500, symbol='SYN0002', seed=7))
+    assert list(df.columns) == synthetic_data.OHLCV_COLUMNS
+    assert (df['High'] >= df[['Open', 'Close']].max(axis=1)).all()
+    assert (df['Low'] <= df[['Open', 'Close']].min(axis=1)).all()
+    assert df.index.is_monotonic_increasing
+
+
+def test_headlines_match_raw_feed_layout():
+    df = synthetic_data.generate_headlines(2_000, n_symbols=5, seed=3)
+    assert df.equals(synthetic_data.generate_headlines(2_000, n_symbols=5, seed=3))
+    assert list(df.columns) == ['headline', 'url', 'publisher', 'date', 'stock']
+    assert set(df['stock']) <= set(synthetic_data.symbol_names(5))
+    assert df['headline'].str.len().min() > 0
+
+
+def test_headline_chunks_cover_requested_rows():
+    chunks = list(synthetic_data.iter_headline_chunks(2_500, chunk_size=1_000))
+    assert [len(chunk) for chunk in chunks] == [1_000, 1_000, 500]
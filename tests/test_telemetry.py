@@ -0,0 +1,91 @@
+import json
+
+import pandas as pd
+
+import telemetry
+
+
+@telemetry.instrument(rows='df')
+def double_close(df, symbol=None):
+    return df['Close'] * 2
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv(telemetry.TELEMETRY_ENV, raising=False)
+    double_close(pd.DataFrame({'Close': [1.0, 2.0]}))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_records_rows_and_symbol(tmp_path, monkeypatch):
+    path = tmp_path / 'telemetry.jsonl'
+    monkeypatch.setenv(telemetry.TELEMETRY_ENV, str(path))
+
+    with telemetry.measure('stage', symbol='AAPL'):
+        double_close(pd.DataFrame({'Close': [1.0, 2.0, 3.0]}))
+
+    inner, outer = read_records(path)
+    assert inner['stage'] == 'double_close'
+    assert inner['parent'] == 'stage'
+    assert inner['symbol'] == 'AAPL'
+    assert inner['rows'] == 3
+    assert outer['stage'] == 'stage' and outer['status'] == 'ok'
+    assert outer['wall_s'] >= inner['wall_s']
+
+
+def test_profile_written(tmp_path, monkeypatch):
+    monkeypatch.setenv(telemetry.TELEMETRY_ENV, str(tmp_path / 'telemetry.jsonl'))
+    monkeypatch.setenv(telemetry.PROFILE_ENV, 'double_close')
+    monkeypatch.setenv(telemetry.PROFILE_DIR_ENV, str(tmp_path / 'profiles'))
+
+    double_close(pd.DataFrame({'Close': [1.0]}), symbol='TSLA')
+
+    record, = read_records(tmp_path / 'telemetry.jsonl')
+    assert record['profile'].endswith('.prof')
+    assert (tmp_path / 'profiles').exists()
+
+
+def test_peak_rss_only_for_outermost_measurement(tmp_path, monkeypatch):
+    import threading
+    import numpy as np
+    import pytest
+    if not telemetry.reset_peak_rss():
+        pytest.skip("RSS high-water mark cannot be reset on this platform")
+    path = tmp_path / 'telemetry.jsonl'
+    monkeypatch.setenv(telemetry.TELEMETRY_ENV, str(path))
+
+    with telemetry.measure('light'):
+        pass
+    started, finish = threading.Event(), threading.Event()
+
+    def concurrent():
+        with telemetry.measure('concurrent'):
+            started.set()
+            finish.wait(10)
+    with telemetry.measure('outer'):
+        with telemetry.measure('heavy'):
+            block = np.ones(50_000_000)
+            del block
+        thread = threading.Thread(target=concurrent)
+        thread.start()
+        started.wait(10)
+    finish.set()
+    thread.join()
+
+    records = {record['stage']: record for record in read_records(path)}
+    assert records['outer']['peak_rss_mb'] - records['light']['peak_rss_mb'] > 300
+    assert records['heavy']['peak_rss_mb'] is None
+    assert records['concurrent']['peak_rss_mb'] is None
+
+
+def test_profile_requires_telemetry(capsys):
+    import pytest
+    from src.main import parse_args
+    with pytest.raises(SystemExit):
+        parse_args(['--profile', 'technical_analysis'])
+    assert '--telemetry' in capsys.readouterr().err
+    assert parse_args(['--profile', '*', '--telemetry', 'out.jsonl']).profile == ['*']
@@ -0,0 +1,65 @@
+import pandas as pd
+
+import text_analytics
+from text_analytics import NgramCounter
+
+
+def headlines():
+    return pd.DataFrame({
+        'headline': [
+            'Apple raises price target',
+            'APPLE raises price target on iPhone demand',
+            'Tesla shares fall after earnings miss',
+            'Tesla shares fall again',
+        ],
+        'stock': ['AAPL', 'AAPL', 'TSLA', 'TSLA'],
+        'date': pd.to_datetime(['2020-01-02', '2020-01-03', '2020-01-03', '2020-02-10']),
+    })
+
+
+def test_tokenize_hashes_match_single_tokens():
+    buffer, starts, ends, rows, hashes = text_analytics.tokenize(['Price, TARGET!', 'price-target'])
+    assert rows.tolist() == [0, 0, 1, 1]
+    words = [bytes(buffer[s:e]).decode() for s, e in zip(starts, ends)]
+    assert words == ['price', 'target', 'price', 'target']
+    assert hashes.tolist() == [text_analytics.token_hash(w) for w in words]
+
+
+def test_counts_per_order_and_stop_words():
+    counter = NgramCounter(ngram_range=(1, 2)).partial_fit(headlines())
+
+    unigrams = dict(counter.top_k(50, n=1).values)
+    assert unigrams['apple'] == 2 and unigrams['iphone'] == 1
+    assert 'on' not in unigrams and 'after' in unigrams
+    bigrams = dict(counter.top_k(50, n=2).values)
+    assert bigrams['price target'] == 2
+    assert bigrams['shares fall'] == 2
+    # N-grams do not span a removed stop word
+    assert 'target on' not in bigrams and 'target iphone' not in bigrams
+    assert counter.matrix.shape == (4, counter.n_features)
+    # tesla shares fall again: 4 unigrams + 3 bigrams
+    assert counter.matrix[3].sum() == 7
+
+def test_chunks_match_single_pass_and_filters():
+    df = headlines()
+    whole = NgramCounter().partial_fit(df)
+    chunked = NgramCounter()
+    for start in range(0, len(df), 3):
+        chunked.partial_fit(df.iloc[start:start + 3])
+    pd.testing.assert_frame_equal(whole.top_k(20), chunked.top_k(20))
+
+    aapl = dict(chunked.top_k(20, ticker='AAPL').values)
+    assert 'tesla' not in aapl and aapl['apple raises'] == 2
+    january = dict(chunked.top_k(20, start='2020-01-01', end='2020-01-31', n=2).values)
+    assert 'fall again' not in january and january['shares fall'] == 1
+
+    by_period = chunked.top_k_by(1, by='period', freq='M', ticker='TSLA', n=2)
+    assert by_period['period'].tolist() == ['2020-01', '2020-02']
+
+
+def test_days_are_exchange_days():
+    df = pd.DataFrame({'headline': ['Apple raises price target'], 'stock': ['AAPL'],
+                       'date': ['2020-02-01 02:00:00+00:00']})
+    counter = NgramCounter().partial_fit(df)
+    # 02:00 UTC on Feb 1st is Jan 31st in New York
+    assert counter.top_k(1, start='2020-01-31', end='2020-01-31')['count'].tolist() == [1]